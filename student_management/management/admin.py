@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Student, Course, Enrollment
+from .models import Student, Course, Enrollment, WaitlistEntry, Job, ArchivedEnrollment
+from .reports import enrollment_summary
 
 # Register your models here.
 
@@ -12,17 +13,54 @@ class StudentAdmin(admin.ModelAdmin):
     
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ['title', 'credits', 'created_at']
+    list_display = ['title', 'credits', 'capacity', 'enrollment_count', 'created_at']
     search_fields = ['title']
     list_filter = ['credits', 'created_at']
     ordering = ['title']
     
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
-    list_display = ['student', 'course', 'grade', 'enrollment_date']
-    list_filter = ['grade', 'enrollment_date', 'course']
+    list_display = ['student', 'course', 'grade', 'term', 'enrollment_date']
+    list_filter = ['term', 'grade', 'enrollment_date', 'course']
     search_fields = ['student__name', 'course__title']
     ordering = ['student__name', 'course__title']
+    autocomplete_fields = ['student', 'course']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('student', 'course')
\ No newline at end of file
+        return super().get_queryset(request).select_related('student', 'course')
+    
+    def changelist_view(self, request, extra_context=None):
+        
+        response = super().changelist_view(request, extra_context)
+        # Grade totals of the filtered changelist, in one query.
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['summary'] = enrollment_summary(changelist.queryset)
+        return response
+    
+@admin.register(ArchivedEnrollment)
+class ArchivedEnrollmentAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'grade', 'term', 'archived_at']
+    list_filter = ['term', 'grade']
+    search_fields = ['student__name', 'course__title']
+    autocomplete_fields = ['student', 'course']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('student', 'course')
+    
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course', 'created_at']
+    list_filter = ['course']
+    search_fields = ['student__name', 'course__title']
+    autocomplete_fields = ['student', 'course']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('student', 'course')
+    
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'max_attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['attempts', 'worker', 'started_at', 'expires_at', 'finished_at', 'result', 'error']
+    ordering = ['-created_at']
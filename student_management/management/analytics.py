@@ -0,0 +1,222 @@
+import uuid
+from itertools import islice
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from .models import Student, Course, Enrollment, ArchivedEnrollment
+from .replicas import primary_reads
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is in requirements.txt
+    np = None
+
+# Cohort analytics computed column-wise with NumPy. Graded enrollments, of
+# open and archived (closed) terms alike, as for the stored standing, are
+# streamed out of the database as (student_id, course_id, credits,
+# grade_index) tuples in chunks, and every statistic is then a handful of
+# bincount/argsort passes over the arrays instead of per-object Python.
+#
+# The report page is cached under a version token kept in the same cache.
+# invalidate_cohort_report() replaces the token when a write commits (from
+# the model signals, and from the bulk writers that bypass them), so the
+# NumPy pass only reruns after the data changed, and checking costs no query.
+# An evicted token is replaced by a new one, so it can never reuse an old
+# report.
+
+CHUNK_SIZE = 100_000
+COHORT_CACHE_KEY = 'management:cohort:%s'
+COHORT_VERSION_KEY = 'management:cohort_version'
+PERCENTILES = [10, 25, 50, 75, 90]
+
+GRADES = list(Enrollment.GRADE_POINTS)
+
+
+def _require_numpy():
+
+    if np is None:
+        raise ImproperlyConfigured('Cohort analytics require numpy (pip install -r requirements.txt).')
+
+def load_enrollment_arrays(enrollments=None, chunk_size=CHUNK_SIZE):
+    """
+    Graded enrollments as four parallel arrays: student_id, course_id,
+    credits and grade_index (a position in GRADES). Reads ``enrollments``,
+    or by default every Enrollment and ArchivedEnrollment row.
+    """
+
+    _require_numpy()
+
+    grade_index = Case(
+        *[When(grade=grade, then=Value(i)) for i, grade in enumerate(GRADES)],
+        output_field=IntegerField()
+    )
+
+    def graded(queryset):
+
+        return (
+            queryset
+            .filter(grade__in=GRADES)
+            .order_by()
+            .annotate(grade_index=grade_index)
+            .values_list('student_id', 'course_id', 'course__credits', 'grade_index')
+        )
+
+    if enrollments is None:
+        rows = graded(Enrollment.objects.all()).union(graded(ArchivedEnrollment.objects.all()), all=True)
+    else:
+        rows = graded(enrollments)
+    rows = rows.iterator(chunk_size=chunk_size)
+
+    chunks = []
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        chunks.append(np.array(chunk, dtype=np.int64))
+
+    data = np.concatenate(chunks) if chunks else np.empty((0, 4), dtype=np.int64)
+
+    return data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+
+def student_standings(student_ids, credits, points):
+    """GPA, class rank (1 = best, ties share a rank) and GPA percentile per student."""
+
+    ids, index = np.unique(student_ids, return_inverse=True)
+    graded_credits = np.bincount(index, weights=credits)
+    quality_points = np.bincount(index, weights=points * credits)
+    gpa = np.round(quality_points / np.maximum(graded_credits, 1), 2)
+
+    ascending = np.sort(gpa)
+    # Competition ranking: one plus the number of students with a higher GPA.
+    rank = len(gpa) - np.searchsorted(ascending, gpa, side='right') + 1
+    # Share of the cohort at or below this GPA.
+    percentile = np.searchsorted(ascending, gpa, side='right') / max(len(gpa), 1) * 100
+
+    return {
+        'ids': ids,
+        'gpa': gpa,
+        'credits': graded_credits.astype(np.int64),
+        'rank': rank,
+        'percentile': np.round(percentile, 1),
+    }
+
+def course_distributions(course_ids, grade_index, points):
+    """Per-course graded count, grade-point mean / standard deviation and grade histogram."""
+
+    ids, index = np.unique(course_ids, return_inverse=True)
+    count = np.bincount(index, minlength=len(ids))
+    safe_count = np.maximum(count, 1)
+    mean = np.bincount(index, weights=points, minlength=len(ids)) / safe_count
+    mean_of_squares = np.bincount(index, weights=points ** 2, minlength=len(ids)) / safe_count
+    std = np.sqrt(np.maximum(mean_of_squares - mean ** 2, 0))
+
+    histogram = np.bincount(
+        index * len(GRADES) + grade_index, minlength=len(ids) * len(GRADES)
+    ).reshape(len(ids), len(GRADES))
+
+    return {
+        'ids': ids,
+        'count': count,
+        'mean': np.round(mean, 2),
+        'std': np.round(std, 2),
+        'histogram': histogram,
+    }
+
+def compute_cohort_analytics(enrollments=None, chunk_size=CHUNK_SIZE):
+
+    student_ids, course_ids, credits, grade_index = load_enrollment_arrays(enrollments, chunk_size)
+    points = np.array([Enrollment.GRADE_POINTS[grade] for grade in GRADES])[grade_index]
+
+    students = student_standings(student_ids, credits, points)
+
+    return {
+        'students': students,
+        'courses': course_distributions(course_ids, grade_index, points),
+        'gpa_percentiles': (
+            dict(zip(PERCENTILES, np.round(np.percentile(students['gpa'], PERCENTILES), 2).tolist()))
+            if len(students['gpa']) else {}
+        ),
+    }
+
+def top_students(analytics, limit=20):
+    """The ``limit`` best-ranked students as template-ready rows."""
+
+    students = analytics['students']
+    order = np.argsort(students['rank'], kind='stable')[:limit]
+    names = dict(Student.objects.filter(pk__in=students['ids'][order].tolist()).values_list('pk', 'name'))
+
+    rows = []
+    for i in order:
+        pk = int(students['ids'][i])
+        rows.append({
+            'pk': pk,
+            'name': names.get(pk, ''),
+            'gpa': float(students['gpa'][i]),
+            'credits': int(students['credits'][i]),
+            'rank': int(students['rank'][i]),
+            'percentile': float(students['percentile'][i]),
+        })
+
+    return rows
+
+def course_rows(analytics):
+
+    courses = analytics['courses']
+    titles = dict(Course.objects.filter(pk__in=courses['ids'].tolist()).values_list('pk', 'title'))
+
+    rows = [
+        {
+            'pk': int(pk),
+            'title': titles.get(int(pk), ''),
+            'graded': int(courses['count'][i]),
+            'mean': float(courses['mean'][i]),
+            'std': float(courses['std'][i]),
+            'distribution': list(zip(GRADES, courses['histogram'][i].tolist())),
+        }
+        for i, pk in enumerate(courses['ids'])
+    ]
+
+    return sorted(rows, key=lambda row: row['title'])
+
+def _cohort_cache():
+
+    return caches[getattr(settings, 'COHORT_CACHE_ALIAS', 'default')]
+
+def cohort_version():
+    """The current version token of the cohort report."""
+
+    cache = _cohort_cache()
+    cache.add(COHORT_VERSION_KEY, uuid.uuid4().hex, None)
+
+    return cache.get(COHORT_VERSION_KEY)
+
+def invalidate_cohort_report():
+
+    # After the commit: a miss in between would cache the old report again.
+    transaction.on_commit(lambda: _cohort_cache().set(COHORT_VERSION_KEY, uuid.uuid4().hex, None))
+
+def cohort_report(limit=20):
+    """
+    Template context of the cohort report: top_students(), course_rows(),
+    GPA percentiles and the ranked count. Cached under cohort_version().
+    """
+
+    cache = _cohort_cache()
+    key = COHORT_CACHE_KEY % cohort_version()
+    report = cache.get(key)
+
+    if report is None:
+        # On the primary, as a lagging replica would cache old data under the new token.
+        with primary_reads():
+            analytics = compute_cohort_analytics()
+            report = {
+                'top_students': top_students(analytics, limit),
+                'courses': course_rows(analytics),
+                'gpa_percentiles': analytics['gpa_percentiles'],
+                'ranked_count': len(analytics['students']['ids']),
+            }
+        cache.set(key, report, getattr(settings, 'COHORT_CACHE_TIMEOUT', 3600))
+
+    return report
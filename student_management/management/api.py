@@ -0,0 +1,186 @@
+import hashlib
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+from .filters import enrollment_filters, filter_enrollments, validate_enrollment_filters
+from .models import Student, Course, Enrollment, ArchivedEnrollment
+from .pagination import CursorPaginator
+from .standing import STANDING_FIELDS
+
+# Read-only JSON API (v1). Rows are serialized straight from values(), so
+# no model instances are built. ?fields= selects a subset of a resource's
+# fields, lists are cursor-paginated in primary-key order, and every
+# response carries a strong ETag computed from the rows' version columns
+# only, so a matching If-None-Match is answered with 304 before the full
+# rows are read or serialized.
+#
+# The version columns include the counters and standing that signals and
+# bulk updates write without bumping updated_at.
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+RESOURCES = {
+    'students': {
+        'queryset': lambda params: Student.objects.all(),
+        'fields': {
+            'id': 'pk', 'name': 'name', 'email': 'email', 'enrollment_count': 'enrollment_count',
+            'gpa': 'gpa', 'credits_attempted': 'credits_attempted', 'credits_earned': 'credits_earned',
+            'in_progress_count': 'in_progress_count', 'created_at': 'created_at', 'updated_at': 'updated_at',
+        },
+        'version': ['updated_at', 'enrollment_count', *STANDING_FIELDS],
+    },
+    'courses': {
+        'queryset': lambda params: Course.objects.all(),
+        'fields': {
+            'id': 'pk', 'title': 'title', 'credits': 'credits', 'capacity': 'capacity',
+            'enrollment_count': 'enrollment_count', 'created_at': 'created_at', 'updated_at': 'updated_at',
+        },
+        'version': ['updated_at', 'enrollment_count'],
+    },
+    'enrollments': {
+        'queryset': lambda params: filter_enrollments(Enrollment.objects.all(), enrollment_filters(params)),
+        'fields': {
+            'id': 'pk', 'student_id': 'student_id', 'student_name': 'student__name', 'course_id': 'course_id',
+            'course_title': 'course__title', 'credits': 'course__credits', 'grade': 'grade', 'term': 'term',
+            'enrollment_date': 'enrollment_date', 'updated_at': 'updated_at',
+        },
+        'version': ['updated_at', 'student__updated_at', 'course__updated_at'],
+    },
+}
+
+TRANSCRIPT_FIELDS = ['pk', 'name', 'email', 'enrollment_count', *STANDING_FIELDS]
+
+
+def _error(message, status):
+
+    return JsonResponse({'error': message}, status=status)
+
+def _etag(*parts):
+
+    payload = json.dumps(parts, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return '"%s"' % hashlib.sha1(payload.encode()).hexdigest()
+
+def _respond(request, etag, build):
+    """304 if the client already holds ``etag``, otherwise ``build()`` as JSON."""
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(build())
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+
+    return response
+
+def _selected_fields(request, resource):
+
+    available = RESOURCES[resource]['fields']
+    requested = request.GET.get('fields')
+
+    if not requested:
+        return list(available)
+
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown or not fields:
+        raise ValueError(f'Unknown field(s): {", ".join(unknown) or "(none)"}. Available: {", ".join(available)}.')
+
+    return fields
+
+def _rows(queryset, resource, fields):
+
+    paths = [RESOURCES[resource]['fields'][field] for field in fields]
+
+    return [dict(zip(fields, row)) for row in queryset.values_list(*paths)]
+
+@require_safe
+def resource_list(request, resource):
+
+    if resource not in RESOURCES:
+        return _error('Unknown resource.', 404)
+
+    config = RESOURCES[resource]
+
+    # The page is located with (pk, version columns) only; the ETag covers
+    # exactly the rows on it, so edits, inserts and deletes inside the page
+    # all change it.
+    try:
+        fields = _selected_fields(request, resource)
+        per_page = min(max(int(request.GET.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        if resource == 'enrollments':
+            validate_enrollment_filters(enrollment_filters(request.GET))
+        queryset = config['queryset'](request.GET)
+        paginator = CursorPaginator(queryset.values('pk', *config['version']), per_page, [])
+        page = paginator.get_page(request.GET.get('cursor'), strict=True)
+    except ValueError as e:
+        return _error(str(e), 400)
+    except ValidationError as e:
+        return _error(' '.join(e.messages), 400)
+    versions = [list(row.values()) for row in page]
+    etag = _etag(resource, fields, versions, page.has_next(), page.has_previous())
+
+    def build():
+
+        rows = _rows(queryset.filter(pk__in=[row['pk'] for row in page]).order_by('pk'), resource, fields)
+
+        return {'results': rows, 'next': page.next_cursor, 'previous': page.previous_cursor}
+
+    return _respond(request, etag, build)
+
+@require_safe
+def resource_detail(request, resource, pk):
+
+    if resource not in RESOURCES:
+        return _error('Unknown resource.', 404)
+
+    try:
+        fields = _selected_fields(request, resource)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    config = RESOURCES[resource]
+    queryset = config['queryset']({}).filter(pk=pk)
+    version = queryset.values_list(*config['version']).first()
+
+    if version is None:
+        return _error('Not found.', 404)
+
+    return _respond(request, _etag(resource, pk, fields, version), lambda: _rows(queryset, resource, fields)[0])
+
+@require_safe
+def student_transcript(request, pk):
+
+    students = Student.objects.filter(pk=pk)
+
+    def history(*fields):
+
+        # Open and archived (closed term) enrollments in one UNION ALL query.
+        live = Enrollment.objects.filter(student_id=pk).order_by().values_list(*fields)
+        archived = ArchivedEnrollment.objects.filter(student_id=pk).order_by().values_list(*fields)
+
+        return sorted(live.union(archived, all=True), key=lambda row: row[0])
+
+    version = students.values_list(*RESOURCES['students']['version']).first()
+    if version is None:
+        return _error('Not found.', 404)
+
+    enrollment_versions = history('pk', 'updated_at', 'course__updated_at')
+    etag = _etag('transcript', pk, version, enrollment_versions)
+
+    def build():
+
+        student = dict(zip(['id', *TRANSCRIPT_FIELDS[1:]], students.values_list(*TRANSCRIPT_FIELDS).get()))
+        rows = history('pk', 'course_id', 'course__title', 'course__credits', 'grade', 'term')
+        student['courses'] = [
+            dict(zip(['enrollment_id', 'course_id', 'title', 'credits', 'grade', 'term'], row))
+            for row in sorted(rows, key=lambda row: (row[5], row[2], row[0]))
+        ]
+
+        return student
+
+    return _respond(request, etag, build)
@@ -0,0 +1,94 @@
+from django.db import router, transaction
+from .analytics import invalidate_cohort_report
+from .counters import rebuild_enrollment_counts
+from .models import Student, Course, Enrollment, ArchivedEnrollment, WaitlistEntry
+from .registration import promote_waitlist
+from .stats import invalidate_dashboard_stats
+from .terms import current_term
+from .transcripts import invalidate_transcripts
+
+# Archival of closed terms. Enrollment holds the open terms only, so every
+# list, filter, counter and seat count works on a table that does not grow
+# with years of history; enrollments of terms before the current one are
+# moved to ArchivedEnrollment, keeping their ids.
+#
+# A term is moved BATCH_SIZE enrollments at a time, each batch in its own
+# short transaction that copies the rows, deletes them from Enrollment and
+# refreshes the counters (which count open terms) of the students and
+# courses involved. Readers see every enrollment in exactly one of the two
+# tables, and an interrupted run can simply be repeated. Standing and
+# transcripts read both tables (see management.transcripts.enrollment_history),
+# so archiving does not change them.
+
+BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ['id', 'student_id', 'course_id', 'grade', 'term', 'enrollment_date', 'updated_at']
+
+
+def closed_terms(before=None):
+    """Terms before ``before`` (the current term by default) that still have enrollments in Enrollment."""
+
+    return list(
+        Enrollment.objects
+        .filter(term__lt=before or current_term())
+        .order_by('term')
+        .values_list('term', flat=True)
+        .distinct()
+    )
+
+def _archive_batch(term, batch_size):
+
+    using = router.db_for_write(Enrollment)
+
+    with transaction.atomic(using=using):
+        # Locked so a grade written meanwhile is not lost between copy and delete.
+        rows = list(
+            Enrollment.objects
+            .select_for_update()
+            .filter(term=term)
+            .order_by('pk')
+            .values_list(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedEnrollment.objects.bulk_create(
+            ArchivedEnrollment(**dict(zip(ARCHIVED_FIELDS, row))) for row in rows
+        )
+        Enrollment.objects.filter(pk__in=[row[0] for row in rows])._raw_delete(using)
+
+        student_ids = {row[1] for row in rows}
+        course_ids = {row[2] for row in rows}
+        rebuild_enrollment_counts(Student, student_ids)
+        rebuild_enrollment_counts(Course, course_ids)
+        invalidate_transcripts(student_ids)
+        invalidate_dashboard_stats()
+        invalidate_cohort_report()
+
+        # Seats of the closed term are free for the waiting students.
+        waiting = WaitlistEntry.objects.filter(course_id__in=course_ids).values_list('course_id', flat=True)
+        for course_id in sorted(set(waiting)):
+            promote_waitlist(course_id)
+
+    return len(rows)
+
+def archive_term(term, batch_size=BATCH_SIZE, progress=None):
+    """
+    Move the enrollments of ``term`` to ArchivedEnrollment in batches of
+    ``batch_size``. ``progress`` is called with (term, enrollments moved)
+    after each batch. Returns the number moved.
+    """
+
+    report = progress or (lambda term, moved: None)
+    moved = 0
+
+    while batch := _archive_batch(term, batch_size):
+        moved += batch
+        report(term, moved)
+
+    return moved
+
+def archive_closed_terms(before=None, batch_size=BATCH_SIZE, progress=None):
+    """Archive every closed_terms(before). Returns {term: enrollments moved}."""
+
+    return {term: archive_term(term, batch_size, progress) for term in closed_terms(before)}
@@ -0,0 +1,44 @@
+from .models import Student, Course
+from .pagination import CursorPaginator
+from .search import match
+
+# Lookups behind the student and course pickers. Options are fetched a
+# page at a time in name/title order (keyset-paginated over the
+# student_name_idx/course_title_idx indexes) and narrowed with the search
+# index, so a picker never loads the whole table.
+
+PAGE_SIZE = 20
+
+LOOKUPS = {
+    'students': (Student, 'name', ['pk', 'name', 'email']),
+    'courses': (Course, 'title', ['pk', 'title', 'credits']),
+}
+
+
+def option_label(obj):
+
+    if isinstance(obj, Student):
+        return f'{obj.name} ({obj.email})'
+
+    return f'{obj.title} ({obj.credits} credits)'
+
+def autocomplete(kind, query='', cursor=None, per_page=PAGE_SIZE):
+    """
+    One page of ``kind`` ('students' or 'courses') options matching
+    ``query`` as ``{'results': [{'id', 'text'}], 'next': cursor}``. An
+    invalid ``cursor`` raises InvalidCursor.
+    """
+
+    model, ordering, fields = LOOKUPS[kind]
+    queryset = model.objects.only(*fields)
+
+    query = query.strip()
+    if query:
+        queryset = match(queryset, query)
+
+    page = CursorPaginator(queryset, min(max(int(per_page), 1), 100), [ordering]).get_page(cursor, strict=True)
+
+    return {
+        'results': [{'id': obj.pk, 'text': option_label(obj)} for obj in page],
+        'next': page.next_cursor,
+    }
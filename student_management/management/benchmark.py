@@ -0,0 +1,190 @@
+import math
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.test import Client
+from django.urls import reverse
+from .models import Student, Course, Enrollment, Job, WaitlistEntry
+from .registration import register
+
+# Benchmark harness: drives every GET-able URL of management/urls.py through
+# the test client against whatever data is loaded (see synthetic.py and the
+# "benchmark" command) and reports latency percentiles, query counts and
+# peak traced memory per URL. Results are plain dicts so runs can be saved
+# as JSON and compared. registration_stress() hammers one course with
+# concurrent registrations to check that seats are never overbooked.
+
+# Sample values for the non-pk URL parameters.
+URL_ARGUMENTS = {
+    'dataset': 'enrollments',
+    'resource': 'students',
+    'kind': 'students',
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted ``values``."""
+
+    if not values:
+        return 0.0
+
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+def _sample_pk(name):
+
+    if 'course' in name:
+        model = Course
+    elif 'enrollment' in name:
+        model = Enrollment
+    elif 'job' in name:
+        model = Job
+    else:
+        model = Student
+
+    return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+def benchmark_urls(names=None):
+    """(url name, path) for every named route in management/urls.py that can be filled in."""
+
+    from . import urls
+
+    found = []
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        if not name or (names and name not in names):
+            continue
+
+        kwargs = {}
+        for argument in getattr(pattern.pattern, 'converters', {}):
+            kwargs[argument] = _sample_pk(name) if argument == 'pk' else URL_ARGUMENTS.get(argument)
+
+        if None in kwargs.values():
+            continue
+
+        found.append((name, reverse(name, kwargs=kwargs)))
+
+    return found
+
+def _get(client, path):
+
+    response = client.get(path)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+
+    return response
+
+def measure(client, path, repeat):
+
+    _get(client, path)
+
+    latencies = []
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    for _ in range(repeat):
+        queries = 0
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            response = _get(client, path)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        _get(client, path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def run_benchmark(repeat=10, names=None):
+    """Measure every URL (or only ``names``) against the current database."""
+
+    client = Client()
+    caches['default'].clear()
+
+    return {name: measure(client, path, repeat) for name, path in benchmark_urls(names)}
+
+def compare(results, baseline, threshold=1.5, noise_ms=1.0):
+    """
+    Regressions of ``results`` against ``baseline`` (both as saved by the
+    benchmark command): p50 more than ``threshold`` times the baseline and
+    ``noise_ms`` slower, or more queries than the baseline ran.
+    """
+
+    regressions = []
+
+    for size, urls in results.items():
+        for name, current in urls.get('urls', {}).items():
+            previous = baseline.get(size, {}).get('urls', {}).get(name)
+            if previous is None:
+                continue
+
+            if current['p50_ms'] > previous['p50_ms'] * threshold and current['p50_ms'] - previous['p50_ms'] > noise_ms:
+                regressions.append(f'{size} {name}: p50 {previous["p50_ms"]}ms -> {current["p50_ms"]}ms')
+            if current['queries'] > previous['queries']:
+                regressions.append(f'{size} {name}: {previous["queries"]} -> {current["queries"]} queries')
+
+    return regressions
+
+def registration_stress(course_id, student_ids, concurrency, waitlist=False):
+    """
+    Register every student for the course from ``concurrency`` threads, each
+    with its own database connection, then check the result against the
+    course capacity. Returns the outcome counts and a list of problems.
+    """
+
+    def attempt(student_id):
+
+        try:
+            result = register(student_id, course_id, waitlist=waitlist)
+            return 'waitlisted' if isinstance(result, WaitlistEntry) else 'enrolled'
+        except ValidationError:
+            return 'full'
+        except DatabaseError:
+            return 'error'
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = Counter(pool.map(attempt, student_ids))
+    outcomes['seconds'] = round(time.perf_counter() - started, 3)
+
+    course = Course.objects.get(pk=course_id)
+    enrolled = Enrollment.objects.filter(course_id=course_id).count()
+    waiting = WaitlistEntry.objects.filter(course_id=course_id).count()
+
+    problems = []
+    if course.capacity is not None and enrolled > course.capacity:
+        problems.append(f'{enrolled} enrolled in a course with {course.capacity} seats.')
+    if enrolled != outcomes['enrolled']:
+        problems.append(f'{outcomes["enrolled"]} registrations succeeded but {enrolled} enrollments exist.')
+    if course.enrollment_count != enrolled:
+        problems.append(f'Stored enrollment_count is {course.enrollment_count}, actual {enrolled}.')
+    if waiting != outcomes['waitlisted']:
+        problems.append(f'{outcomes["waitlisted"]} students waitlisted but {waiting} waitlist entries exist.')
+
+    return outcomes, problems
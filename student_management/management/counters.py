@@ -0,0 +1,62 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Student, Course, Enrollment
+
+# Stored Student.enrollment_count / Course.enrollment_count columns.
+# Every adjustment is a single UPDATE ... SET enrollment_count =
+# enrollment_count + n, so concurrent enrollments never lose increments.
+
+COUNTED_MODELS = {
+    Student: 'student',
+    Course: 'course',
+}
+
+
+def adjust_enrollment_counts(student_id=None, course_id=None, delta=1):
+
+    for model, pk in ((Student, student_id), (Course, course_id)):
+        if pk is None:
+            continue
+
+        queryset = model.objects.filter(pk=pk)
+        if delta < 0:
+            # Never push a drifted counter below zero; rebuild_enrollment_counts fixes drift.
+            queryset = queryset.filter(enrollment_count__gte=-delta)
+        queryset.update(enrollment_count=F('enrollment_count') + delta)
+
+def _actual_count(model):
+
+    field = COUNTED_MODELS[model]
+
+    return Coalesce(
+        Subquery(
+            Enrollment.objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+def rebuild_enrollment_counts(model, pks=None):
+    """
+    Recompute ``model.enrollment_count`` from the Enrollment table in one
+    UPDATE, for every row or only for ``pks``. Returns the rows updated.
+    """
+
+    queryset = model.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+
+    return queryset.update(enrollment_count=_actual_count(model))
+
+def enrollment_count_drift(model):
+    """Rows whose stored enrollment_count does not match the Enrollment table."""
+
+    return (
+        model.objects
+        .annotate(actual_count=_actual_count(model))
+        .exclude(enrollment_count=F('actual_count'))
+    )
@@ -0,0 +1,98 @@
+from django.db import router, transaction
+from .analytics import invalidate_cohort_report
+from .counters import rebuild_enrollment_counts
+from .models import Student, Course, Enrollment, ArchivedEnrollment, WaitlistEntry
+from .registration import promote_waitlist
+from .standing import recompute_standing
+from .stats import invalidate_dashboard_stats
+from .transcripts import invalidate_transcripts
+
+# Deleting a student or course with many enrollments. Model.delete() makes
+# the collector load every enrollment and fire its signals inside one long
+# transaction. Instead, enrollments are removed here BATCH_SIZE at a time,
+# each batch in its own short transaction: the ids are read, deleted with
+# one DELETE ... WHERE id IN (...) without loading instances (_raw_delete,
+# as QuerySet.delete() does for models without signals), and the derived
+# data the per-row signals would have updated is refreshed for the whole
+# batch. The student or course itself is deleted last, once nothing
+# references it, so its own signals (search index, caches) still run.
+#
+# Every batch leaves the counters, standing and waitlists consistent, so an
+# interrupted deletion can simply be run again. Archived enrollments (closed
+# terms) are deleted the same way once the open ones are gone; they count
+# towards standing only.
+
+BATCH_SIZE = 1000
+
+# The other side of each enrollment: deleting a student frees course seats,
+# deleting a course changes students' standing.
+RELATED = {
+    Student: ('student_id', 'course_id'),
+    Course: ('course_id', 'student_id'),
+}
+
+
+def _delete_batch(model, pk, batch_size, table=Enrollment):
+
+    own, other = RELATED[model]
+    using = router.db_for_write(table)
+    live = table is Enrollment
+
+    with transaction.atomic(using=using):
+        rows = list(
+            table.objects
+            .filter(**{own: pk})
+            .order_by('pk')
+            .values_list('pk', other)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        table.objects.filter(pk__in=[row[0] for row in rows])._raw_delete(using)
+        other_ids = {row[1] for row in rows}
+        if live:
+            rebuild_enrollment_counts(model, [pk])
+
+        invalidate_dashboard_stats()
+        invalidate_cohort_report()
+        if model is Student:
+            recompute_standing([pk])
+            if live:
+                rebuild_enrollment_counts(Course, other_ids)
+                waiting = WaitlistEntry.objects.filter(course_id__in=other_ids).values_list('course_id', flat=True)
+                for course_id in sorted(set(waiting)):
+                    promote_waitlist(course_id)
+        else:
+            if live:
+                rebuild_enrollment_counts(Student, other_ids)
+            recompute_standing(other_ids)
+            invalidate_transcripts(other_ids)
+
+    return len(rows)
+
+def delete_with_enrollments(instance, batch_size=BATCH_SIZE, progress=None):
+    """
+    Delete a Student or Course and its enrollments, open and archived, in
+    batches of ``batch_size``. ``progress`` is called with (enrollments
+    deleted, open enrollments at the start) after each batch. Returns the
+    number of enrollments deleted.
+    """
+
+    model = type(instance)
+    total = instance.enrollment_count
+    report = progress or (lambda deleted, total: None)
+    deleted = 0
+
+    if model is Student:
+        # So freed seats are never offered back to the student being deleted.
+        WaitlistEntry.objects.filter(student_id=instance.pk).delete()
+
+    for table in (Enrollment, ArchivedEnrollment):
+        while batch := _delete_batch(model, instance.pk, batch_size, table):
+            deleted += batch
+            report(deleted, max(total, deleted))
+
+    # Only waitlist entries are left to cascade.
+    instance.delete()
+
+    return deleted
@@ -0,0 +1,121 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, Value
+from .filters import filter_enrollments
+from .models import Student, Course, Enrollment, ArchivedEnrollment
+
+# Streaming exports. Rows come from values_list() through
+# QuerySet.iterator(chunk_size=...), so no model instances are built and
+# memory use does not grow with table size, and each row is encoded and
+# yielded as soon as it is read.
+#
+# Filters come from the enrollment list (see management.filters) and must
+# be validated before streaming starts: an error raised mid-stream would
+# only truncate the file.
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _students(filters):
+
+    students = Student.objects.all()
+    if filters.get('student'):
+        students = students.filter(pk=filters['student'])
+
+    return students.values_list('pk', 'name', 'email', 'enrollment_count', 'created_at', 'updated_at').order_by('pk')
+
+def _courses(filters):
+
+    courses = Course.objects.all()
+    if filters.get('course'):
+        courses = courses.filter(pk=filters['course'])
+
+    return courses.values_list('pk', 'title', 'credits', 'enrollment_count', 'created_at', 'updated_at').order_by('pk')
+
+def _enrollments(filters):
+
+    return filter_enrollments(Enrollment.objects.all(), filters).values_list(
+        'pk', 'student_id', 'student__name', 'student__email', 'course_id', 'course__title',
+        'course__credits', 'grade', 'term', 'enrollment_date', 'updated_at'
+    ).order_by('pk')
+
+def _transcripts(filters):
+
+    # One line per course taken, open and archived terms alike, grouped by student.
+    fields = [
+        'student_id', 'student__name', 'student__email', 'student__gpa', 'pk', 'course_id', 'course__title',
+        'course__credits', 'grade', 'term', 'archived'
+    ]
+    open_terms = filter_enrollments(Enrollment.objects.all(), filters).order_by().annotate(
+        archived=Value(False, output_field=BooleanField())
+    )
+    archived = filter_enrollments(ArchivedEnrollment.objects.all(), filters).order_by().annotate(
+        archived=Value(True, output_field=BooleanField())
+    )
+
+    return open_terms.values_list(*fields).union(archived.values_list(*fields), all=True).order_by('student_id', 'term', 'pk')
+
+DATASETS = {
+    'students': (
+        _students,
+        ['id', 'name', 'email', 'enrollment_count', 'created_at', 'updated_at'],
+    ),
+    'courses': (
+        _courses,
+        ['id', 'title', 'credits', 'enrollment_count', 'created_at', 'updated_at'],
+    ),
+    'enrollments': (
+        _enrollments,
+        ['id', 'student_id', 'student_name', 'student_email', 'course_id', 'course_title',
+         'credits', 'grade', 'term', 'enrollment_date', 'updated_at'],
+    ),
+    'transcripts': (
+        _transcripts,
+        ['student_id', 'student_name', 'student_email', 'gpa', 'enrollment_id', 'course_id', 'course_title',
+         'credits', 'grade', 'term', 'archived'],
+    ),
+}
+
+
+def _csv_value(value):
+
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+
+    return value
+
+class Echo:
+    """File-like object whose write() hands the encoded line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+def export_rows(dataset, filters=None, chunk_size=CHUNK_SIZE):
+    """Header and row tuples of ``dataset``, read ``chunk_size`` rows at a time in the dataset's order."""
+
+    build, header = DATASETS[dataset]
+    rows = build(filters or {}).iterator(chunk_size=chunk_size)
+
+    return header, rows
+
+def stream_export(dataset, export_format='csv', filters=None, chunk_size=CHUNK_SIZE):
+    """Yield ``dataset`` as CSV or JSON Lines text, one line at a time."""
+
+    header, rows = export_rows(dataset, filters, chunk_size)
+
+    if export_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+        return
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
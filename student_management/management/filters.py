@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from .models import Enrollment
+from .terms import is_term
+
+ENROLLMENT_FILTERS = ('student', 'course', 'grade', 'term')
+
+
+def enrollment_filters(params):
+    """The enrollment_list filter values (student, course, grade, term) present in ``params``."""
+
+    return {name: params.get(name) for name in ENROLLMENT_FILTERS if params.get(name)}
+
+def validate_enrollment_filters(filters):
+    """Raise ValidationError unless the student and course filters are ids and the grade is known."""
+
+    errors = [
+        f'Invalid {name} id "{filters[name]}".'
+        for name in ('student', 'course') if filters.get(name) and not str(filters[name]).isdigit()
+    ]
+    if filters.get('grade') and filters['grade'] not in dict(Enrollment.GRADE_CHOICES):
+        errors.append(f'Invalid grade "{filters["grade"]}".')
+
+    if errors:
+        raise ValidationError(errors)
+
+def filter_enrollments(enrollments, filters):
+    """
+    Apply enrollment_filters() to ``enrollments`` (Enrollment or
+    ArchivedEnrollment rows). Run validate_enrollment_filters() first.
+    """
+
+    if filters.get('student'):
+        enrollments = enrollments.filter(student__id=filters['student'])
+    if filters.get('course'):
+        enrollments = enrollments.filter(course__id=filters['course'])
+    if filters.get('grade'):
+        enrollments = enrollments.filter(grade=filters['grade'])
+    # Any other term value (such as "all") leaves every open term in.
+    if is_term(filters.get('term')):
+        enrollments = enrollments.filter(term=filters['term'])
+
+    return enrollments
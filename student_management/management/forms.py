@@ -1,5 +1,51 @@
 from django import forms
+from django.urls import reverse_lazy
 from .models import Student, Course, Enrollment
+from .registration import check_not_taken
+
+def normalize_student_name(name):
+    
+    name = name.strip().title()
+    if len(name.split()) < 2:
+        raise forms.ValidationError("Please enter both first and last name.")
+    
+    if not all(part.isalpha() for part in name.split()):
+        raise forms.ValidationError('Name can only contain letters and spaces.')
+    
+    return name
+
+def normalize_course_title(title):
+    
+    return title.strip().title()
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select for a ModelChoiceField that renders only the empty and selected
+    options; the rest are fetched from ``url`` by static/js/autocomplete.js.
+    """
+    
+    def __init__(self, url, attrs=None):
+        
+        super().__init__(attrs)
+        self.url = url
+        
+    def get_context(self, name, value, attrs):
+        
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete'] = str(self.url)
+        
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        
+        field = self.choices.field
+        selected = [pk for pk in value if str(pk).isdigit()]
+        options = [self.create_option(name, '', field.empty_label or '', not selected, 0)]
+        
+        for index, obj in enumerate(self.choices.queryset.filter(pk__in=selected), start=1):
+            options.append(self.create_option(name, obj.pk, field.label_from_instance(obj), True, index))
+            
+        return [(None, options, 0)]
 
 class StudentForm(forms.ModelForm):
     
@@ -23,12 +69,7 @@ class StudentForm(forms.ModelForm):
         
         if name:
             
-            name = name.strip().title()
-            if len(name.split()) < 2:
-                raise forms.ValidationError("Please enter both first and last name.")
-            
-            if not all(part.isalpha() for part in name.split()):
-                raise forms.ValidationError('Name can only contain letters and spaces.')
+            name = normalize_student_name(name)
             
         return name
     
@@ -37,7 +78,7 @@ class CourseForm(forms.ModelForm):
     class Meta:
         
         model = Course
-        fields = ['title', 'credits']
+        fields = ['title', 'credits', 'capacity']
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -49,6 +90,11 @@ class CourseForm(forms.ModelForm):
                 'min': 1,
                 'max': 6
             }),
+            'capacity': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'No limit',
+                'min': 0
+            }),
         }
     
     def clean_title(self):
@@ -57,7 +103,7 @@ class CourseForm(forms.ModelForm):
         
         if title:
             
-            title = title.strip().title()
+            title = normalize_course_title(title)
             
         return title
     
@@ -68,19 +114,32 @@ class EnrollmentForm(forms.ModelForm):
         model = Enrollment
         fields = ['student', 'course', 'grade']
         widgets = {
-            'student': forms.Select(attrs={'class': 'form-select'}),
-            'course': forms.Select(attrs={'class': 'form-select'}),
+            'student': AutocompleteSelect(reverse_lazy('autocomplete', args=['students']), attrs={'class': 'form-select'}),
+            'course': AutocompleteSelect(reverse_lazy('autocomplete', args=['courses']), attrs={'class': 'form-select'}),
             'grade': forms.Select(attrs={'class': 'form-select'}),
         }
     
+    join_waitlist = forms.BooleanField(
+        required=False,
+        label='Join the waitlist if the course is full',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    
     def __init__(self, *args, **kwargs):
         
         super().__init__(*args, **kwargs)
         
-        self.fields['student'].quaryset = Student.objects.all().order_by('name')
-        self.fields['course'].quaryset = Course.objects.all().order_by('title')
-        self.fields['grade'].quaryset = Enrollment.GRADE_CHOICES
         self.fields['grade'].required = False
+    
+    def clean(self):
+        
+        cleaned_data = super().clean()
+        student, course = cleaned_data.get('student'), cleaned_data.get('course')
+        
+        if student and course:
+            check_not_taken(student.pk, course.pk)
+        
+        return cleaned_data
         
 class GradeUpdateForm(forms.ModelForm):
     
@@ -93,4 +152,28 @@ class GradeUpdateForm(forms.ModelForm):
         }
     
     
-    
\ No newline at end of file
+class GradeEntryForm(forms.Form):
+    
+    enrollment = forms.IntegerField(widget=forms.HiddenInput)
+    grade = forms.ChoiceField(
+        choices=[('', '---------')] + Enrollment.GRADE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+
+# A plain formset keyed by enrollment id: a model formset would re-fetch
+# every row to validate its hidden id, one query per student.
+GradeSheetFormSet = forms.formset_factory(GradeEntryForm, extra=0)
+
+class ImportForm(forms.Form):
+    
+    KIND_CHOICES = [
+        ('students', 'Students (name, email)'),
+        ('courses', 'Courses (title, credits)'),
+        ('enrollments', 'Enrollments (student_email, course_title, grade)'),
+    ]
+    
+    kind = forms.ChoiceField(choices=KIND_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'}))
+    update = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+    background = forms.BooleanField(required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
@@ -0,0 +1,87 @@
+import json
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from .analytics import invalidate_cohort_report
+from .models import Enrollment
+from .standing import recompute_standing
+from .stats import invalidate_dashboard_stats
+
+# Course-level grade entry. A whole grade sheet is applied with one
+# bulk_update inside a single transaction, only rows whose grade actually
+# changed are written, and the derived data the per-row signals would
+# maintain (stored standing, dashboard stats) is refreshed once per batch.
+
+VALID_GRADES = {grade for grade, _ in Enrollment.GRADE_CHOICES}
+
+
+def clean_grades(grades):
+    """
+    Validate a ``{enrollment id: grade}`` mapping as sent by the JSON
+    endpoint. Ids may be strings; grades must be grade codes, and empty
+    strings or null become None.
+    """
+
+    if not isinstance(grades, dict):
+        raise ValidationError('"grades" must be an object of enrollment id to grade.')
+
+    cleaned = {}
+    errors = []
+
+    for key, grade in grades.items():
+        try:
+            pk = int(key)
+        except (TypeError, ValueError):
+            errors.append(f'Invalid enrollment id "{key}".')
+            continue
+
+        if grade is None or grade == '':
+            cleaned[pk] = None
+        elif isinstance(grade, str) and grade in VALID_GRADES:
+            cleaned[pk] = grade
+        else:
+            # Not only unknown codes: lists and objects are not even hashable.
+            errors.append(f'Invalid grade {json.dumps(grade)} for enrollment {pk}.')
+
+    if errors:
+        raise ValidationError(errors)
+
+    return cleaned
+
+def apply_grades(course, grades):
+    """
+    Set the grades of ``course``'s enrollments from a ``{enrollment id:
+    grade}`` mapping and return the enrollments that changed.
+    """
+
+    with transaction.atomic():
+        enrollments = list(
+            Enrollment.objects
+            .select_for_update()
+            .filter(course=course, pk__in=grades)
+            .only('pk', 'student_id', 'grade')
+        )
+
+        unknown = set(grades) - {enrollment.pk for enrollment in enrollments}
+        if unknown:
+            raise ValidationError(
+                f'Enrollment(s) {", ".join(str(pk) for pk in sorted(unknown))} not found in "{course.title}".'
+            )
+
+        now = timezone.now()
+        changed = []
+        for enrollment in enrollments:
+            if enrollment.grade != grades[enrollment.pk]:
+                enrollment.grade = grades[enrollment.pk]
+                enrollment.updated_at = now
+                changed.append(enrollment)
+
+        if changed:
+            Enrollment.objects.bulk_update(changed, ['grade', 'updated_at'])
+            recompute_standing({enrollment.student_id for enrollment in changed})
+
+    if changed:
+        invalidate_dashboard_stats()
+        invalidate_cohort_report()
+
+    return changed
@@ -0,0 +1,295 @@
+import csv
+import time
+from functools import partial
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from .analytics import invalidate_cohort_report
+from .counters import rebuild_enrollment_counts
+from .forms import normalize_course_title, normalize_student_name
+from .models import Student, Course, Enrollment, ArchivedEnrollment
+from .search import rebuild_search_index, uses_trigram_search
+from .standing import course_student_ids, recompute_standing
+from .stats import invalidate_dashboard_stats
+
+# Streaming CSV import. Rows are read and validated in batches with the
+# same normalization as the forms and model clean() methods, students and
+# courses are resolved through in-memory email/title maps, and each batch
+# is written with bulk_create/bulk_update inside one transaction. Invalid
+# rows are reported with their line number and skipped; the rest of the
+# batch is still written. New enrollments take seats like registrations
+# do: rows beyond a course's capacity are reported as errors (waitlists are
+# left alone), as are courses the student took in an archived term.
+#
+# result.written counts the rows inserted, plus the rows overwritten with
+# ``update``; rows skipped as already present are not counted.
+#
+# bulk writes bypass model signals, so every batch also refreshes the
+# derived data the signals would have maintained (enrollment counters,
+# standing, search tokens and the dashboard stats cache).
+
+BATCH_SIZE = 1000
+
+COLUMNS = {
+    'students': ['name', 'email'],
+    'courses': ['title', 'credits'],
+    'enrollments': ['student_email', 'course_title', 'grade'],
+}
+
+
+class ImportResult:
+
+    def __init__(self, kind):
+
+        self.kind = kind
+        self.rows = 0
+        self.written = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def __str__(self):
+        return (
+            f'{self.kind}: {self.rows} rows, {self.written} written, {len(self.errors)} errors '
+            f'in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)'
+        )
+
+def _messages(error):
+
+    if hasattr(error, 'message_dict'):
+        return '; '.join(
+            f'{field}: {message}' if field != '__all__' else message
+            for field, messages in error.message_dict.items()
+            for message in messages
+        )
+
+    return '; '.join(error.messages)
+
+def _value(row, column):
+
+    return (row.get(column) or '').strip()
+
+# Students
+
+def _student_from_row(row):
+
+    name = _value(row, 'name')
+    student = Student(name=normalize_student_name(name) if name else name, email=_value(row, 'email'))
+    student.clean_fields()
+    student.clean()
+
+    return student
+
+def _write_students(batch, update, result):
+
+    students = {student.email: student for student in batch}
+
+    if update:
+        Student.objects.bulk_create(
+            students.values(), update_conflicts=True, unique_fields=['email'], update_fields=['name', 'updated_at']
+        )
+        written = students
+    else:
+        existing = set(Student.objects.filter(email__in=students).values_list('email', flat=True))
+        written = {email: student for email, student in students.items() if email not in existing}
+        # ignore_conflicts still covers rows inserted concurrently since the lookup above.
+        Student.objects.bulk_create(written.values(), ignore_conflicts=True)
+
+    if not uses_trigram_search():
+        rebuild_search_index(Student, list(Student.objects.filter(email__in=written).values_list('pk', flat=True)))
+
+    result.written += len(written)
+
+# Courses
+
+def _course_from_row(row):
+
+    title = _value(row, 'title')
+    course = Course(title=normalize_course_title(title), credits=_value(row, 'credits') or None)
+    course.clean_fields()
+    course.clean()
+
+    return course
+
+def _write_courses(batch, update, result, course_ids):
+
+    new_courses = {}
+    changed = {}
+    now = timezone.now()
+
+    for course in batch:
+        if course.title not in course_ids:
+            new_courses[course.title] = course
+        elif update:
+            changed[course.title] = Course(pk=course_ids[course.title], credits=course.credits, updated_at=now)
+
+    Course.objects.bulk_create(new_courses.values())
+    course_ids.update({course.title: course.pk for course in new_courses.values()})
+
+    if changed:
+        Course.objects.bulk_update(changed.values(), ['credits', 'updated_at'])
+        recompute_standing(course_student_ids([course.pk for course in changed.values()]))
+
+    if not uses_trigram_search():
+        rebuild_search_index(Course, [course.pk for course in new_courses.values()])
+
+    result.written += len(new_courses) + len(changed)
+
+# Enrollments
+
+def _enrollment_from_row(row, student_ids, course_ids):
+
+    email = _value(row, 'student_email').lower()
+    title = normalize_course_title(_value(row, 'course_title'))
+
+    if email not in student_ids:
+        raise ValidationError(f'Unknown student email "{email}".')
+    if title not in course_ids:
+        raise ValidationError(f'Unknown course title "{title}".')
+
+    enrollment = Enrollment(student_id=student_ids[email], course_id=course_ids[title], grade=_value(row, 'grade') or None)
+    enrollment.clean_fields(exclude=['student', 'course'])
+
+    return enrollment
+
+def _take_seats(enrollments, result):
+
+    # The course rows stay locked until the batch commits, as in register().
+    seats = {
+        pk: None if capacity is None else capacity - count
+        for pk, capacity, count in Course.objects.select_for_update()
+        .filter(pk__in={enrollment.course_id for enrollment in enrollments})
+        .values_list('pk', 'capacity', 'enrollment_count')
+    }
+    seated = []
+
+    for enrollment in enrollments:
+        free = seats[enrollment.course_id]
+        if free is not None and free <= 0:
+            result.error(enrollment._import_line, 'The course is full.')
+            continue
+        if free is not None:
+            seats[enrollment.course_id] = free - 1
+        seated.append(enrollment)
+
+    return seated
+
+def _write_enrollments(batch, update, result):
+
+    enrollments = {(enrollment.student_id, enrollment.course_id): enrollment for enrollment in batch}
+    student_pks = {student_id for student_id, _ in enrollments}
+    course_pks = {course_id for _, course_id in enrollments}
+
+    existing = {
+        pair for pair in Enrollment.objects.filter(student__in=student_pks, course__in=course_pks)
+        .values_list('student_id', 'course_id') if pair in enrollments
+    }
+    taken = {
+        pair for pair in ArchivedEnrollment.objects.filter(student__in=student_pks, course__in=course_pks)
+        .values_list('student_id', 'course_id') if pair in enrollments
+    }
+    for pair in taken - existing:
+        result.error(enrollments[pair]._import_line, 'The student already took this course in an archived term.')
+
+    skipped = existing | taken
+    new_enrollments = _take_seats(
+        [enrollment for pair, enrollment in enrollments.items() if pair not in skipped], result
+    )
+
+    if update:
+        written = [*new_enrollments, *(enrollments[pair] for pair in existing)]
+        Enrollment.objects.bulk_create(
+            written,
+            update_conflicts=True,
+            unique_fields=['student', 'course'],
+            update_fields=['grade', 'updated_at']
+        )
+    else:
+        written = new_enrollments
+        Enrollment.objects.bulk_create(written, ignore_conflicts=True)
+
+    rebuild_enrollment_counts(Student, student_pks)
+    rebuild_enrollment_counts(Course, course_pks)
+    recompute_standing(student_pks)
+
+    result.written += len(written)
+
+def import_rows(kind, rows, update=False, batch_size=BATCH_SIZE):
+    """
+    Import ``rows`` (dicts keyed by the COLUMNS of ``kind``) and return an
+    ImportResult. With ``update`` existing students, courses and
+    enrollments are overwritten; otherwise they are left untouched.
+    """
+
+    result = ImportResult(kind)
+    started = time.perf_counter()
+
+    if kind == 'enrollments':
+        student_ids = dict(Student.objects.values_list('email', 'pk'))
+        course_ids = dict(Course.objects.values_list('title', 'pk'))
+        parse = partial(_enrollment_from_row, student_ids=student_ids, course_ids=course_ids)
+        write = _write_enrollments
+    elif kind == 'courses':
+        course_ids = dict(Course.objects.values_list('title', 'pk'))
+        parse = _course_from_row
+        write = partial(_write_courses, course_ids=course_ids)
+    elif kind == 'students':
+        parse = _student_from_row
+        write = _write_students
+    else:
+        raise ValueError(f'Unknown import kind "{kind}".')
+
+    # Line 1 of a CSV file is its header.
+    numbered = enumerate(rows, start=2)
+
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+
+        batch = []
+        for line, row in chunk:
+            result.rows += 1
+            try:
+                instance = parse(row)
+            except ValidationError as e:
+                result.error(line, _messages(e))
+            else:
+                # For errors found while writing the batch.
+                instance._import_line = line
+                batch.append(instance)
+
+        if batch:
+            with transaction.atomic():
+                write(batch, update, result)
+
+    if result.written:
+        invalidate_dashboard_stats()
+        invalidate_cohort_report()
+
+    result.elapsed = time.perf_counter() - started
+
+    return result
+
+def import_csv(kind, handle, update=False, batch_size=BATCH_SIZE):
+    """Import an open text file of CSV rows with a header line."""
+
+    if kind not in COLUMNS:
+        raise ValueError(f'Unknown import kind "{kind}".')
+
+    reader = csv.DictReader(handle)
+    missing = set(COLUMNS[kind]) - set(reader.fieldnames or [])
+
+    if kind == 'enrollments':
+        missing.discard('grade')
+    if missing:
+        raise ValidationError(f'Missing column(s): {", ".join(sorted(missing))}.')
+
+    return import_rows(kind, reader, update=update, batch_size=batch_size)
@@ -0,0 +1,325 @@
+import io
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .archive import archive_closed_terms
+from .counters import rebuild_enrollment_counts
+from .deletion import delete_with_enrollments
+from .grading import apply_grades, clean_grades
+from .importers import import_csv
+from .models import Student, Course, Job
+from .search import rebuild_search_index
+from .standing import recompute_all_standing
+from .transcript_files import generate_transcripts
+
+# Database-backed background jobs. Views queue a Job row instead of doing
+# expensive work inside the request; "manage.py runworker" claims queued
+# jobs and runs them in a thread or process pool. No broker is involved,
+# only the configured database:
+#
+#   - claiming reads the next queued rows with SELECT ... FOR UPDATE SKIP
+#     LOCKED, so concurrent workers never wait for or take each other's
+#     jobs, and flips each one to "running" with a conditional UPDATE
+#     (status = 'queued'), which also keeps databases without SKIP LOCKED
+#     (SQLite) from running a job twice;
+#   - a failed attempt is retried after RETRY_DELAY, doubling each time,
+#     until max_attempts; validation errors and missing objects fail at once;
+#   - an attempt running past its job's timeout is failed by any worker,
+#     which also recovers jobs of workers that died. Process workers are
+#     interrupted at the deadline, so their attempt is retried; a thread
+#     cannot be, so its attempt is abandoned and its late result ignored,
+#     but the job is failed rather than retried while the thread may still
+#     be running it. Run tasks that may time out with --processes.
+#
+# Every state change after claiming is conditional on the attempt number,
+# so an abandoned attempt can never overwrite a newer one.
+
+POLL_INTERVAL = 1.0
+RETRY_DELAY = timedelta(seconds=30)
+
+# Task failures that another attempt would not fix.
+PERMANENT_ERRORS = (ValidationError, ObjectDoesNotExist)
+
+
+class JobTimeout(Exception):
+    pass
+
+# Tasks. Arguments and results are stored as JSON.
+
+def _import_csv(kind, content, update=False):
+
+    result = import_csv(kind, io.StringIO(content, newline=''), update)
+
+    return {
+        'kind': result.kind,
+        'rows': result.rows,
+        'written': result.written,
+        'errors': result.errors[:100],
+        'error_count': len(result.errors),
+        'elapsed': round(result.elapsed, 3),
+    }
+
+def _delete_records(kind, pk):
+
+    instance = {'student': Student, 'course': Course}[kind].objects.get(pk=pk)
+
+    return {'deleted': str(instance), 'enrollments': delete_with_enrollments(instance)}
+
+def _apply_grades(course_id, grades):
+
+    changed = apply_grades(Course.objects.get(pk=course_id), clean_grades(grades))
+
+    return {'updated': [enrollment.pk for enrollment in changed]}
+
+def _rebuild_enrollment_counts():
+
+    return {'students': rebuild_enrollment_counts(Student), 'courses': rebuild_enrollment_counts(Course)}
+
+def _recompute_standing():
+
+    return {'students': recompute_all_standing()}
+
+def _rebuild_search_index():
+
+    return {'tokens': rebuild_search_index(Student) + rebuild_search_index(Course)}
+
+def _generate_transcripts(output_dir, with_json=False):
+
+    # Rendered in the job's own worker; the runworker pool is the parallelism.
+    return {'written': generate_transcripts(output_dir, workers=1, with_json=with_json)}
+
+def _archive_terms(before=None):
+
+    return {'archived': archive_closed_terms(before)}
+
+TASKS = {
+    'import_csv': _import_csv,
+    'delete_records': _delete_records,
+    'apply_grades': _apply_grades,
+    'rebuild_enrollment_counts': _rebuild_enrollment_counts,
+    'recompute_standing': _recompute_standing,
+    'rebuild_search_index': _rebuild_search_index,
+    'generate_transcripts': _generate_transcripts,
+    'archive_terms': _archive_terms,
+}
+
+
+def enqueue(task, arguments=None, **options):
+    """
+    Queue ``task`` with the keyword ``arguments`` and return the Job.
+    ``options`` set other Job fields (max_attempts, timeout, run_after).
+    """
+
+    if task not in TASKS:
+        raise ValueError(f'Unknown task "{task}".')
+
+    return Job.objects.create(task=task, arguments=arguments or {}, **options)
+
+def worker_name():
+
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def claim(worker, limit=1, interruptible=False):
+    """
+    Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+    ``interruptible`` records that the worker stops attempts at their timeout.
+    """
+
+    now = timezone.now()
+    claimed = []
+
+    with transaction.atomic():
+        candidates = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'pk')
+            .only('pk', 'attempts', 'timeout')[:limit]
+        )
+        for job in candidates:
+            taken = Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(
+                status=Job.RUNNING,
+                attempts=F('attempts') + 1,
+                worker=worker,
+                interruptible=interruptible,
+                started_at=now,
+                expires_at=now + timedelta(seconds=job.timeout),
+                finished_at=None,
+                updated_at=now,
+            )
+            if taken:
+                claimed.append(job.pk)
+
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_after', 'pk'))
+
+def _attempt(job_id, attempt):
+
+    return Job.objects.filter(pk=job_id, status=Job.RUNNING, attempts=attempt)
+
+def _finish(job_id, attempt, result):
+
+    now = timezone.now()
+
+    return _attempt(job_id, attempt).update(
+        status=Job.SUCCEEDED, result=result, error='', finished_at=now, expires_at=None, updated_at=now
+    ) == 1
+
+def _fail(job_id, attempt, max_attempts, error, retry=True):
+
+    now = timezone.now()
+
+    if retry and attempt < max_attempts:
+        changes = {'status': Job.QUEUED, 'run_after': now + RETRY_DELAY * 2 ** (attempt - 1)}
+    else:
+        changes = {'status': Job.FAILED, 'finished_at': now}
+
+    return _attempt(job_id, attempt).update(error=error, expires_at=None, updated_at=now, **changes) == 1
+
+def expire_jobs():
+    """
+    Fail running attempts that are past their deadline, requeueing those of
+    interruptible (process) workers. Returns how many.
+    """
+
+    expired = Job.objects.filter(status=Job.RUNNING, expires_at__lt=timezone.now())
+    count = 0
+
+    for job in expired.only('pk', 'attempts', 'max_attempts', 'timeout', 'worker', 'interruptible'):
+        error = f'Timed out after {job.timeout}s on {job.worker}.'
+        if not job.interruptible:
+            # A thread cannot be stopped: a retry could run alongside it.
+            error += ' The attempt may still be running, so it is not retried.'
+        count += _fail(job.pk, job.attempts, job.max_attempts, error, retry=job.interruptible)
+
+    return count
+
+def _timed_out(signum, frame):
+
+    raise JobTimeout('Timed out.')
+
+def _close_old_connections():
+
+    # Not when called inside a transaction (e.g. from a test), which closing would break.
+    if not connections['default'].in_atomic_block:
+        close_old_connections()
+
+def run_job(job_id, attempt, interrupt=False):
+    """
+    Run one claimed attempt of a job and record its outcome. With
+    ``interrupt`` (process workers) the task is stopped at the job's timeout.
+    Returns the job's status afterwards.
+    """
+
+    _close_old_connections()
+    try:
+        job = Job.objects.filter(pk=job_id).first()
+        if job is None:
+            return None
+        task = TASKS.get(job.task)
+
+        try:
+            if task is None:
+                raise ValidationError(f'Unknown task "{job.task}".')
+            if interrupt:
+                signal.signal(signal.SIGALRM, _timed_out)
+                signal.alarm(job.timeout)
+            try:
+                result = task(**job.arguments)
+            finally:
+                if interrupt:
+                    signal.alarm(0)
+        except Exception as e:
+            error = traceback.format_exc()
+            if isinstance(e, JobTimeout):
+                error = f'Timed out after {job.timeout}s on {job.worker}.\n{error}'
+            _fail(job.pk, attempt, job.max_attempts, error, retry=not isinstance(e, PERMANENT_ERRORS))
+        else:
+            _finish(job.pk, attempt, result)
+
+        return Job.objects.filter(pk=job_id).values_list('status', flat=True).first()
+    finally:
+        _close_old_connections()
+
+def _init_worker():
+
+    # Needed under the "spawn" start method; a no-op once apps are loaded.
+    import django
+    django.setup()
+    # Ctrl-C stops the parent, which lets running jobs finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _pool(concurrency, processes):
+
+    if not processes:
+        return ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job')
+
+    # Forked workers must not share the parent's open connections.
+    connections.close_all()
+
+    return ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker)
+
+def work(concurrency=1, processes=False, poll_interval=POLL_INTERVAL, burst=False, stop=None, report=None):
+    """
+    Claim and run up to ``concurrency`` jobs at a time in threads (or
+    ``processes``) until ``stop`` (a threading.Event) is set, or with
+    ``burst`` until no job is due. ``report`` is called with (job, status)
+    after each attempt. Returns the number of attempts run.
+    """
+
+    name = worker_name()
+    report = report or (lambda job, status: None)
+    pool = _pool(concurrency, processes)
+    running = {}
+    broken = False
+    ran = 0
+
+    try:
+        while not (stop and stop.is_set()):
+            expire_jobs()
+
+            for future in [future for future in running if future.done()]:
+                job = running.pop(future)
+                try:
+                    status = future.result()
+                except BrokenProcessPool:
+                    # A worker process died (e.g. killed by the OOM killer).
+                    broken = True
+                    _fail(job.pk, job.attempts, job.max_attempts, f'Worker process of {name} died.')
+                    status = Job.objects.filter(pk=job.pk).values_list('status', flat=True).first()
+                ran += 1
+                report(job, status)
+
+            if broken and not running:
+                pool.shutdown(wait=False)
+                pool = _pool(concurrency, processes)
+                broken = False
+
+            jobs = []
+            if not broken and len(running) < concurrency:
+                jobs = claim(name, concurrency - len(running), interruptible=processes)
+            for job in jobs:
+                running[pool.submit(run_job, job.pk, job.attempts, processes)] = job
+
+            if burst and not running:
+                break
+            if jobs:
+                continue
+            if running:
+                wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            elif stop:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    finally:
+        pool.shutdown(wait=True)
+
+    return ran
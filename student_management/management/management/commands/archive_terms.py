@@ -0,0 +1,59 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from management.archive import BATCH_SIZE, archive_term, closed_terms
+from management.models import Enrollment
+from management.terms import current_term, is_term, term_label
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the enrollments of closed terms (every term before the current one, or before --before) '
+        'from Enrollment to the archive table, in short batches. Counters and seat counts then cover '
+        'open terms only; standing and transcripts still include archived terms. An interrupted run '
+        'can be repeated.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--before', help='Archive terms before this term code (default: the current term).')
+        parser.add_argument('--term', action='append', default=[], help='Archive only this term (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many enrollments would move.')
+
+    def handle(self, *args, **options):
+
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        current = current_term()
+        before = options['before'] or current
+        for term in [before, *options['term']]:
+            if not is_term(term):
+                raise CommandError(f'"{term}" is not a term code such as 2026-3.')
+        if before > current:
+            raise CommandError(f'Only terms before the current term ({current}) can be archived.')
+
+        terms = closed_terms(before)
+        if options['term']:
+            outside = [term for term in options['term'] if term >= before]
+            if outside:
+                raise CommandError(f'{", ".join(outside)} is not before {before}.')
+            terms = [term for term in terms if term in options['term']]
+
+        if not terms:
+            self.stdout.write('No closed terms to archive.')
+            return
+
+        for term in terms:
+            if options['dry_run']:
+                count = Enrollment.objects.filter(term=term).count()
+                self.stdout.write(f'{term_label(term)}: {count} enrollments would be archived.')
+                continue
+
+            started = time.perf_counter()
+
+            def progress(term, moved):
+                self.stderr.write(f'  {term_label(term)}: {moved} enrollments archived')
+
+            moved = archive_term(term, options['batch_size'], progress)
+            self.stdout.write(f'Archived {moved} enrollments of {term_label(term)} in {time.perf_counter() - started:.2f}s.')
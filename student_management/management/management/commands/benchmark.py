@@ -0,0 +1,110 @@
+import json
+import logging
+import platform
+import time
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from management.benchmark import compare, run_benchmark
+from management.synthetic import generate_dataset
+
+DEFAULT_SIZES = ['200:20:1000', '2000:50:10000']
+
+
+def parse_size(value):
+
+    try:
+        students, courses, enrollments = (int(part) for part in value.split(':'))
+    except ValueError:
+        raise CommandError(f'Invalid size "{value}"; expected students:courses:enrollments.')
+
+    return students, courses, enrollments
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark every URL at several synthetic dataset sizes in a throwaway test database, '
+        'optionally failing on regressions against a saved baseline.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--size', action='append', dest='sizes', help=(
+            'students:courses:enrollments (repeatable; default: %s).' % ' '.join(DEFAULT_SIZES)
+        ))
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--url', action='append', dest='urls', help='Only this URL name (repeatable).')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare against a JSON file written by --output.')
+        parser.add_argument('--threshold', type=float, default=1.5, help='Allowed p50 slowdown factor.')
+
+    def handle(self, *args, **options):
+
+        sizes = [parse_size(size) for size in options['sizes'] or DEFAULT_SIZES]
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)['results']
+
+        # Per-request metric lines would drown the report; budget warnings still show.
+        logging.getLogger('management.metrics').setLevel(logging.WARNING)
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                results = self.run_sizes(sizes, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run_sizes(self, sizes, options):
+
+        results = {}
+
+        for students, courses, enrollments in sizes:
+            label = f'{students}:{courses}:{enrollments}'
+            call_command('flush', interactive=False, verbosity=0)
+
+            started = time.perf_counter()
+            written = generate_dataset(students, courses, enrollments, seed=options['seed'])
+            generate_seconds = time.perf_counter() - started
+
+            urls = run_benchmark(options['repeat'], options['urls'])
+            results[label] = {'rows': written, 'generate_seconds': round(generate_seconds, 3), 'urls': urls}
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{label} ({sum(written.values())} rows generated in {generate_seconds:.1f}s)'
+            ))
+            self.stdout.write(f'  {"url":<26} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8} {"peak KB":>9}')
+            for name, row in urls.items():
+                self.stdout.write(
+                    f'  {name:<26} {row["status"]:>6} {row["p50_ms"]:>9.2f} {row["p95_ms"]:>9.2f} '
+                    f'{row["p99_ms"]:>9.2f} {row["queries"]:>8} {row["peak_kb"]:>9.1f}'
+                )
+
+        return results
@@ -0,0 +1,118 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+from management.benchmark import percentile
+from management.models import Student, Enrollment
+
+# Connection lifetimes to compare: (label, settings, pool options).
+PROFILES = [
+    ('new connection per request', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}, None),
+    ('persistent + health checks', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}, None),
+    ('psycopg pool', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}, {'min_size': 1, 'max_size': 4}),
+]
+
+
+def pool_available():
+
+    if connection.vendor != 'postgresql':
+        return False
+
+    try:
+        import psycopg_pool  # noqa: F401
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    except ImportError:
+        return False
+
+    return is_psycopg3
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-request cost of opening database connections: the student_detail queries '
+        'run inside simulated requests with a new connection per request, persistent connections '
+        'and (on PostgreSQL with psycopg 3) the connection pool.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--requests', type=int, default=500)
+
+    def close(self):
+
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+    def use_profile(self, settings, pool):
+
+        self.close()
+        connection.settings_dict.update(settings)
+        options = {key: value for key, value in connection.settings_dict['OPTIONS'].items() if key != 'pool'}
+        if pool:
+            options['pool'] = pool
+        connection.settings_dict['OPTIONS'] = options
+
+    def request(self, pk):
+
+        # What the handler does around a view: request_finished closes (or
+        # returns to the pool) connections that are not to be kept.
+        request_started.send(sender=self.__class__)
+        try:
+            Student.objects.filter(pk=pk).first()
+            list(Enrollment.objects.filter(student_id=pk).select_related('course'))
+        finally:
+            request_finished.send(sender=self.__class__)
+
+    def run_profile(self, pk, requests):
+
+        opened = 0
+
+        def count(sender, **kwargs):
+
+            nonlocal opened
+            opened += 1
+
+        connection_created.connect(count)
+        try:
+            self.request(pk)
+            opened = 0
+            latencies = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                self.request(pk)
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(count)
+
+        latencies.sort()
+
+        return latencies, opened
+
+    def handle(self, *args, **options):
+
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+
+        pk = Student.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+        original = {key: connection.settings_dict[key] for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+
+        self.stdout.write(f'{connection.vendor}, {options["requests"]} requests per profile')
+        self.stdout.write(f'{"profile":<28} {"opened":>7} {"mean ms":>9} {"p50 ms":>9} {"p99 ms":>9}')
+
+        try:
+            for label, settings, pool in PROFILES:
+                if pool and not pool_available():
+                    self.stdout.write(f'{label:<28} skipped (needs PostgreSQL, psycopg 3 and psycopg_pool)')
+                    continue
+
+                self.use_profile(settings, pool)
+                latencies, opened = self.run_profile(pk, options['requests'])
+                self.stdout.write(
+                    f'{label:<28} {opened:>7} {statistics.fmean(latencies):>9.3f} '
+                    f'{percentile(latencies, 50):>9.3f} {percentile(latencies, 99):>9.3f}'
+                )
+        finally:
+            self.close()
+            connection.settings_dict.update(original)
@@ -0,0 +1,42 @@
+import csv
+import time
+from django.core.management.base import BaseCommand
+from management.analytics import CHUNK_SIZE, compute_cohort_analytics, top_students
+
+
+class Command(BaseCommand):
+    help = 'Compute GPA, class rank, GPA percentiles and per-course grade curves for every student.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--top', type=int, default=10, help='Number of top-ranked students to print.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--output', help='Write every student\'s rank to this CSV file.')
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+        analytics = compute_cohort_analytics(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+
+        students = analytics['students']
+        self.stdout.write(f'Ranked {len(students["ids"])} students across {len(analytics["courses"]["ids"])} courses in {elapsed:.2f}s.')
+
+        for percentile, gpa in analytics['gpa_percentiles'].items():
+            self.stdout.write(f'  p{percentile} GPA: {gpa:.2f}')
+
+        for row in top_students(analytics, options['top']):
+            self.stdout.write(f'  #{row["rank"]} {row["name"]} - GPA {row["gpa"]:.2f} ({row["credits"]} credits)')
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(['student_id', 'gpa', 'credits', 'rank', 'percentile'])
+                writer.writerows(zip(
+                    students['ids'].tolist(),
+                    students['gpa'].tolist(),
+                    students['credits'].tolist(),
+                    students['rank'].tolist(),
+                    students['percentile'].tolist()
+                ))
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
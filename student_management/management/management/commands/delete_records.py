@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from management.deletion import BATCH_SIZE, delete_with_enrollments
+from management.models import Student, Course
+
+MODELS = {'student': Student, 'course': Course}
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete students or courses together with their enrollments, in short batches that never hold '
+        'the enrollment table for long. An interrupted run can be repeated.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('kind', choices=sorted(MODELS))
+        parser.add_argument('ids', nargs='+', type=int)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        model = MODELS[options['kind']]
+        found = {obj.pk: obj for obj in model.objects.filter(pk__in=options['ids'])}
+        missing = [pk for pk in options['ids'] if pk not in found]
+        if missing:
+            raise CommandError(f'No {options["kind"]} with id {", ".join(map(str, missing))}.')
+
+        for pk in dict.fromkeys(options['ids']):
+            instance = found[pk]
+            started = time.perf_counter()
+
+            def progress(deleted, total):
+                self.stderr.write(f'  {instance}: {deleted}/{total} enrollments deleted')
+
+            deleted = delete_with_enrollments(instance, options['batch_size'], progress)
+            self.stdout.write(f'Deleted {instance} and {deleted} enrollments in {time.perf_counter() - started:.2f}s.')
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from management.synthetic import BATCH_SIZE, generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Load a deterministic synthetic dataset (for benchmarks) into an empty database.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=50)
+        parser.add_argument('--enrollments', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--terms', type=int, default=1, help='Spread enrollments over this many recent terms.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+
+        if min(options['students'], options['courses'], options['enrollments']) < 0:
+            raise CommandError('Sizes must not be negative.')
+        if options['terms'] < 1:
+            raise CommandError('--terms must be at least 1.')
+
+        started = time.perf_counter()
+        written = generate_dataset(
+            options['students'], options['courses'], options['enrollments'],
+            seed=options['seed'], batch_size=options['batch_size'], terms=options['terms'],
+            progress=lambda message: self.stderr.write(f'  {message}')
+        )
+        elapsed = time.perf_counter() - started
+        rows = sum(written.values())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {", ".join(f"{count} {name}" for name, count in written.items())} '
+            f'in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
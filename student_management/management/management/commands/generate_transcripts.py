@@ -0,0 +1,41 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from management.transcript_files import CHUNK_SIZE, MANIFEST, generate_transcripts
+
+
+class Command(BaseCommand):
+    help = (
+        'Render every student transcript to static HTML (and optionally JSON) in a process pool. '
+        'An interrupted run resumes where it stopped; --restart starts over.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('output_dir')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (1 renders in-process).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Students per worker task.')
+        parser.add_argument('--json', action='store_true', help='Also write compact JSON transcripts.')
+        parser.add_argument('--restart', action='store_true', help='Delete previous output instead of resuming.')
+
+    def progress(self, written, total, elapsed):
+
+        rate = written / elapsed if elapsed else 0
+        self.stderr.write(f'  {written}/{total} students ({rate:.0f}/s)')
+
+    def handle(self, *args, **options):
+
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1.')
+
+        written = generate_transcripts(
+            options['output_dir'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            with_json=options['json'],
+            restart=options['restart'],
+            progress=self.progress if options['verbosity'] > 0 else None,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {written} transcripts; {os.path.join(options["output_dir"], MANIFEST)} lists every student.'
+        ))
@@ -0,0 +1,31 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from management.importers import BATCH_SIZE, COLUMNS, import_csv
+
+
+class Command(BaseCommand):
+    help = 'Bulk import students, courses or enrollments from a CSV file.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('kind', choices=sorted(COLUMNS))
+        parser.add_argument('path', help='CSV file with a header row (students: name,email; '
+                                         'courses: title,credits; enrollments: student_email,course_title,grade).')
+        parser.add_argument('--update', action='store_true', help='Overwrite existing rows instead of skipping them.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, default=50, help='Number of row errors to print.')
+
+    def handle(self, *args, **options):
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+                result = import_csv(options['kind'], handle, options['update'], options['batch_size'])
+        except (OSError, ValidationError) as e:
+            raise CommandError(str(e))
+
+        for line, message in result.errors[:options['max_errors']]:
+            self.stderr.write(f'Line {line}: {message}')
+        if len(result.errors) > options['max_errors']:
+            self.stderr.write(f'... and {len(result.errors) - options["max_errors"]} more errors.')
+
+        self.stdout.write(self.style.SUCCESS(str(result)))
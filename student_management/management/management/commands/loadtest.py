@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+from django.core.management.base import BaseCommand, CommandError
+from management.benchmark import percentile
+from management.models import Student, Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure p50/p99 latency and requests/s of the read endpoints on a running server. '
+        'Run it against the WSGI (runserver/gunicorn) and ASGI (uvicorn) deployments to compare them.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('base_url', help='e.g. http://127.0.0.1:8000')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path.')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--path', action='append', dest='paths', help='Path to hit (repeatable).')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def default_paths(self):
+
+        student = Student.objects.order_by('pk').values_list('pk', flat=True).first()
+        course = Course.objects.order_by('pk').values_list('pk', flat=True).first()
+        if student is None or course is None:
+            raise CommandError('Needs at least one student and course; pass --path or load data first.')
+
+        return ['/', '/reports/', f'/students/{student}/', f'/courses/{course}/', f'/reports/student/{student}']
+
+    def fetch(self, url, timeout):
+
+        started = time.perf_counter()
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except (HTTPError, URLError, OSError):
+            ok = False
+
+        return time.perf_counter() - started, ok
+
+    def handle(self, *args, **options):
+
+        base_url = options['base_url'].rstrip('/')
+        paths = options['paths'] or self.default_paths()
+
+        self.stdout.write(f'{"path":<32} {"req":>6} {"err":>5} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9}')
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for path in paths:
+                url = base_url + path
+                started = time.perf_counter()
+                results = list(pool.map(lambda _: self.fetch(url, options['timeout']), range(options['requests'])))
+                elapsed = time.perf_counter() - started
+
+                latencies = sorted(latency for latency, ok in results if ok)
+                errors = len(results) - len(latencies)
+
+                self.stdout.write(
+                    f'{path:<32} {len(results):>6} {errors:>5} {len(results) / elapsed:>9.1f} '
+                    f'{percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f}'
+                )
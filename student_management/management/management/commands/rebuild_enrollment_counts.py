@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from management.counters import COUNTED_MODELS, enrollment_count_drift, rebuild_enrollment_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the stored Student/Course enrollment_count columns.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report rows whose counter has drifted; exit with an error if any have.'
+        )
+
+    def handle(self, *args, **options):
+
+        if options['verify']:
+            drifted = 0
+
+            for model in COUNTED_MODELS:
+                for obj in enrollment_count_drift(model).iterator():
+                    drifted += 1
+                    self.stdout.write(
+                        f'{model.__name__} {obj.pk}: stored {obj.enrollment_count}, actual {obj.actual_count}'
+                    )
+
+            if drifted:
+                raise CommandError(f'{drifted} enrollment counter(s) out of date.')
+
+            self.stdout.write(self.style.SUCCESS('All enrollment counters are exact.'))
+            return
+
+        with transaction.atomic():
+            for model in COUNTED_MODELS:
+                updated = rebuild_enrollment_counts(model)
+                self.stdout.write(f'Rebuilt enrollment_count for {updated} {model._meta.verbose_name_plural}.')
+
+        self.stdout.write(self.style.SUCCESS('Enrollment counters rebuilt.'))
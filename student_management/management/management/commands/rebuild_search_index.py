@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from management.search import SEARCH_FIELDS, rebuild_search_index, uses_trigram_search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SearchToken inverted index used for search on databases without trigram support.'
+
+    def handle(self, *args, **options):
+
+        if uses_trigram_search():
+            self.stdout.write('Search is served by trigram indexes on this database; nothing to rebuild.')
+            return
+
+        with transaction.atomic():
+            for model, _ in SEARCH_FIELDS.values():
+                written = rebuild_search_index(model)
+                self.stdout.write(f'Indexed {written} terms for {model._meta.verbose_name_plural}.')
+
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from management.standing import BATCH_SIZE, recompute_all_standing, recompute_standing
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored GPA, credit totals and in-progress count of students.'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('student_ids', nargs='*', type=int, help='Only recompute these students.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+
+        if options['student_ids']:
+            updated = recompute_standing(options['student_ids'])
+        else:
+            updated = recompute_all_standing(batch_size=options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Recomputed standing for {updated} students in {elapsed:.2f}s.'))
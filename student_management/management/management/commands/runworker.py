@@ -0,0 +1,60 @@
+import signal
+import threading
+from django.core.management.base import BaseCommand, CommandError
+from management.jobs import POLL_INTERVAL, work
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (imports, large deletions, grade changes, rebuilds) in a thread '
+        'or process pool, claiming them from the database with SELECT ... FOR UPDATE SKIP LOCKED. '
+        'Any number of workers can run side by side. SIGTERM or Ctrl-C stops claiming and waits '
+        'for running jobs.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--concurrency', type=int, default=2, help='Jobs run at the same time.')
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Run jobs in worker processes (CPU-bound jobs; timeouts interrupt the job) instead of threads.'
+        )
+        parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help='Seconds between polls when idle.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due.')
+
+    def report(self, job, status):
+
+        style = self.style.SUCCESS if status == 'succeeded' else self.style.WARNING
+        self.stdout.write(style(f'{job.task} #{job.pk} attempt {job.attempts}: {status}'))
+
+    def handle(self, *args, **options):
+
+        if options['concurrency'] < 1 or options['poll_interval'] <= 0:
+            raise CommandError('--concurrency must be at least 1 and --poll-interval positive.')
+
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+
+            self.stderr.write('Stopping: waiting for running jobs...')
+            stop.set()
+
+        previous = {signum: signal.signal(signum, shutdown) for signum in (signal.SIGTERM, signal.SIGINT)}
+
+        mode = 'processes' if options['processes'] else 'threads'
+        self.stdout.write(f'Worker started: {options["concurrency"]} {mode}.')
+
+        try:
+            ran = work(
+                concurrency=options['concurrency'],
+                processes=options['processes'],
+                poll_interval=options['poll_interval'],
+                burst=options['burst'],
+                stop=stop,
+                report=self.report if options['verbosity'] > 0 else None,
+            )
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(f'Worker stopped after {ran} attempts.')
@@ -0,0 +1,233 @@
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.backends import django as django_backend
+
+# Per-request instrumentation. RequestMetricsMiddleware opens a
+# RequestMetrics collector for each request in a context variable; every
+# database connection gets an execute wrapper (installed on
+# connection_created) and the project's template backend times renders into
+# the current collector. The totals are logged as one JSON line per request,
+# aggregated per URL name for /_metrics, and checked against the query
+# budgets in settings.QUERY_BUDGETS.
+#
+# The aggregates live in process memory: each worker serves its own
+# /_metrics, so scrape every worker.
+
+logger = logging.getLogger('management.metrics')
+
+_current = ContextVar('request_metrics', default=None)
+
+METRICS = [
+    ('requests_total', 'counter', 'Requests served.'),
+    ('db_queries_total', 'counter', 'SQL queries executed.'),
+    ('db_seconds_total', 'counter', 'Time spent in SQL queries.'),
+    ('template_seconds_total', 'counter', 'Time spent rendering templates.'),
+    ('response_bytes_total', 'counter', 'Response body bytes (streaming responses excluded).'),
+    ('request_seconds_total', 'counter', 'Wall time spent in the view and the middleware below this one.'),
+    ('query_budget_exceeded_total', 'counter', 'Requests that ran more queries than their budget.'),
+]
+METRIC_PREFIX = 'sms_'
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+class RequestMetrics:
+
+    def __init__(self):
+
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+class MetricsRegistry:
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, values):
+
+        with self._lock:
+            totals = self._views.setdefault(view, dict.fromkeys((name for name, _, _ in METRICS), 0))
+            for name, value in values.items():
+                totals[name] += value
+
+    def snapshot(self):
+
+        with self._lock:
+            return {view: dict(totals) for view, totals in self._views.items()}
+
+    def reset(self):
+
+        with self._lock:
+            self._views.clear()
+
+registry = MetricsRegistry()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's totals."""
+
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started
+
+def instrument_connection(sender, connection, **kwargs):
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+class TimedTemplate:
+
+    def __init__(self, template):
+
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.template_seconds += time.perf_counter() - started
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock Django template backend with render times added to the request metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+def _view_name(request):
+
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else '<unresolved>'
+
+def query_budget(view):
+
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+class RequestMetricsMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        self.finish(request, response, metrics, time.perf_counter() - started)
+
+        return response
+
+    async def __acall__(self, request):
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        self.finish(request, response, metrics, time.perf_counter() - started)
+
+        return response
+
+    def finish(self, request, response, metrics, elapsed):
+
+        view = _view_name(request)
+        size = 0 if response.streaming else len(response.content)
+        budget = query_budget(view)
+        over_budget = budget is not None and metrics.queries > budget
+
+        registry.record(view, {
+            'requests_total': 1,
+            'db_queries_total': metrics.queries,
+            'db_seconds_total': metrics.db_seconds,
+            'template_seconds_total': metrics.template_seconds,
+            'response_bytes_total': size,
+            'request_seconds_total': elapsed,
+            'query_budget_exceeded_total': int(over_budget),
+        })
+
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_seconds * 1000, 2),
+            'template_ms': round(metrics.template_seconds * 1000, 2),
+            'total_ms': round(elapsed * 1000, 2),
+            'bytes': size if not response.streaming else None,
+        }))
+
+        if over_budget:
+            message = f'{view} ran {metrics.queries} queries, over its budget of {budget} ({request.method} {request.path}).'
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+def _number(value):
+
+    return str(value) if isinstance(value, int) else f'{value:.6f}'
+
+def _label(value):
+
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics(snapshot):
+    """The registry ``snapshot`` in the Prometheus text exposition format."""
+
+    lines = []
+    for name, kind, help_text in METRICS:
+        metric = METRIC_PREFIX + name
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for view, totals in sorted(snapshot.items()):
+            lines.append(f'{metric}{{view="{_label(view)}"}} {_number(totals[name])}')
+
+    return '\n'.join(lines) + '\n'
+
+def metrics_view(request):
+
+    return HttpResponse(render_metrics(registry.snapshot()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_enrollment_counts(apps, schema_editor):
+    Enrollment = apps.get_model('management', 'Enrollment')
+
+    for model_name, field in (('Student', 'student'), ('Course', 'course')):
+        model = apps.get_model('management', model_name)
+        counts = (
+            Enrollment.objects
+            .filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        model.objects.update(enrollment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of enrollments, maintained by management.counters.'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of enrollments, maintained by management.counters.'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['-enrollment_count', 'title'], name='course_enrollment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-enrollment_count', 'name'], name='student_enrollment_count_idx'),
+        ),
+        migrations.RunPython(populate_enrollment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:21
+
+import re
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = [
+    ('student_name_trgm_idx', 'management_student', 'name'),
+    ('student_email_trgm_idx', 'management_student', 'email'),
+    ('course_title_trgm_idx', 'management_course', 'title'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # Match the UPPER(column::text) expression Django emits for icontains.
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def populate_search_tokens(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+
+    SearchToken = apps.get_model('management', 'SearchToken')
+    sources = [
+        ('student', apps.get_model('management', 'Student'), ['name', 'email']),
+        ('course', apps.get_model('management', 'Course'), ['title']),
+    ]
+
+    for kind, model, fields in sources:
+        tokens = []
+        for pk, *values in model.objects.values_list('pk', *fields).iterator():
+            terms = set()
+            for value in values:
+                terms.update(re.findall(r'[a-z0-9]+', (value or '').lower()))
+            tokens.extend(SearchToken(kind=kind, object_id=pk, term=term) for term in terms)
+        SearchToken.objects.bulk_create(tokens, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0002_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('student', 'Student'), ('course', 'Course')], max_length=7)),
+                ('object_id', models.BigIntegerField()),
+                ('term', models.CharField(max_length=254)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term', 'object_id'], name='searchtoken_term_idx'), models.Index(fields=['kind', 'object_id'], name='searchtoken_object_idx')],
+            },
+        ),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:23
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+
+GRADE_POINTS = {
+    'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+    'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+    'D+': 1.3, 'D': 1.0, 'F': 0.0
+}
+
+
+def populate_standing(apps, schema_editor):
+    Student = apps.get_model('management', 'Student')
+    Enrollment = apps.get_model('management', 'Enrollment')
+
+    graded = Q(grade__in=GRADE_POINTS)
+    points = Case(
+        *[When(grade=grade, then=Value(value)) for grade, value in GRADE_POINTS.items()],
+        output_field=FloatField()
+    )
+    totals = (
+        Enrollment.objects
+        .order_by()
+        .values('student_id')
+        .annotate(
+            quality_points=Sum(points * F('course__credits'), filter=graded),
+            graded_credits=Sum('course__credits', filter=graded),
+            credits_attempted=Sum('course__credits'),
+            credits_earned=Sum('course__credits', filter=graded & ~Q(grade='F')),
+            in_progress_count=Count('pk', filter=Q(grade__isnull=True) | Q(grade='I')),
+        )
+    )
+
+    students = []
+    for row in totals.iterator():
+        gpa = None
+        if row['graded_credits']:
+            gpa = Decimal(row['quality_points'] / row['graded_credits']).quantize(
+                Decimal('0.01'), rounding=ROUND_HALF_UP
+            )
+        students.append(Student(
+            pk=row['student_id'],
+            gpa=gpa,
+            credits_attempted=row['credits_attempted'] or 0,
+            credits_earned=row['credits_earned'] or 0,
+            in_progress_count=row['in_progress_count'],
+        ))
+
+    Student.objects.bulk_update(
+        students, ['gpa', 'credits_attempted', 'credits_earned', 'in_progress_count'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='credits_attempted',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='credits_earned',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='gpa',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Grade point average over graded courses.', max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='in_progress_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_standing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0006_course_capacity_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Name of the task in management.jobs.TASKS.', max_length=100)),
+                ('arguments', models.JSONField(blank=True, default=dict, help_text='Keyword arguments of the task.')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=9)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Attempts started so far.')),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('timeout', models.PositiveIntegerField(default=600, help_text='Seconds one attempt may run.')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Not claimed before this time.')),
+                ('worker', models.CharField(blank=True, help_text='Worker running the current attempt.', max_length=100)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='When the current attempt times out.', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, help_text='Traceback of the last failed attempt.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-pk'],
+                'indexes': [models.Index(condition=models.Q(('status', 'queued')), fields=['run_after'], name='job_queued_idx'), models.Index(condition=models.Q(('status', 'running')), fields=['expires_at'], name='job_running_idx'), models.Index(fields=['status', '-created_at'], name='job_status_idx')],
+            },
+        ),
+    ]
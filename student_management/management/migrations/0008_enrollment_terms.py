@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+import datetime
+
+import django.db.models.deletion
+import management.terms
+from django.db import migrations, models
+from django.db.models import Max, Min
+from django.utils import timezone
+
+# First month and number of each term, as in management.terms.
+TERM_STARTS = [(1, 1), (6, 2), (8, 3)]
+
+
+def populate_enrollment_terms(apps, schema_editor):
+    Enrollment = apps.get_model('management', 'Enrollment')
+
+    dates = Enrollment.objects.aggregate(first=Min('enrollment_date'), last=Max('enrollment_date'))
+    if dates['first'] is None:
+        return
+
+    # One UPDATE per term between the oldest and the newest enrollment.
+    months = [month for month, _ in TERM_STARTS]
+    for year in range(timezone.localtime(dates['first']).year, timezone.localtime(dates['last']).year + 1):
+        for index, (month, number) in enumerate(TERM_STARTS):
+            start = timezone.make_aware(datetime.datetime(year, month, 1))
+            if index + 1 < len(months):
+                end = timezone.make_aware(datetime.datetime(year, months[index + 1], 1))
+            else:
+                end = timezone.make_aware(datetime.datetime(year + 1, 1, 1))
+            Enrollment.objects.filter(enrollment_date__gte=start, enrollment_date__lt=end).update(term=f'{year}-{number}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0007_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEnrollment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('grade', models.CharField(blank=True, choices=[('A+', 'A+'), ('A', 'A'), ('A-', 'A-'), ('B+', 'B+'), ('B', 'B'), ('B-', 'B-'), ('C+', 'C+'), ('C', 'C'), ('C-', 'C-'), ('D+', 'D+'), ('D', 'D'), ('F', 'F'), ('I', 'Incomplete'), ('W', 'Withdrawn')], max_length=2, null=True)),
+                ('term', models.CharField(max_length=6)),
+                ('enrollment_date', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['term', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='term',
+            field=models.CharField(default=management.terms.current_term, help_text='Term of the enrollment, e.g. 2026-3 for Fall 2026 (see management.terms).', max_length=6),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['term', 'grade', 'student'], name='enrollment_term_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['term', 'course', 'grade'], name='enrollment_term_course_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedenrollment',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_enrollments', to='management.course'),
+        ),
+        migrations.AddField(
+            model_name='archivedenrollment',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_enrollments', to='management.student'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedenrollment',
+            index=models.Index(fields=['term', 'course'], name='archived_term_course_idx'),
+        ),
+        migrations.RunPython(populate_enrollment_terms, migrations.RunPython.noop),
+    ]
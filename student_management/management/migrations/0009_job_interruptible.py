@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('management', '0008_enrollment_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='interruptible',
+            field=models.BooleanField(default=False, help_text='Whether the worker stops the current attempt at its timeout (process workers).'),
+        ),
+    ]
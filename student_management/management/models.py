@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .terms import current_term, term_label
 import re
 
 # Create your models here.
@@ -9,15 +11,52 @@ class Student(models.Model):
     
     name = models.CharField(max_length=100, help_text="Full name of the student.")
     email = models.EmailField(unique=True, help_text="Email address of the student.")
+    enrollment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of enrollments, maintained by management.counters.'
+    )
+    
+    # Academic standing, maintained by management.standing.
+    gpa = models.DecimalField(
+        max_digits=3,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Grade point average over graded courses.'
+    )
+    credits_attempted = models.PositiveIntegerField(default=0, editable=False)
+    credits_earned = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    DERIVED_FIELDS = ['enrollment_count', 'gpa', 'credits_attempted', 'credits_earned', 'in_progress_count']
+    
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], name='student_name_idx'),
+            models.Index(fields=['-enrollment_count', 'name'], name='student_enrollment_count_idx'),
+        ]
         
     def __str__(self):
         return f"{self.name} ({self.email})"
     
+    def save(self, *args, **kwargs):
+        
+        # enrollment_count and the standing columns only change through the
+        # UPDATEs in management.counters and management.standing; saving a
+        # stale instance (a profile edit, the admin) must not overwrite them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def clean(self):
         
         if self.email:
@@ -34,15 +73,57 @@ class Course(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(6)], 
         help_text='Number of credits of the course (1-6).'
     )
+    enrollment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of enrollments, maintained by management.counters.'
+    )
+    capacity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Maximum number of enrolled students; empty for no limit.'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['title']
+        indexes = [
+            models.Index(fields=['title'], name='course_title_idx'),
+            models.Index(fields=['-enrollment_count', 'title'], name='course_enrollment_count_idx'),
+        ]
         
     def __str__(self):
         return f"{self.title} ({self.credits} credits)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        
+        instance = super().from_db(db, field_names, values)
+        # Lets the standing and waitlist signals notice a change of credits or capacity.
+        instance._loaded_credits = instance.__dict__.get('credits')
+        instance._loaded_capacity = instance.__dict__.get('capacity')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        
+        # enrollment_count only changes through the UPDATEs in management.counters
+        # and management.registration; saving a stale instance must not overwrite
+        # it, or seats taken in the meantime would be handed out again.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'enrollment_count'
+            ]
+        super().save(*args, **kwargs)
+    
+    @property
+    def seats_left(self):
+        
+        if self.capacity is None:
+            return None
+        return max(self.capacity - self.enrollment_count, 0)
+    
     def clean(self):
         
         if self.title:
@@ -63,6 +144,14 @@ class Enrollment(models.Model):
         ('I', 'Incomplete'), ('W', 'Withdrawn'),
     ]
     
+    # 4.0 scale; grades missing here (I, W, ungraded) do not count toward GPA.
+    GRADE_POINTS = {
+        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
+        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+        'D+': 1.3, 'D': 1.0, 'F': 0.0
+    }
+    
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrollments')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     grade = models.CharField(
@@ -72,12 +161,173 @@ class Enrollment(models.Model):
         null=True,
         help_text='Grade received in the course.'
     )
+    term = models.CharField(
+        max_length=6,
+        default=current_term,
+        help_text='Term of the enrollment, e.g. 2026-3 for Fall 2026 (see management.terms).'
+    )
     enrollment_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('student', 'course')
         ordering = ['student__name', 'course__title']
+        indexes = [
+            # enrollment_list defaults to the current term: ?term= alone and
+            # with ?grade= or ?course= (and grade)
+            models.Index(fields=['term', 'grade', 'student'], name='enrollment_term_grade_idx'),
+            models.Index(fields=['term', 'course', 'grade'], name='enrollment_term_course_idx'),
+            # enrollment_list ?grade= filter and the report grade histogram
+            models.Index(fields=['grade', 'student'], name='enrollment_grade_idx'),
+            # enrollment_list ?course=&grade= and per-course grade sheets
+            models.Index(fields=['course', 'grade'], name='enrollment_course_grade_idx'),
+            # "recent enrollments" feed on the dashboard
+            models.Index(fields=['-enrollment_date'], name='enrollment_recent_idx'),
+            # transcript "in progress" count: only ungraded / Incomplete rows
+            models.Index(
+                fields=['student'],
+                condition=models.Q(grade__isnull=True) | models.Q(grade='I'),
+                name='enrollment_in_progress_idx'
+            ),
+        ]
         
     def __str__(self):
         return f"{self.student.name} enrolled in {self.course.title} - Grade: {self.grade or 'N/A'}"
+    
+    @property
+    def term_label(self):
+        return term_label(self.term)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so the counter and standing signals can
+        # tell when an enrollment is regraded or moved to another student or course.
+        instance._loaded_student_id = instance.__dict__.get('student_id')
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        instance._loaded_grade = instance.__dict__.get('grade')
+        return instance
+        
+class ArchivedEnrollment(models.Model):
+    
+    # An enrollment of a closed term, moved out of the Enrollment table by
+    # management.archive so the tables staff work with hold only open terms.
+    # Keeps the enrollment's id; grades are final once a term is archived.
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='archived_enrollments')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='archived_enrollments')
+    grade = models.CharField(max_length=2, choices=Enrollment.GRADE_CHOICES, blank=True, null=True)
+    term = models.CharField(max_length=6)
+    enrollment_date = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['term', 'pk']
+        indexes = [
+            models.Index(fields=['term', 'course'], name='archived_term_course_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.student.name} took {self.course.title} in {self.term} - Grade: {self.grade or 'N/A'}"
+    
+    @property
+    def term_label(self):
+        return term_label(self.term)
+        
+class WaitlistEntry(models.Model):
+    
+    # A student waiting for a seat in a full course; management.registration
+    # enrolls waiting students in arrival order as seats free up.
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='waitlist_entries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='waitlist_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('student', 'course')
+        ordering = ['created_at', 'pk']
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            models.Index(fields=['course', 'created_at'], name='waitlist_course_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.student.name} waiting for {self.course.title}"
+        
+class Job(models.Model):
+    
+    # A unit of background work (see management.jobs): queued by the views,
+    # claimed and run by "manage.py runworker".
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=100, help_text='Name of the task in management.jobs.TASKS.')
+    arguments = models.JSONField(default=dict, blank=True, help_text='Keyword arguments of the task.')
+    status = models.CharField(max_length=9, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0, help_text='Attempts started so far.')
+    max_attempts = models.PositiveIntegerField(default=3)
+    timeout = models.PositiveIntegerField(default=600, help_text='Seconds one attempt may run.')
+    run_after = models.DateTimeField(default=timezone.now, help_text='Not claimed before this time.')
+    worker = models.CharField(max_length=100, blank=True, help_text='Worker running the current attempt.')
+    interruptible = models.BooleanField(
+        default=False, help_text='Whether the worker stops the current attempt at its timeout (process workers).'
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, help_text='When the current attempt times out.')
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, help_text='Traceback of the last failed attempt.')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-pk']
+        indexes = [
+            # the queue: what runworker claims next
+            models.Index(fields=['run_after'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            # running attempts past their deadline
+            models.Index(fields=['expires_at'], condition=models.Q(status='running'), name='job_running_idx'),
+            # the status page filter
+            models.Index(fields=['status', '-created_at'], name='job_status_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+        
+class SearchToken(models.Model):
+    
+    # Inverted index used by management.search when the database has no
+    # trigram support (SQLite): one row per word of a student's name/email
+    # or a course's title.
+    STUDENT = 'student'
+    COURSE = 'course'
+    KIND_CHOICES = [
+        (STUDENT, 'Student'),
+        (COURSE, 'Course'),
+    ]
+    
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    term = models.CharField(max_length=254)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'term', 'object_id'], name='searchtoken_term_idx'),
+            models.Index(fields=['kind', 'object_id'], name='searchtoken_object_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.term}"
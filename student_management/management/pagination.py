@@ -0,0 +1,231 @@
+import base64
+import binascii
+import json
+from functools import cached_property, reduce
+from operator import or_
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+
+# Keyset ("cursor") pagination. Instead of OFFSET, each page seeks past the
+# ordering key of the last row it showed, so ?cursor=... costs the same on
+# page 5000 as on page 1 and no COUNT(*) is issued. Cursor values are
+# checked against the ordering fields when decoded; an invalid cursor falls
+# back to the first page, or with strict=True raises InvalidCursor.
+
+PAGE_QUERY_PARAMS = ('page', 'cursor')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(values, direction):
+
+    payload = json.dumps({'k': values, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token, fields=None):
+    """
+    (values, direction) of a cursor, or None if it is invalid. With
+    ``fields`` (the model fields of the ordering keys) the values are
+    converted with each field's to_python().
+    """
+
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload['k'], payload['d']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None
+
+    if fields is not None:
+        if len(values) != len(fields):
+            return None
+        try:
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if None in values:
+            return None
+
+    return values, direction
+
+def _seek_filter(ordering, values, direction):
+
+    # (k1, k2, k3) > (v1, v2, v3) expanded into OR'd prefix comparisons so
+    # every backend can use an index on the ordering columns. A descending
+    # key ("-k2") seeks the other way.
+    keys = [key.lstrip('-') for key in ordering]
+    conditions = []
+
+    for i, key in enumerate(keys):
+        forward = (direction == 'next') != ordering[i].startswith('-')
+        equal = {prefix: value for prefix, value in zip(keys[:i], values[:i])}
+        conditions.append(Q(**equal, **{f'{key}__{"gt" if forward else "lt"}': values[i]}))
+
+    return reduce(or_, conditions)
+
+def _key_field(queryset, key):
+
+    annotation = queryset.query.annotations.get(key)
+    if annotation is not None:
+        return annotation.output_field
+
+    opts = queryset.model._meta
+    *relations, name = key.split('__')
+    for relation in relations:
+        opts = opts.get_field(relation).related_model._meta
+
+    return opts.pk if name == 'pk' else opts.get_field(name)
+
+def _key_value(obj, key):
+
+    if isinstance(obj, dict):
+        return obj[key]
+
+    if key == 'pk':
+        return obj.pk
+
+    for part in key.split('__'):
+        obj = getattr(obj, part)
+
+    return obj
+
+class CursorPage:
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+
+        if not self.has_next_page or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[-1]), 'next')
+
+    @property
+    def previous_cursor(self):
+
+        if not self.has_previous_page or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[0]), 'prev')
+
+    @cached_property
+    def approximate_total(self):
+        return self.paginator.approximate_total()
+
+class CursorPaginator:
+    """
+    Seek-based paginator over ``queryset`` ordered by ``ordering`` (field or
+    annotation names, "-" for descending; the primary key is appended as the
+    tiebreaker).
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+
+        self.ordering = [*ordering, 'pk']
+        self.keys = [key.lstrip('-') for key in self.ordering]
+        self.queryset = queryset.order_by(*self.ordering)
+        self.fields = [_key_field(self.queryset, key) for key in self.keys]
+        self.per_page = int(per_page)
+
+    def key_values(self, obj):
+        return [_key_value(obj, key) for key in self.keys]
+
+    def get_page(self, cursor=None, strict=False):
+        """
+        The page after (or before) ``cursor``, or the first page. An invalid
+        cursor gives the first page, or raises InvalidCursor if ``strict``.
+        """
+
+        decoded = decode_cursor(cursor, self.fields) if cursor else None
+
+        if decoded is None and cursor and strict:
+            raise InvalidCursor('Invalid cursor.')
+
+        if decoded is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        values, direction = decoded
+
+        queryset = self.queryset.filter(_seek_filter(self.ordering, values, direction))
+
+        if direction == 'next':
+            rows = list(queryset[:self.per_page + 1])
+            return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+        rows = list(queryset.reverse()[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page][::-1], self, True, has_previous)
+
+    def approximate_total(self):
+        """
+        Planner row estimate for an unfiltered PostgreSQL table, read from
+        pg_class without scanning. None elsewhere, where only an exact
+        COUNT(*) would be available.
+        """
+
+        query = self.queryset.query
+        connection = connections[self.queryset.db]
+
+        if connection.vendor != 'postgresql' or query.where:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [self.queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+
+        return max(row[0], 0) if row else None
+
+def paginate(request, queryset, ordering, per_page=10):
+    """
+    Offset pagination by default; keyset pagination when the request carries
+    a ``cursor`` parameter or settings.CURSOR_PAGINATION is enabled.
+    """
+
+    if getattr(settings, 'CURSOR_PAGINATION', False) or 'cursor' in request.GET:
+        return CursorPaginator(queryset, per_page, ordering).get_page(request.GET.get('cursor'))
+
+    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
+
+def page_query(request):
+    """The current query string without the pagination parameters."""
+
+    params = request.GET.copy()
+    for param in PAGE_QUERY_PARAMS:
+        params.pop(param, None)
+
+    return params.urlencode()
@@ -0,0 +1,113 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from .counters import adjust_enrollment_counts
+from .models import Course, Enrollment, ArchivedEnrollment, WaitlistEntry
+from .terms import term_label
+
+# Seat-limited registration. A seat is taken with one conditional UPDATE on
+# the course row:
+#
+#     UPDATE course SET enrollment_count = enrollment_count + 1
+#     WHERE id = %s AND (capacity IS NULL OR enrollment_count < capacity)
+#
+# which either claims a seat or matches nothing, so concurrent registrations
+# can never overbook. Only registrations for the same course wait for each
+# other on that one row lock, and only until their transaction commits.
+# Enrollments created here carry _seat_reserved so the counter signal does
+# not count the course seat a second time.
+#
+# Full courses can queue students on a waitlist, which is promoted in
+# arrival order when a seat frees up (see signals.py).
+#
+# A student takes a course once. Enrollment's unique (student, course)
+# only covers the open terms, so a course taken in an archived term is
+# checked separately (check_not_taken); there are no retakes.
+
+
+def _take_seat(course_id):
+
+    has_seat = Q(capacity__isnull=True) | Q(enrollment_count__lt=F('capacity'))
+
+    return Course.objects.filter(has_seat, pk=course_id).update(enrollment_count=F('enrollment_count') + 1) == 1
+
+def _enroll(student_id, course_id, grade=None):
+
+    enrollment = Enrollment(student_id=student_id, course_id=course_id, grade=grade)
+    enrollment._seat_reserved = True
+    with transaction.atomic():
+        enrollment.save()
+
+    return enrollment
+
+def check_not_taken(student_id, course_id):
+    """Raise ValidationError if the student took the course in an archived term."""
+
+    term = (
+        ArchivedEnrollment.objects
+        .filter(student_id=student_id, course_id=course_id)
+        .values_list('term', flat=True)
+        .first()
+    )
+    if term:
+        raise ValidationError(f'The student already took this course in {term_label(term)}.')
+
+def register(student_id, course_id, grade=None, waitlist=False):
+    """
+    Enroll a student if the course has a free seat and return the
+    Enrollment. A full course raises ValidationError, or with ``waitlist``
+    queues the student and returns their WaitlistEntry.
+    """
+
+    check_not_taken(student_id, course_id)
+
+    with transaction.atomic():
+        if _take_seat(course_id):
+            try:
+                enrollment = _enroll(student_id, course_id, grade)
+            except IntegrityError:
+                # Rolls back the seat taken above.
+                raise ValidationError('The student is already enrolled in this course.')
+
+            WaitlistEntry.objects.filter(student_id=student_id, course_id=course_id).delete()
+            return enrollment
+
+        if not Course.objects.filter(pk=course_id).exists():
+            raise ValidationError('No such course.')
+        if Enrollment.objects.filter(student_id=student_id, course_id=course_id).exists():
+            raise ValidationError('The student is already enrolled in this course.')
+        if not waitlist:
+            raise ValidationError('The course is full.')
+
+        entry, _ = WaitlistEntry.objects.get_or_create(student_id=student_id, course_id=course_id)
+        return entry
+
+def promote_waitlist(course_id):
+    """
+    Enroll waitlisted students of the course, first come first served, while
+    it has free seats. Returns the enrollments created.
+    """
+
+    promoted = []
+
+    with transaction.atomic():
+        while True:
+            # Concurrent promotions for the same course skip each other's entries.
+            entry = (
+                WaitlistEntry.objects
+                .select_for_update(skip_locked=True)
+                .filter(course_id=course_id)
+                .order_by('created_at', 'pk')
+                .first()
+            )
+            if entry is None or not _take_seat(course_id):
+                break
+
+            entry.delete()
+            try:
+                promoted.append(_enroll(entry.student_id, course_id))
+            except IntegrityError:
+                # Enrolled some other way while waiting: hand the seat back.
+                adjust_enrollment_counts(course_id=course_id, delta=-1)
+
+    return promoted
@@ -0,0 +1,214 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Read replicas. ReplicaRouter sends every write to the primary ("default")
+# and, while a request allows it, reads to one of settings.DATABASE_REPLICAS.
+# ReplicaMiddleware allows it for GET and HEAD requests to the read-only
+# views named in settings.REPLICA_VIEWS (lists, details, reports, exports,
+# the JSON API); everything else, including management commands and job
+# workers, reads from the primary unless it opts in with replica_reads().
+#
+# Reads go back to the primary:
+#   - for the rest of a request once it has written anything, and inside
+#     transactions on the primary;
+#   - for REPLICA_PIN_SECONDS after a request wrote, through a cookie, so
+#     a user reads their own writes despite replication lag;
+#   - while no replica can be connected to. A replica that fails to connect
+#     is skipped for REPLICA_RETRY_SECONDS, in this process;
+#   - inside primary_reads(), e.g. to refill a cache that a lagging replica
+#     would fill with stale data.
+#
+# A request reads from one replica throughout, picked at random among the
+# available ones on its first read.
+
+logger = logging.getLogger('management.replicas')
+
+PIN_COOKIE = 'sms_primary'
+
+_current = ContextVar('replica_reads', default=None)
+_unavailable = {}
+_unavailable_lock = threading.Lock()
+
+
+class ReplicaReads:
+    """Replica routing state of one request (or replica_reads() block)."""
+
+    def __init__(self, allowed=True):
+
+        self.allowed = allowed
+        self.alias = None
+        self.wrote = False
+
+def _replicas():
+
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+def _connects(alias):
+
+    with _unavailable_lock:
+        if _unavailable.get(alias, 0) > time.monotonic():
+            return False
+
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError as error:
+        retry = getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+        with _unavailable_lock:
+            _unavailable[alias] = time.monotonic() + retry
+        logger.warning('Replica %s is unavailable, reading from the primary for %ss: %s', alias, retry, error)
+        return False
+
+    return True
+
+def available_replica():
+    """A replica alias that accepts connections, or None."""
+
+    replicas = _replicas()
+    random.shuffle(replicas)
+
+    return next((alias for alias in replicas if _connects(alias)), None)
+
+def read_database():
+    """The alias the current context reads from."""
+
+    reads = _current.get()
+    if reads is None or not reads.allowed or reads.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+
+    if reads.alias is None:
+        reads.alias = available_replica() or DEFAULT_DB_ALIAS
+
+    return reads.alias
+
+@contextmanager
+def _reads(allowed):
+
+    token = _current.set(ReplicaReads(allowed))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+def replica_reads():
+    """Route the reads of the block to a replica, e.g. for an export run from the command line."""
+
+    return _reads(True)
+
+def primary_reads():
+    """Route the reads of the block to the primary, even within a replica request."""
+
+    return _reads(False)
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+
+        reads = _current.get()
+        if reads is not None:
+            reads.wrote = True
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+
+        # Replicas get the schema through replication.
+        return False if db in _replicas() else None
+
+def _pinned(request):
+
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def _stream(content, reads):
+
+    # Streamed bodies are read after the view returns, outside the request's context.
+    iterator = iter(content)
+    while True:
+        token = _current.set(reads)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _current.reset(token)
+        yield chunk
+
+class ReplicaMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        reads = ReplicaReads(allowed=False)
+        token = _current.set(reads)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        return self.finish(request, response, reads)
+
+    async def __acall__(self, request):
+
+        reads = ReplicaReads(allowed=False)
+        token = _current.set(reads)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        return self.finish(request, response, reads)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+
+        reads = _current.get()
+        if reads is not None and _replicas():
+            reads.allowed = (
+                request.method in ('GET', 'HEAD')
+                and request.resolver_match.url_name in getattr(settings, 'REPLICA_VIEWS', ())
+                and not _pinned(request)
+            )
+
+    def finish(self, request, response, reads):
+
+        if reads.wrote and _replicas():
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time()) + seconds), max_age=seconds, httponly=True, samesite='Lax'
+            )
+        if reads.allowed and response.streaming and not response.is_async:
+            response.streaming_content = _stream(response.streaming_content, reads)
+
+        return response
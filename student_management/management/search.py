@@ -0,0 +1,175 @@
+import re
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from .models import Student, Course, SearchToken
+
+# Student and course search. On PostgreSQL the icontains filters are served
+# by trigram GIN indexes on UPPER(column) (migration 0003) and results are
+# ranked by trigram similarity. Elsewhere (SQLite in tests) a SearchToken
+# inverted index answers word-prefix queries through a B-tree range scan.
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+INDEX_BATCH_SIZE = 2000
+
+SEARCH_FIELDS = {
+    SearchToken.STUDENT: (Student, ['name', 'email']),
+    SearchToken.COURSE: (Course, ['title']),
+}
+
+
+def tokenize(text):
+
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+def uses_trigram_search(using='default'):
+
+    backend = getattr(settings, 'SEARCH_BACKEND', 'auto')
+
+    if backend == 'auto':
+        return connections[using].vendor == 'postgresql'
+
+    return backend == 'trigram'
+
+def kind_for(model):
+
+    for kind, (search_model, _) in SEARCH_FIELDS.items():
+        if search_model is model:
+            return kind
+
+    raise ValueError(f'{model.__name__} is not searchable.')
+
+def _terms(values):
+
+    terms = set()
+    for value in values:
+        terms.update(tokenize(value))
+
+    return terms
+
+def index_object(obj):
+
+    kind = kind_for(type(obj))
+    _, fields = SEARCH_FIELDS[kind]
+    terms = _terms((getattr(obj, field) for field in fields))
+
+    SearchToken.objects.filter(kind=kind, object_id=obj.pk).delete()
+    SearchToken.objects.bulk_create(
+        SearchToken(kind=kind, object_id=obj.pk, term=term) for term in terms
+    )
+
+def unindex_object(model, pk):
+
+    SearchToken.objects.filter(kind=kind_for(model), object_id=pk).delete()
+
+def rebuild_search_index(model, pks=None):
+    """Rebuild the SearchToken rows of ``model`` (all rows, or only ``pks``). Returns tokens written."""
+
+    kind = kind_for(model)
+    _, fields = SEARCH_FIELDS[kind]
+
+    tokens = SearchToken.objects.filter(kind=kind)
+    rows = model.objects.order_by()
+    if pks is not None:
+        tokens = tokens.filter(object_id__in=pks)
+        rows = rows.filter(pk__in=pks)
+    tokens.delete()
+
+    written = 0
+    batch = []
+
+    for pk, *values in rows.values_list('pk', *fields).iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.extend(SearchToken(kind=kind, object_id=pk, term=term) for term in _terms(values))
+
+        if len(batch) >= INDEX_BATCH_SIZE:
+            SearchToken.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+
+    SearchToken.objects.bulk_create(batch)
+
+    return written + len(batch)
+
+def _trigram_condition(fields, query):
+
+    return reduce(or_, (Q(**{f'{field}__icontains': query}) for field in fields))
+
+def _trigram_search(queryset, fields, query):
+
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    similarities = [TrigramSimilarity(field, query) for field in fields]
+    rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+
+    return queryset.filter(_trigram_condition(fields, query)).annotate(search_rank=rank)
+
+def _token_filter(queryset, kind, terms):
+
+    tokens = SearchToken.objects.filter(kind=kind)
+
+    # Every query word must prefix-match a word of the object. The range
+    # form of "startswith" stays index-friendly on every backend.
+    for term in terms:
+        queryset = queryset.filter(
+            pk__in=tokens.filter(term__gte=term, term__lt=term + '\uffff').values('object_id')
+        )
+
+    return queryset
+
+def _token_search(queryset, kind, query):
+
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    queryset = _token_filter(queryset, kind, terms)
+
+    # Whole-word matches rank above prefix-only matches.
+    exact_matches = (
+        SearchToken.objects
+        .filter(kind=kind, object_id=OuterRef('pk'), term__in=terms)
+        .order_by()
+        .values('object_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+
+    return queryset.annotate(search_rank=Coalesce(Subquery(exact_matches), 0))
+
+def match(queryset, query):
+    """
+    Filter ``queryset`` (Students or Courses) to matches for ``query``
+    without ranking, leaving the caller's ordering in place.
+    """
+
+    kind = kind_for(queryset.model)
+    _, fields = SEARCH_FIELDS[kind]
+
+    if uses_trigram_search(queryset.db):
+        return queryset.filter(_trigram_condition(fields, query))
+
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    return _token_filter(queryset, kind, terms)
+
+def search(queryset, query):
+    """
+    Filter ``queryset`` (Students or Courses) to matches for ``query``,
+    annotated with ``search_rank`` and ordered best match first.
+    """
+
+    model = queryset.model
+    kind = kind_for(model)
+    _, fields = SEARCH_FIELDS[kind]
+
+    if uses_trigram_search(queryset.db):
+        queryset = _trigram_search(queryset, fields, query)
+    else:
+        queryset = _token_search(queryset, kind, query)
+
+    return queryset.order_by('-search_rank', *model._meta.ordering)
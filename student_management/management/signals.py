@@ -0,0 +1,105 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .analytics import invalidate_cohort_report
+from .models import Student, Course, Enrollment
+from .counters import adjust_enrollment_counts
+from .registration import promote_waitlist
+from .search import index_object, unindex_object, uses_trigram_search
+from .standing import course_student_ids, recompute_standing
+from .stats import invalidate_dashboard_stats
+from .transcripts import invalidate_transcripts
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Enrollment)
+def dashboard_stats_changed(sender, **kwargs):
+
+    invalidate_dashboard_stats()
+    invalidate_cohort_report()
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, raw=False, **kwargs):
+
+    if raw:
+        return
+
+    if created:
+        # management.registration has already counted the course seat it reserved.
+        course_id = None if getattr(instance, '_seat_reserved', False) else instance.course_id
+        adjust_enrollment_counts(instance.student_id, course_id, 1)
+        recompute_standing([instance.student_id])
+        invalidate_transcripts([instance.student_id])
+    else:
+        old_student_id = getattr(instance, '_loaded_student_id', instance.student_id)
+        old_course_id = getattr(instance, '_loaded_course_id', instance.course_id)
+        old_grade = getattr(instance, '_loaded_grade', instance.grade)
+
+        if old_student_id != instance.student_id:
+            adjust_enrollment_counts(student_id=old_student_id, delta=-1)
+            adjust_enrollment_counts(student_id=instance.student_id, delta=1)
+        if old_course_id != instance.course_id:
+            adjust_enrollment_counts(course_id=old_course_id, delta=-1)
+            adjust_enrollment_counts(course_id=instance.course_id, delta=1)
+
+        if (old_student_id, old_course_id, old_grade) != (instance.student_id, instance.course_id, instance.grade):
+            recompute_standing([old_student_id, instance.student_id])
+        invalidate_transcripts([old_student_id, instance.student_id])
+
+    instance._loaded_student_id = instance.student_id
+    instance._loaded_course_id = instance.course_id
+    instance._loaded_grade = instance.grade
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, origin=None, **kwargs):
+
+    # Also runs for enrollments removed by a Student/Course CASCADE; the
+    # parent's own row may already be gone, which makes its UPDATE a no-op.
+    adjust_enrollment_counts(instance.student_id, instance.course_id, -1)
+    recompute_standing([instance.student_id])
+    invalidate_transcripts([instance.student_id])
+
+    # The freed seat goes to the waitlist, unless the course itself is being deleted.
+    if not isinstance(origin, Course) and getattr(origin, 'model', None) is not Course:
+        promote_waitlist(instance.course_id)
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, raw=False, **kwargs):
+
+    old_credits = getattr(instance, '_loaded_credits', instance.credits)
+    old_capacity = getattr(instance, '_loaded_capacity', instance.capacity)
+
+    if not created and not raw:
+        student_ids = course_student_ids([instance.pk])
+        if old_credits != instance.credits:
+            recompute_standing(student_ids)
+        invalidate_transcripts(student_ids)
+
+        if instance.capacity != old_capacity:
+            promote_waitlist(instance.pk)
+
+    instance._loaded_credits = instance.credits
+    instance._loaded_capacity = instance.capacity
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_changed(sender, instance, **kwargs):
+
+    invalidate_transcripts([instance.pk])
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Course)
+def search_document_saved(sender, instance, raw=False, using='default', **kwargs):
+
+    if not raw and not uses_trigram_search(using):
+        index_object(instance)
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Course)
+def search_document_deleted(sender, instance, using='default', **kwargs):
+
+    if not uses_trigram_search(using):
+        unindex_object(sender, instance.pk)
@@ -0,0 +1,130 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import connections, router, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from .models import Student, Enrollment, ArchivedEnrollment
+
+# Stored academic standing per student (Student.gpa, credits_attempted,
+# credits_earned, in_progress_count). Writes recompute only the students
+# they touch; recompute_all_standing rebuilds everyone in batches.
+# Enrollments of closed terms (ArchivedEnrollment) count as well.
+
+STANDING_FIELDS = ['gpa', 'credits_attempted', 'credits_earned', 'in_progress_count']
+BATCH_SIZE = 1000
+
+GRADED = Q(grade__in=Enrollment.GRADE_POINTS)
+PASSED = GRADED & ~Q(grade='F')
+IN_PROGRESS = Q(grade__isnull=True) | Q(grade='I')
+
+
+def _grade_points():
+
+    return Case(
+        *[When(grade=grade, then=Value(points)) for grade, points in Enrollment.GRADE_POINTS.items()],
+        output_field=FloatField()
+    )
+
+def _standing(totals):
+
+    if not totals:
+        return {'gpa': None, 'credits_attempted': 0, 'credits_earned': 0, 'in_progress_count': 0}
+
+    gpa = None
+    if totals['graded_credits']:
+        gpa = Decimal(totals['quality_points'] / totals['graded_credits']).quantize(
+            Decimal('0.01'), rounding=ROUND_HALF_UP
+        )
+
+    return {
+        'gpa': gpa,
+        'credits_attempted': totals['credits_attempted'] or 0,
+        'credits_earned': totals['credits_earned'] or 0,
+        'in_progress_count': totals['in_progress_count'],
+    }
+
+def _write_standing(rows):
+    """
+    Store (student id, standing) pairs with one parameterized UPDATE run
+    through executemany. bulk_update() would build a CASE expression per
+    field and student, which costs more than the aggregate query itself.
+    """
+
+    using = router.db_for_write(Student)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = Student._meta
+
+    assignments = ', '.join(f'{quote(meta.get_field(name).column)} = %s' for name in STANDING_FIELDS)
+    sql = f'UPDATE {quote(meta.db_table)} SET {assignments} WHERE {quote(meta.pk.column)} = %s'
+    params = [
+        [meta.get_field(name).get_db_prep_save(standing[name], connection) for name in STANDING_FIELDS] + [pk]
+        for pk, standing in rows
+    ]
+
+    if params:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+    return len(params)
+
+def _totals(model, student_ids):
+
+    return (
+        model.objects
+        .filter(student_id__in=student_ids)
+        .order_by()
+        .values('student_id')
+        .annotate(
+            quality_points=Sum(_grade_points() * F('course__credits'), filter=GRADED),
+            graded_credits=Sum('course__credits', filter=GRADED),
+            credits_attempted=Sum('course__credits'),
+            credits_earned=Sum('course__credits', filter=PASSED),
+            in_progress_count=Count('pk', filter=IN_PROGRESS),
+        )
+    )
+
+def _recompute_batch(student_ids):
+
+    # Open and closed terms in one UNION ALL; a student can have a row from each.
+    by_student = {}
+    for row in _totals(Enrollment, student_ids).union(_totals(ArchivedEnrollment, student_ids), all=True):
+        totals = by_student.setdefault(row.pop('student_id'), {})
+        for key, value in row.items():
+            totals[key] = (totals.get(key) or 0) + (value or 0)
+
+    return _write_standing([(pk, _standing(by_student.get(pk))) for pk in student_ids])
+
+def course_student_ids(course_ids):
+    """Ids of the students who took any of ``course_ids``, in open or closed terms."""
+
+    return list(
+        Enrollment.objects.filter(course__in=course_ids).order_by().values_list('student_id', flat=True)
+        .union(ArchivedEnrollment.objects.filter(course__in=course_ids).order_by().values_list('student_id', flat=True))
+    )
+
+def recompute_standing(student_ids):
+    """Recompute the stored standing of ``student_ids`` with one aggregate query per batch."""
+
+    student_ids = sorted({pk for pk in student_ids if pk is not None})
+    updated = 0
+
+    for start in range(0, len(student_ids), BATCH_SIZE):
+        updated += _recompute_batch(student_ids[start:start + BATCH_SIZE])
+
+    return updated
+
+def recompute_all_standing(batch_size=BATCH_SIZE):
+
+    updated = 0
+    batch = []
+
+    for pk in Student.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+
+        if len(batch) >= batch_size:
+            updated += _recompute_batch(batch)
+            batch = []
+
+    if batch:
+        updated += _recompute_batch(batch)
+
+    return updated
@@ -0,0 +1,83 @@
+import asyncio
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from .models import Student, Course
+from .replicas import primary_reads
+from .reports import aenrollment_summary, alist, enrollment_summary
+
+DASHBOARD_STATS_KEY = 'management:dashboard_stats'
+TOP_N = 5
+
+
+def _stats_cache():
+
+    return caches[getattr(settings, 'STATS_CACHE_ALIAS', 'default')]
+
+def _top_students():
+
+    return Student.objects.order_by('-enrollment_count', 'name').values('pk', 'name', 'enrollment_count')[:TOP_N]
+
+def _popular_courses():
+
+    return (
+        Course.objects
+        .order_by('-enrollment_count', 'title')
+        .values('pk', 'title', 'credits', 'enrollment_count')[:TOP_N]
+    )
+
+def compute_dashboard_stats():
+
+    stats = enrollment_summary()
+    stats['top_students'] = list(_top_students())
+    stats['popular_courses'] = list(_popular_courses())
+
+    return stats
+
+async def acompute_dashboard_stats():
+    """compute_dashboard_stats() with the three independent queries awaited together."""
+
+    stats, top_students, popular_courses = await asyncio.gather(
+        aenrollment_summary(), alist(_top_students()), alist(_popular_courses())
+    )
+    stats['top_students'] = top_students
+    stats['popular_courses'] = popular_courses
+
+    return stats
+
+def get_dashboard_stats():
+    """
+    Totals, grade histogram and top students/courses for the dashboard and
+    reports pages. Served from the cache; model signals drop the entry when
+    a write commits, and STATS_CACHE_TIMEOUT bounds staleness for writes made
+    outside this process. Misses are computed on the primary, as a lagging
+    replica would refill the entry with the totals from before the write.
+    """
+
+    cache = _stats_cache()
+    stats = cache.get(DASHBOARD_STATS_KEY)
+
+    if stats is None:
+        with primary_reads():
+            stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_STATS_KEY, stats, getattr(settings, 'STATS_CACHE_TIMEOUT', 300))
+
+    return stats
+
+async def aget_dashboard_stats():
+    """Async get_dashboard_stats(), for the async views."""
+
+    cache = _stats_cache()
+    stats = await cache.aget(DASHBOARD_STATS_KEY)
+
+    if stats is None:
+        with primary_reads():
+            stats = await acompute_dashboard_stats()
+        await cache.aset(DASHBOARD_STATS_KEY, stats, getattr(settings, 'STATS_CACHE_TIMEOUT', 300))
+
+    return stats
+
+def invalidate_dashboard_stats():
+
+    # After the commit: a miss in between would cache the old totals again.
+    transaction.on_commit(lambda: _stats_cache().delete(DASHBOARD_STATS_KEY))
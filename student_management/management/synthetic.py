@@ -0,0 +1,207 @@
+import csv
+import io
+import math
+import random
+from array import array
+from itertools import accumulate, islice
+from django.db import connections, router, transaction
+from django.utils import timezone
+from .analytics import invalidate_cohort_report
+from .counters import rebuild_enrollment_counts
+from .models import Student, Course, Enrollment
+from .search import rebuild_search_index, uses_trigram_search
+from .standing import recompute_all_standing
+from .stats import invalidate_dashboard_stats
+from .terms import current_term, recent_terms, term_start
+
+# Deterministic synthetic datasets for benchmarks. The same seed and sizes
+# always produce the same rows. Rows are streamed into bulk_create batches
+# so memory stays flat at any size, and the derived data that signals would
+# maintain (counters, standing, search tokens) is rebuilt once at the end.
+# Enrollments, the bulk of the rows, skip the ORM's per-value preparation:
+# they are streamed with COPY on PostgreSQL and inserted with a single
+# executemany elsewhere, several times faster than bulk_create.
+
+BATCH_SIZE = 5000
+EMAIL_DOMAIN = 'synthetic.example.com'
+
+FIRST_NAMES = [
+    'Aarav', 'Alice', 'Amara', 'Ben', 'Carlos', 'Chen', 'Diana', 'Elena', 'Farah', 'George',
+    'Hana', 'Ibrahim', 'Isla', 'Jonas', 'Kavya', 'Liam', 'Maya', 'Noah', 'Olivia', 'Pedro',
+    'Priya', 'Quinn', 'Ravi', 'Sofia', 'Tariq', 'Uma', 'Victor', 'Wei', 'Yara', 'Zoe',
+]
+LAST_NAMES = [
+    'Adams', 'Brown', 'Costa', 'Dubois', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ito', 'Jensen',
+    'Khan', 'Lopez', 'Mehta', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Silva', 'Tanaka', 'Walker',
+]
+SUBJECTS = [
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'History', 'Literature', 'Economics',
+    'Philosophy', 'Statistics', 'Computing', 'Geography', 'Psychology', 'Music', 'Art',
+]
+LEVELS = ['Introduction To', 'Foundations Of', 'Topics In', 'Advanced', 'Seminar In']
+CREDITS = [1, 2, 3, 3, 3, 4, 4, 5, 6]
+
+# Roughly a B-centred curve; None is an in-progress enrollment.
+GRADE_WEIGHTS = [
+    ('A+', 3), ('A', 9), ('A-', 9), ('B+', 11), ('B', 13), ('B-', 9), ('C+', 7), ('C', 7),
+    ('C-', 4), ('D+', 2), ('D', 2), ('F', 3), ('I', 1), ('W', 2), (None, 18),
+]
+
+
+def _batches(rows, size):
+
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def _students(count):
+
+    for i in range(count):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        yield Student(name=f'{first} {last}', email=f'{first.lower()}.{last.lower()}.{i}@{EMAIL_DOMAIN}')
+
+def _courses(count, rng):
+
+    for i in range(count):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        level = LEVELS[(i // len(SUBJECTS)) % len(LEVELS)]
+        yield Course(title=f'{level} {subject} {i + 1}', credits=rng.choice(CREDITS))
+
+def _enrollments(student_ids, course_ids, count, rng, terms):
+    """
+    ``count`` distinct (student id, course id, grade, term) rows, spread
+    over ``terms`` at random. Each student takes an equal
+    share of courses, walked from a random start with a stride coprime to
+    the number of courses, so pairs never repeat and nothing is held in
+    memory per enrollment.
+    """
+
+    grades, weights = zip(*GRADE_WEIGHTS)
+    cum_weights = list(accumulate(weights))
+    courses = len(course_ids)
+    per_student, extra = divmod(count, len(student_ids))
+
+    for index, student_id in enumerate(student_ids):
+        taken = min(per_student + (index < extra), courses)
+        start = rng.randrange(courses)
+        stride = rng.randrange(1, courses) if courses > 1 else 1
+        while math.gcd(stride, courses) != 1:
+            stride += 1
+
+        for j in range(taken):
+            grade = rng.choices(grades, cum_weights=cum_weights)[0]
+            term = rng.choice(terms) if len(terms) > 1 else terms[0]
+            yield student_id, course_ids[(start + j * stride) % courses], grade, term
+
+def _insert(model, batch):
+
+    created = model.objects.bulk_create(batch)
+    if all(obj.pk is not None for obj in created):
+        return created
+
+    # Backends that cannot return primary keys from a bulk insert.
+    if model is Student:
+        return model.objects.filter(email__in=[obj.email for obj in batch]).only('pk')
+    return model.objects.filter(title__in=[obj.title for obj in batch]).only('pk')
+
+ENROLLMENT_COLUMNS = ('student', 'course', 'grade', 'term', 'enrollment_date', 'updated_at')
+
+
+def _enrollment_dates(rows, now):
+
+    # Enrollments of past terms are dated at the start of their term.
+    current = current_term()
+    return {term: now if term == current else term_start(term) for term in {row[3] for row in rows}}
+
+def _copy_enrollments(cursor, table, columns, rows, now):
+
+    dates = _enrollment_dates(rows, now)
+    sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+
+    if hasattr(cursor, 'copy'):
+        # psycopg 3: rows are sent as they are, no text round trip.
+        with cursor.copy(sql) as copy:
+            for student_id, course_id, grade, term in rows:
+                copy.write_row((student_id, course_id, grade, term, dates[term], now))
+        return
+
+    # psycopg2
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for student_id, course_id, grade, term in rows:
+        writer.writerow([student_id, course_id, grade or '', term, dates[term].isoformat(), now.isoformat()])
+    buffer.seek(0)
+
+    cursor.copy_expert(f'{sql} WITH (FORMAT csv)', buffer)
+
+def _insert_enrollments(rows):
+    """
+    Write (student id, course id, grade, term) rows without building model
+    instances: COPY on PostgreSQL, one executemany INSERT elsewhere.
+    """
+
+    using = router.db_for_write(Enrollment)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = Enrollment._meta
+    columns = [quote(meta.get_field(name).column) for name in ENROLLMENT_COLUMNS]
+    now = timezone.now()
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            _copy_enrollments(cursor, quote(meta.db_table), columns, rows, now)
+            return
+
+        stamp = connection.ops.adapt_datetimefield_value(now)
+        dates = {term: connection.ops.adapt_datetimefield_value(date) for term, date in _enrollment_dates(rows, now).items()}
+        cursor.executemany(
+            f'INSERT INTO {quote(meta.db_table)} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))})',
+            [(student_id, course_id, grade, term, dates[term], stamp) for student_id, course_id, grade, term in rows]
+        )
+
+def generate_dataset(students, courses, enrollments, seed=0, batch_size=BATCH_SIZE, progress=None, terms=1):
+    """
+    Insert ``students`` students, ``courses`` courses and up to
+    ``enrollments`` enrollments (at most students * courses) generated from
+    ``seed``, spread over the current and ``terms - 1`` earlier terms, then
+    rebuild the derived data. Returns the row counts written.
+    """
+
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+    written = {}
+    ids = {}
+
+    for model, rows in ((Student, _students(students)), (Course, _courses(courses, rng))):
+        name = str(model._meta.verbose_name_plural)
+        ids[model] = array('q')
+        for batch in _batches(rows, batch_size):
+            ids[model].extend(obj.pk for obj in _insert(model, batch))
+        written[name] = len(ids[model])
+        report(f'{len(ids[model])} {name}')
+
+    student_ids, course_ids = ids[Student], ids[Course]
+
+    total = 0
+    if student_ids and course_ids:
+        rows = _enrollments(student_ids, course_ids, enrollments, rng, recent_terms(terms))
+        for batch in _batches(rows, batch_size):
+            _insert_enrollments(batch)
+            total += len(batch)
+            if total % (batch_size * 20) == 0:
+                report(f'{total} enrollments')
+    written['enrollments'] = total
+    report(f'{total} enrollments')
+
+    rebuild_enrollment_counts(Student)
+    rebuild_enrollment_counts(Course)
+    recompute_all_standing()
+    if not uses_trigram_search():
+        rebuild_search_index(Student)
+        rebuild_search_index(Course)
+    invalidate_dashboard_stats()
+    invalidate_cohort_report()
+    report('rebuilt counters, standing and search index')
+
+    return written
@@ -0,0 +1,87 @@
+import datetime
+import re
+from django.conf import settings
+from django.utils import timezone
+
+# Academic terms. A term code is "<year>-<n>" with n = 1 for Spring
+# (January to May), 2 for Summer (June and July) and 3 for Fall (August to
+# December). Codes sort chronologically, so "before this term" is a plain
+# string comparison in Python and in SQL.
+#
+# Enrollments carry the code of the term they were made in. Open terms live
+# in the Enrollment table; "manage.py archive_terms" moves closed terms to
+# ArchivedEnrollment (see management/archive.py).
+
+# (number, first month, name)
+TERMS = [(1, 1, 'Spring'), (2, 6, 'Summer'), (3, 8, 'Fall')]
+TERM_CODE = re.compile(r'^\d{4}-[123]$')
+
+# Value of the ?term= filter that selects every open term.
+ALL_TERMS = 'all'
+
+
+def term_for(moment):
+    """The code of the term ``moment`` (a date or datetime) falls in."""
+
+    if isinstance(moment, datetime.datetime) and timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+
+    number = max(number for number, first_month, _ in TERMS if first_month <= moment.month)
+
+    return f'{moment.year}-{number}'
+
+def current_term():
+    """settings.CURRENT_TERM, or the term of today's date."""
+
+    return getattr(settings, 'CURRENT_TERM', None) or term_for(timezone.now())
+
+def is_term(value):
+
+    return bool(value) and bool(TERM_CODE.match(value))
+
+def term_label(code):
+
+    year, number = code.split('-')
+    names = {str(n): name for n, _, name in TERMS}
+
+    return f'{names[number]} {year}'
+
+def term_start(code):
+    """Aware datetime at which the term starts."""
+
+    year, number = code.split('-')
+    first_month = next(first for n, first, _ in TERMS if str(n) == number)
+
+    return timezone.make_aware(datetime.datetime(int(year), first_month, 1))
+
+def previous_term(code):
+
+    year, number = map(int, code.split('-'))
+
+    return f'{year}-{number - 1}' if number > 1 else f'{year - 1}-{len(TERMS)}'
+
+def recent_terms(count=6, term=None):
+    """The current (or given) term and the ``count - 1`` terms before it, newest first."""
+
+    terms = [term or current_term()]
+    while len(terms) < count:
+        terms.append(previous_term(terms[-1]))
+
+    return terms
+
+def term_choices(count=6):
+    """(code, label) pairs for the recent terms, for filter drop-downs."""
+
+    return [(code, term_label(code)) for code in recent_terms(count)]
+
+def selected_term(params):
+    """
+    The term a list or report shows: ``?term=<code>``, every open term for
+    ``?term=all``, and the current term by default. None means no filter.
+    """
+
+    term = params.get('term')
+    if term == ALL_TERMS:
+        return None
+
+    return term if is_term(term) else current_term()
@@ -1,3 +1,1920 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from io import StringIO
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from unittest import skipUnless
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .models import Student, Course, Enrollment, ArchivedEnrollment, Job, SearchToken, WaitlistEntry
+from .autocomplete import autocomplete
+from .benchmark import compare, registration_stress, run_benchmark
+from .analytics import compute_cohort_analytics, top_students
+from .archive import archive_closed_terms
+from .counters import enrollment_count_drift
+from .deletion import delete_with_enrollments
+from .filters import filter_enrollments
+from .forms import EnrollmentForm
+from .grading import apply_grades
+from .importers import import_csv
+from .jobs import claim, enqueue, expire_jobs, run_job
+from .metrics import QueryBudgetExceeded, registry
+from .pagination import CursorPaginator, InvalidCursor, encode_cursor
+from .registration import promote_waitlist, register
+from .replicas import PIN_COOKIE, ReplicaRouter, primary_reads, read_database, replica_reads
+from .reports import enrollment_summary
+from .search import search
+from .standing import recompute_all_standing
+from .stats import aget_dashboard_stats, get_dashboard_stats
+from .synthetic import generate_dataset
+from .terms import current_term, previous_term, recent_terms, term_for, term_label
+from .transcript_files import PARTS_DIR, generate_transcripts, render_chunk
+from .transcripts import TRANSCRIPT_CACHE_KEY
 
 # Create your tests here.
+
+class EnrollmentSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        Student.objects.create(name='Carol White', email='carol@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+
+        Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+        Enrollment.objects.create(student=cls.alice, course=cls.physics, grade='B+')
+        Enrollment.objects.create(student=cls.bob, course=cls.math, grade='A')
+        Enrollment.objects.create(student=cls.bob, course=cls.physics)
+
+    def test_summary_is_a_single_query(self):
+
+        with self.assertNumQueries(1):
+            summary = enrollment_summary()
+
+        self.assertEqual(summary['total_students'], 3)
+        self.assertEqual(summary['total_courses'], 2)
+        self.assertEqual(summary['total_enrollments'], 4)
+        self.assertEqual(summary['graded'], 3)
+        self.assertEqual(summary['ungraded'], 1)
+        self.assertEqual(summary['grade_stats']['A'], 2)
+        self.assertEqual(summary['grade_stats']['B+'], 1)
+        self.assertEqual(summary['grade_stats']['Withdrawn'], 0)
+        self.assertEqual(
+            list(summary['grade_stats']),
+            [grade_name for _, grade_name in Enrollment.GRADE_CHOICES]
+        )
+
+    def test_summary_of_filtered_enrollments(self):
+
+        summary = enrollment_summary(Enrollment.objects.filter(course=self.physics))
+
+        self.assertEqual(summary['total_enrollments'], 2)
+        self.assertEqual(summary['ungraded'], 1)
+        self.assertEqual(summary['grade_stats']['A'], 0)
+        self.assertEqual(summary['total_students'], 3)
+
+    def test_empty_tables(self):
+
+        Enrollment.objects.all().delete()
+        Student.objects.all().delete()
+
+        summary = enrollment_summary()
+
+        self.assertEqual(summary['total_students'], 0)
+        self.assertEqual(summary['total_courses'], 2)
+        self.assertEqual(summary['total_enrollments'], 0)
+
+    def test_report_overview(self):
+
+        cache.clear()
+        response = self.client.get(reverse('reports_overview'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_enrollments'], 4)
+        self.assertEqual(response.context['ungraded_count'], 1)
+
+    def test_admin_changelist(self):
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(reverse('admin:management_enrollment_changelist'), {'course__id__exact': self.physics.pk})
+
+        self.assertEqual(response.context['summary']['total_enrollments'], 2)
+        self.assertContains(response, '2 enrollment(s) match: 1 graded, 1 ungraded.')
+
+class DashboardStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+
+    def setUp(self):
+
+        cache.clear()
+
+    def test_cached_after_first_call(self):
+
+        get_dashboard_stats()
+
+        with self.assertNumQueries(0):
+            stats = get_dashboard_stats()
+
+        self.assertEqual(stats['total_students'], 1)
+        self.assertEqual(stats['top_students'][0]['name'], 'Alice Smith')
+        self.assertEqual(stats['popular_courses'][0]['enrollment_count'], 1)
+
+    def test_writes_invalidate(self):
+
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        self.assertEqual(get_dashboard_stats()['total_students'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=bob, course=self.math)
+        self.assertEqual(get_dashboard_stats()['ungraded'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.math.delete()
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_courses'], 0)
+        self.assertEqual(stats['total_enrollments'], 0)
+
+    def test_home_shows_fresh_totals(self):
+
+        self.client.get(reverse('home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(name='Bob Jones', email='bob@example.com')
+
+        response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.context['total_students'], 2)
+        self.assertEqual(response.context['total_enrollments'], 1)
+
+    def test_invalidated_on_commit(self):
+
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Student.objects.create(name='Bob Jones', email='bob@example.com')
+            # Until the commit, readers keep the cached (committed) totals.
+            self.assertEqual(get_dashboard_stats()['total_students'], 1)
+
+        self.assertTrue(callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_dashboard_stats()['total_students'], 2)
+
+class EnrollmentCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+
+    def assertCounts(self, obj, expected):
+
+        obj.refresh_from_db()
+        self.assertEqual(obj.enrollment_count, expected)
+
+    def test_create_and_delete(self):
+
+        enrollment = Enrollment.objects.create(student=self.alice, course=self.math)
+        Enrollment.objects.create(student=self.alice, course=self.physics)
+        self.assertCounts(self.alice, 2)
+        self.assertCounts(self.math, 1)
+
+        enrollment.delete()
+        self.assertCounts(self.alice, 1)
+        self.assertCounts(self.math, 0)
+
+    def test_cascade_delete(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math)
+        Enrollment.objects.create(student=self.bob, course=self.math)
+        Enrollment.objects.create(student=self.bob, course=self.physics)
+
+        self.math.delete()
+        self.assertCounts(self.alice, 0)
+        self.assertCounts(self.bob, 1)
+        self.assertCounts(self.physics, 1)
+
+    def test_moving_an_enrollment(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math)
+        enrollment = Enrollment.objects.get()
+        enrollment.student = self.bob
+        enrollment.save()
+
+        self.assertCounts(self.alice, 0)
+        self.assertCounts(self.bob, 1)
+        self.assertCounts(self.math, 1)
+
+    def test_editing_a_student_keeps_the_counter(self):
+
+        stale = Student.objects.get(pk=self.alice.pk)
+        Enrollment.objects.create(student=self.alice, course=self.math)
+
+        stale.name = 'Alice Jones'
+        stale.save()
+        self.assertCounts(self.alice, 1)
+
+        response = self.client.post(reverse('student_edit', args=[self.alice.pk]), {'name': 'Alice Brown', 'email': 'alice@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertCounts(self.alice, 1)
+        self.assertEqual(self.alice.name, 'Alice Brown')
+
+    def test_rebuild_and_verify_command(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math)
+        Student.objects.filter(pk=self.alice.pk).update(enrollment_count=7)
+        self.assertEqual(enrollment_count_drift(Student).count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_enrollment_counts', verify=True, stdout=StringIO())
+
+        call_command('rebuild_enrollment_counts', stdout=StringIO())
+        self.assertCounts(self.alice, 1)
+        call_command('rebuild_enrollment_counts', verify=True, stdout=StringIO())
+
+    def test_top_students_read_the_counter(self):
+
+        cache.clear()
+        Enrollment.objects.create(student=self.bob, course=self.math)
+
+        self.assertEqual(get_dashboard_stats()['top_students'][0]['name'], 'Bob Jones')
+
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        # Duplicate names make the pk tiebreaker matter.
+        for i in range(25):
+            Student.objects.create(name=f'Student {"ABCDE"[i % 5]}', email=f'student{i}@example.com')
+
+    def walk(self, paginator):
+
+        seen = []
+        page = paginator.get_page()
+        seen.extend(page)
+
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            seen.extend(page)
+
+        return seen, page
+
+    def test_forward_and_back(self):
+
+        paginator = CursorPaginator(Student.objects.all(), 10, ['name'])
+        seen, last_page = self.walk(paginator)
+
+        expected = list(Student.objects.order_by('name', 'pk'))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(last_page), 5)
+        self.assertTrue(last_page.has_previous())
+
+        page = paginator.get_page(last_page.previous_cursor)
+        self.assertEqual(list(page), expected[10:20])
+        page = paginator.get_page(page.previous_cursor)
+        self.assertEqual(list(page), expected[:10])
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+
+        paginator = CursorPaginator(Student.objects.all(), 10, ['name'])
+
+        self.assertEqual(list(paginator.get_page('not-a-cursor')), list(paginator.get_page()))
+
+    def test_wrong_typed_cursor_falls_back_to_first_page(self):
+
+        paginator = CursorPaginator(Student.objects.all(), 10, ['name'])
+        tampered = encode_cursor(['a', 'abc'], 'next')
+
+        self.assertEqual(list(paginator.get_page(tampered)), list(paginator.get_page()))
+        self.assertEqual(list(paginator.get_page(encode_cursor(['a', None], 'next'))), list(paginator.get_page()))
+        with self.assertRaises(InvalidCursor):
+            paginator.get_page(tampered, strict=True)
+
+        for name, values in [('student_list', ['a', 'abc']), ('course_list', ['a', {}]), ('enrollment_list', ['a', 'b', 'abc'])]:
+            response = self.client.get(reverse(name), {'cursor': encode_cursor(values, 'next')})
+            self.assertEqual(response.status_code, 200)
+
+    def test_related_ordering_keys(self):
+
+        course = Course.objects.create(title='Mathematics', credits=4)
+        for student in Student.objects.all():
+            Enrollment.objects.create(student=student, course=course)
+
+        paginator = CursorPaginator(
+            Enrollment.objects.select_related('student', 'course'), 7, ['student__name', 'course__title']
+        )
+        seen, _ = self.walk(paginator)
+
+        self.assertEqual(seen, list(Enrollment.objects.order_by('student__name', 'course__title', 'pk')))
+
+    def test_list_view_in_cursor_mode(self):
+
+        response = self.client.get(reverse('student_list'), {'cursor': ''})
+
+        self.assertEqual(response.status_code, 200)
+        page = response.context['students']
+        self.assertTrue(page.is_cursor)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+
+        response = self.client.get(reverse('student_list'), {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['students']), 10)
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.alan = Student.objects.create(name='Alan Smithers', email='alan@school.org')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        Course.objects.create(title='Linear Algebra', credits=4)
+        Course.objects.create(title='Algebraic Topology', credits=3)
+
+    def test_word_prefix_matches(self):
+
+        self.assertEqual(list(search(Student.objects.all(), 'smith')), [self.alice, self.alan])
+        self.assertEqual(list(search(Student.objects.all(), 'al smith')), [self.alice, self.alan])
+        self.assertEqual(list(search(Student.objects.all(), 'school')), [self.alan])
+        self.assertEqual(search(Student.objects.all(), 'zed').count(), 0)
+
+    def test_exact_words_rank_first(self):
+
+        titles = [course.title for course in search(Course.objects.all(), 'algebra')]
+
+        self.assertEqual(titles, ['Linear Algebra', 'Algebraic Topology'])
+
+    def test_index_follows_writes(self):
+
+        self.bob.name = 'Robert Jones'
+        self.bob.save()
+        self.assertEqual(list(search(Student.objects.all(), 'robert')), [self.bob])
+        self.assertEqual(search(Student.objects.all(), 'bob jones').count(), 1)
+
+        self.bob.delete()
+        self.assertFalse(SearchToken.objects.filter(kind=SearchToken.STUDENT, object_id=self.bob.pk).exists())
+
+    def test_rebuild_command(self):
+
+        SearchToken.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(list(search(Student.objects.all(), 'jones')), [self.bob])
+
+    def test_student_list_search(self):
+
+        response = self.client.get(reverse('student_list'), {'search': 'smith'})
+
+        self.assertEqual(list(response.context['students']), [self.alice, self.alan])
+
+    def test_cursor_pages_keep_the_ranking(self):
+
+        response = self.client.get(reverse('course_list'), {'search': 'algebra', 'cursor': ''})
+        self.assertEqual([course.title for course in response.context['courses']], ['Linear Algebra', 'Algebraic Topology'])
+
+        paginator = CursorPaginator(search(Course.objects.all(), 'algebra'), 1, ['-search_rank', 'title'])
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual([first[0].title, second[0].title], ['Linear Algebra', 'Algebraic Topology'])
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(paginator.get_page(second.previous_cursor)), list(first))
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the main query of each view on a seeded dataset and fail if any
+    of them falls back to a full table scan of one of the app's tables.
+    """
+
+    STUDENTS = 1000
+    COURSES = 40
+    COURSES_PER_STUDENT = 4
+
+    @classmethod
+    def setUpTestData(cls):
+
+        rng = random.Random(6)
+        grades = [code for code, _ in Enrollment.GRADE_CHOICES] + [None] * 4
+        # Several open terms, so the enrollment list's default term filter is selective.
+        terms = recent_terms(4)
+
+        Student.objects.bulk_create(
+            Student(name=f'Student {i:04d}', email=f'student{i}@example.com') for i in range(cls.STUDENTS)
+        )
+        Course.objects.bulk_create(
+            Course(title=f'Course {i:03d}', credits=rng.randint(1, 6)) for i in range(cls.COURSES)
+        )
+        course_ids = list(Course.objects.values_list('pk', flat=True))
+        Enrollment.objects.bulk_create(
+            Enrollment(student_id=student_id, course_id=course_id, grade=rng.choice(grades), term=rng.choice(terms))
+            for student_id in Student.objects.values_list('pk', flat=True)
+            for course_id in rng.sample(course_ids, cls.COURSES_PER_STUDENT)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.student_id = Student.objects.values_list('pk', flat=True).first()
+        cls.course_id = course_ids[0]
+
+    def assertNoFullScan(self, queryset):
+
+        plan = queryset.explain()
+
+        if connection.vendor == 'postgresql':
+            full_scans = re.findall(r'Seq Scan on (management_\w+)', plan)
+        else:
+            full_scans = re.findall(r'\bSCAN (management_\w+)\s*$', plan, re.MULTILINE)
+
+        self.assertEqual(full_scans, [], f'Full table scan in plan:\n{plan}')
+
+    def test_enrollment_list(self):
+
+        enrollments = Enrollment.objects.select_related('student', 'course')
+
+        self.assertNoFullScan(enrollments[:10])
+        self.assertNoFullScan(enrollments.filter(student__id=self.student_id)[:10])
+        self.assertNoFullScan(enrollments.filter(course__id=self.course_id)[:10])
+        self.assertNoFullScan(enrollments.filter(grade='A')[:10])
+        self.assertNoFullScan(enrollments.filter(course__id=self.course_id, grade='B')[:10])
+
+    def test_enrollment_list_current_term(self):
+
+        # The queries the view runs by default: every filter plus term=current_term().
+        enrollments = Enrollment.objects.select_related('student', 'course')
+        term = current_term()
+
+        for filters in ({}, {'grade': 'A'}, {'course': self.course_id}, {'course': self.course_id, 'grade': 'B'}):
+            queryset = filter_enrollments(enrollments, {**filters, 'term': term})[:10]
+            self.assertNoFullScan(queryset)
+            self.assertRegex(queryset.explain(), r'enrollment_term_(grade|course)_idx')
+
+        self.assertNoFullScan(filter_enrollments(enrollments, {'student': self.student_id, 'term': term})[:10])
+
+    def test_recent_enrollments(self):
+
+        self.assertNoFullScan(
+            Enrollment.objects.select_related('student', 'course').order_by('-enrollment_date')[:5]
+        )
+
+    def test_grade_histogram(self):
+
+        self.assertNoFullScan(Enrollment.objects.order_by().values('grade').annotate(total=Count('pk')))
+
+    def test_student_and_course_lists(self):
+
+        self.assertNoFullScan(Student.objects.all()[:10])
+        self.assertNoFullScan(Course.objects.all()[:10])
+        self.assertNoFullScan(Student.objects.order_by('-enrollment_count', 'name')[:5])
+        self.assertNoFullScan(Course.objects.order_by('-enrollment_count', 'title')[:5])
+
+    def test_transcript(self):
+
+        enrollments = Enrollment.objects.filter(student=self.student_id).select_related('course')
+
+        self.assertNoFullScan(enrollments)
+        self.assertNoFullScan(enrollments.filter(Q(grade__isnull=True) | Q(grade='I')))
+
+class StudentStandingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        cls.history = Course.objects.create(title='History', credits=2)
+
+    def standing(self):
+
+        self.alice.refresh_from_db()
+        return (
+            self.alice.gpa,
+            self.alice.credits_attempted,
+            self.alice.credits_earned,
+            self.alice.in_progress_count
+        )
+
+    def test_follows_enrollment_changes(self):
+
+        math = Enrollment.objects.create(student=self.alice, course=self.math, grade='A')
+        physics = Enrollment.objects.create(student=self.alice, course=self.physics)
+        self.assertEqual(self.standing(), (Decimal('4.00'), 7, 4, 1))
+
+        physics.grade = 'F'
+        physics.save()
+        # (4.0 * 4 + 0.0 * 3) / 7
+        self.assertEqual(self.standing(), (Decimal('2.29'), 7, 4, 0))
+
+        Enrollment.objects.create(student=self.alice, course=self.history, grade='W')
+        self.assertEqual(self.standing(), (Decimal('2.29'), 9, 4, 0))
+
+        math.delete()
+        self.assertEqual(self.standing(), (Decimal('0.00'), 5, 0, 0))
+
+    def test_follows_course_credit_changes(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math, grade='A')
+        Enrollment.objects.create(student=self.alice, course=self.physics, grade='C')
+
+        self.physics.credits = 1
+        self.physics.save()
+        # (4.0 * 4 + 2.0 * 1) / 5
+        self.assertEqual(self.standing(), (Decimal('3.60'), 5, 5, 0))
+
+    def test_saving_a_stale_student_keeps_standing(self):
+
+        stale = Student.objects.get(pk=self.alice.pk)
+        Enrollment.objects.create(student=self.alice, course=self.math, grade='A')
+
+        stale.email = 'alice.smith@example.com'
+        stale.save()
+        self.assertEqual(self.standing(), (Decimal('4.00'), 4, 4, 0))
+        self.assertEqual(self.alice.email, 'alice.smith@example.com')
+
+    def test_recompute_all_and_command(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math, grade='B')
+        Student.objects.update(gpa=None, credits_attempted=0, credits_earned=0)
+
+        recompute_all_standing()
+        self.assertEqual(self.standing(), (Decimal('3.00'), 4, 4, 0))
+
+        Student.objects.update(gpa=None)
+        call_command('recompute_student_standing', stdout=StringIO())
+        self.assertEqual(self.standing()[0], Decimal('3.00'))
+
+    def test_transcript_reads_stored_standing(self):
+
+        Enrollment.objects.create(student=self.alice, course=self.math, grade='A-')
+        Enrollment.objects.create(student=self.alice, course=self.physics)
+
+        cache.clear()
+        # The version stamp, the student and the open and archived enrollments.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('student_transcript', args=[self.alice.pk]))
+
+        self.assertEqual(response.context['gpa'], Decimal('3.70'))
+        self.assertEqual(response.context['total_credits'], 7)
+        self.assertEqual(response.context['in_progress_count'], 1)
+
+class CohortAnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.carol = Student.objects.create(name='Carol White', email='carol@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=2)
+
+        Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+        Enrollment.objects.create(student=cls.alice, course=cls.physics, grade='C')
+        Enrollment.objects.create(student=cls.bob, course=cls.math, grade='B')
+        Enrollment.objects.create(student=cls.bob, course=cls.physics, grade='I')
+        Enrollment.objects.create(student=cls.carol, course=cls.math, grade='B')
+
+    def test_gpa_rank_and_percentiles_match_stored_standing(self):
+
+        analytics = compute_cohort_analytics(chunk_size=2)
+        rows = {row['pk']: row for row in top_students(analytics)}
+
+        for student in Student.objects.all():
+            self.assertAlmostEqual(rows[student.pk]['gpa'], float(student.gpa))
+
+        # Alice (4.0 * 4 + 2.0 * 2) / 6 = 3.33; Bob and Carol tie at 3.0.
+        self.assertEqual(rows[self.alice.pk]['rank'], 1)
+        self.assertEqual(rows[self.bob.pk]['rank'], 2)
+        self.assertEqual(rows[self.carol.pk]['rank'], 2)
+        self.assertEqual(rows[self.alice.pk]['percentile'], 100.0)
+        self.assertEqual(analytics['gpa_percentiles'][50], 3.0)
+
+    def test_course_distributions(self):
+
+        courses = compute_cohort_analytics()['courses']
+        math = list(courses['ids']).index(self.math.pk)
+
+        self.assertEqual(courses['count'][math], 3)
+        self.assertAlmostEqual(courses['mean'][math], 3.33)
+        self.assertAlmostEqual(courses['std'][math], 0.47)
+        self.assertEqual(courses['histogram'][math].sum(), 3)
+
+    def test_report_page_and_command(self):
+
+        cache.clear()
+        response = self.client.get(reverse('reports_cohort'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['ranked_count'], 3)
+        self.assertContains(response, 'Alice Smith')
+
+        out = StringIO()
+        call_command('cohort_analytics', stdout=out)
+        self.assertIn('Ranked 3 students', out.getvalue())
+
+    def test_report_is_cached_until_the_data_changes(self):
+
+        cache.clear()
+        self.client.get(reverse('reports_cohort'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('reports_cohort'))
+        self.assertEqual(response.context['ranked_count'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dave = Student.objects.create(name='Dave Brown', email='dave@example.com')
+            Enrollment.objects.create(student=dave, course=self.physics, grade='A')
+        response = self.client.get(reverse('reports_cohort'))
+        self.assertEqual(response.context['ranked_count'], 4)
+
+        # Bulk writes skip the signals and invalidate explicitly.
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_grades(self.physics, {Enrollment.objects.get(student=self.bob, course=self.physics).pk: 'A'})
+        rows = {row['pk']: row for row in self.client.get(reverse('reports_cohort')).context['top_students']}
+        self.assertEqual(rows[self.bob.pk]['gpa'], 3.33)
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+
+        Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+        Enrollment.objects.create(student=cls.alice, course=cls.physics)
+        Enrollment.objects.create(student=cls.bob, course=cls.math, grade='B')
+
+    def export(self, dataset, **params):
+
+        response = self.client.get(reverse('export_data', args=[dataset]), params)
+        self.assertTrue(response.streaming)
+
+        return b''.join(response.streaming_content).decode()
+
+    def test_enrollments_csv_with_filters(self):
+
+        rows = list(csv.DictReader(self.export('enrollments', course=self.math.pk).splitlines()))
+
+        self.assertEqual([row['student_name'] for row in rows], ['Alice Smith', 'Bob Jones'])
+        self.assertEqual(rows[0]['course_title'], 'Mathematics')
+
+        rows = list(csv.DictReader(self.export('enrollments', grade='B').splitlines()))
+        self.assertEqual(len(rows), 1)
+
+    def test_transcripts_jsonl(self):
+
+        ArchivedEnrollment.objects.create(
+            id=1000, student=self.bob, course=self.physics, grade='C', term='2025-3',
+            enrollment_date=timezone.now(), updated_at=timezone.now()
+        )
+
+        lines = [json.loads(line) for line in self.export('transcripts', format='jsonl').splitlines()]
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual([line['student_name'] for line in lines], ['Alice Smith', 'Alice Smith', 'Bob Jones', 'Bob Jones'])
+        self.assertEqual(lines[0]['gpa'], '4.00')
+        self.assertEqual({line['course_title'] for line in lines[:2]}, {'Mathematics', 'Physics'})
+        self.assertEqual((lines[2]['course_title'], lines[2]['term'], lines[2]['archived']), ('Physics', '2025-3', True))
+        self.assertFalse(lines[3]['archived'])
+
+    def test_invalid_filters_are_rejected_before_streaming(self):
+
+        response = self.client.get(reverse('export_data', args=['enrollments']), {'student': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Invalid student id "abc".', status_code=400)
+
+        self.assertEqual(self.client.get(reverse('export_data', args=['enrollments']), {'grade': 'Z'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('enrollment_list'), {'course': 'abc'}).status_code, 200)
+
+    def test_unknown_dataset(self):
+
+        response = self.client.get(reverse('export_data', args=['grades']))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+
+        out = StringIO()
+        call_command('export_data', 'courses', '--format', 'jsonl', stdout=out, stderr=StringIO())
+
+        self.assertEqual(
+            [json.loads(line)['title'] for line in out.getvalue().splitlines()],
+            ['Mathematics', 'Physics']
+        )
+
+        with self.assertRaisesMessage(CommandError, 'Invalid course id "x".'):
+            call_command('export_data', 'enrollments', '--course', 'x', stdout=StringIO(), stderr=StringIO())
+
+
+class ImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+
+    def import_text(self, kind, text, **kwargs):
+
+        return import_csv(kind, StringIO(text), **kwargs)
+
+    def test_students_are_validated_and_normalized(self):
+
+        result = self.import_text('students', (
+            'name,email\n'
+            'bob jones,BOB@Example.com\n'
+            'Carol,carol@example.com\n'
+            'Dave Brown,not-an-email\n'
+            'Alice Renamed,alice@example.com\n'
+        ), batch_size=2)
+
+        self.assertEqual(result.rows, 4)
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        self.assertEqual(Student.objects.get(email='bob@example.com').name, 'Bob Jones')
+        self.assertEqual(Student.objects.get(pk=self.alice.pk).name, 'Alice Smith')
+        self.assertEqual(search(Student.objects.all(), 'jones').get().email, 'bob@example.com')
+
+    def test_update_overwrites_existing_rows(self):
+
+        self.import_text('students', 'name,email\nAlice Renamed,alice@example.com\n', update=True)
+
+        self.assertEqual(Student.objects.get(pk=self.alice.pk).name, 'Alice Renamed')
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_enrollments_keep_derived_data_in_step(self):
+
+        self.import_text('courses', 'title,credits\nphysics,3\nChemistry,9\n')
+        self.import_text('students', 'name,email\nBob Jones,bob@example.com\n')
+
+        result = self.import_text('enrollments', (
+            'student_email,course_title,grade\n'
+            'alice@example.com,mathematics,A\n'
+            'alice@example.com,Physics,\n'
+            'bob@example.com,Physics,C\n'
+            'nobody@example.com,Physics,A\n'
+            'bob@example.com,Mathematics,Z\n'
+        ))
+
+        self.assertEqual(result.written, 3)
+        self.assertEqual(len(result.errors), 2)
+        self.assertFalse(Course.objects.filter(title='Chemistry').exists())
+        self.assertFalse(enrollment_count_drift(Student).exists())
+        self.assertFalse(enrollment_count_drift(Course).exists())
+
+        alice = Student.objects.get(pk=self.alice.pk)
+        self.assertEqual((alice.enrollment_count, alice.gpa, alice.in_progress_count), (2, Decimal('4.00'), 1))
+
+        self.import_text('enrollments', 'student_email,course_title,grade\nalice@example.com,Physics,B\n', update=True)
+        self.import_text('courses', 'title,credits\nPhysics,1\n', update=True)
+
+        alice.refresh_from_db()
+        self.assertEqual(alice.enrollment_count, 2)
+        self.assertEqual(alice.in_progress_count, 0)
+        self.assertEqual(alice.credits_attempted, 5)
+        self.assertEqual(alice.gpa, Decimal('3.80'))
+
+    def test_credit_updates_reach_archived_enrollments(self):
+
+        physics = Course.objects.create(title='Physics', credits=3)
+        ArchivedEnrollment.objects.create(
+            id=1000, student=self.alice, course=physics, grade='A', term='2025-3',
+            enrollment_date=timezone.now(), updated_at=timezone.now()
+        )
+        recompute_all_standing()
+
+        self.import_text('courses', 'title,credits\nPhysics,5\n', update=True)
+
+        self.assertEqual(Student.objects.get(pk=self.alice.pk).credits_attempted, 5)
+
+    def test_written_counts_inserted_rows_and_capacity_holds(self):
+
+        result = self.import_text('students', 'name,email\nAlice Smith,alice@example.com\nBob Jones,bob@example.com\n')
+        self.assertEqual(result.written, 1)
+
+        Course.objects.create(title='Physics', credits=3, capacity=1)
+        text = 'student_email,course_title,grade\nalice@example.com,Physics,\nbob@example.com,Physics,\n'
+
+        result = self.import_text('enrollments', text)
+        self.assertEqual(result.written, 1)
+        self.assertEqual(result.errors, [(3, 'The course is full.')])
+
+        result = self.import_text('enrollments', text)
+        self.assertEqual(result.written, 0)
+        self.assertEqual(result.errors, [(3, 'The course is full.')])
+        self.assertEqual(Course.objects.get(title='Physics').enrollment_count, 1)
+
+    def test_missing_columns(self):
+
+        with self.assertRaises(ValidationError):
+            self.import_text('courses', 'title\nPhysics\n')
+
+    def test_upload_view_and_command(self):
+
+        cache.clear()
+        get_dashboard_stats()
+
+        upload = SimpleUploadedFile('courses.csv', b'\xef\xbb\xbftitle,credits\nPhysics,3\n')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('import_upload'), {'kind': 'courses', 'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].written, 1)
+        self.assertEqual(get_dashboard_stats()['total_courses'], 2)
+
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'students', '/nonexistent.csv', stdout=StringIO(), stderr=StringIO())
+
+
+class GradeSheetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        cls.students = [
+            Student.objects.create(name=f'Student {name}', email=f'{name.lower()}@example.com')
+            for name in ('Alpha', 'Bravo', 'Charlie', 'Delta')
+        ]
+        cls.enrollments = [Enrollment.objects.create(student=student, course=cls.math) for student in cls.students]
+        cls.other = Enrollment.objects.create(student=cls.students[0], course=cls.physics, grade='B')
+
+    def setUp(self):
+
+        cache.clear()
+
+    def sheet_data(self, grades):
+
+        data = {'form-TOTAL_FORMS': len(grades), 'form-INITIAL_FORMS': len(grades)}
+        for i, (enrollment, grade) in enumerate(zip(self.enrollments, grades)):
+            data[f'form-{i}-enrollment'] = enrollment.pk
+            data[f'form-{i}-grade'] = grade
+
+        return data
+
+    def test_sheet_updates_grades_standing_and_stats(self):
+
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('course_grade_sheet', args=[self.math.pk]), self.sheet_data(['A', 'B', '', ''])
+            )
+
+        self.assertRedirects(response, reverse('course_grade_sheet', args=[self.math.pk]))
+        self.assertEqual(
+            list(Enrollment.objects.filter(course=self.math).order_by('student__name').values_list('grade', flat=True)),
+            ['A', 'B', None, None]
+        )
+        self.assertEqual(Student.objects.get(pk=self.students[1].pk).gpa, Decimal('3.00'))
+        self.assertEqual(get_dashboard_stats()['graded'], 3)
+
+    def test_apply_grades_writes_changed_rows_in_one_update(self):
+
+        self.enrollments[0].grade = 'A'
+        self.enrollments[0].save()
+        grades = {enrollment.pk: 'A' for enrollment in self.enrollments}
+
+        with CaptureQueriesContext(connection) as queries:
+            changed = apply_grades(self.math, grades)
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "management_enrollment"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual({enrollment.pk for enrollment in changed}, {e.pk for e in self.enrollments[1:]})
+        self.assertEqual(apply_grades(self.math, grades), [])
+
+    def test_sheet_renders_every_student(self):
+
+        response = self.client.get(reverse('course_grade_sheet', args=[self.math.pk]))
+
+        self.assertContains(response, 'Student Delta')
+        self.assertEqual(response.context['formset'].total_form_count(), 4)
+
+    def test_json_endpoint(self):
+
+        url = reverse('course_grades_json', args=[self.math.pk])
+        response = self.client.post(
+            url, json.dumps({'grades': {str(self.enrollments[2].pk): 'C', str(self.enrollments[3].pk): None}}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.json(), {'updated': [self.enrollments[2].pk]})
+        rows = self.client.get(url).json()['enrollments']
+        self.assertEqual([row['grade'] for row in rows], [None, None, 'C', None])
+        self.assertEqual(Student.objects.get(pk=self.students[2].pk).in_progress_count, 0)
+
+    def test_json_endpoint_rejects_the_whole_batch(self):
+
+        url = reverse('course_grades_json', args=[self.math.pk])
+
+        for grades in ({str(self.enrollments[0].pk): 'Z'}, {str(self.enrollments[0].pk): 'A', str(self.other.pk): 'A'}):
+            response = self.client.post(url, json.dumps({'grades': grades}), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(Enrollment.objects.filter(course=self.math, grade__isnull=False).exists())
+        self.assertEqual(Enrollment.objects.get(pk=self.other.pk).grade, 'B')
+
+    def test_json_endpoint_rejects_non_string_grades(self):
+
+        url = reverse('course_grades_json', args=[self.math.pk])
+
+        for grade in (['A'], {'grade': 'A'}, 5, []):
+            response = self.client.post(
+                url, json.dumps({'grades': {str(self.enrollments[0].pk): grade}}), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json()['errors'], [f'Invalid grade {json.dumps(grade)} for enrollment {self.enrollments[0].pk}.']
+            )
+
+
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.students = [
+            Student.objects.create(name=f'{first} Smith', email=f'{first.lower()}@example.com')
+            for first in ('Alice', 'Bob', 'Carol', 'Dave', 'Erin')
+        ]
+        cls.other = Student.objects.create(name='Zed Jones', email='zed@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        Enrollment.objects.create(student=cls.students[1], course=cls.math)
+
+    def test_pages_of_prefix_matches_in_name_order(self):
+
+        first = autocomplete('students', 'smi', per_page=3)
+        second = autocomplete('students', 'smi', cursor=first['next'], per_page=3)
+
+        self.assertEqual([row['text'] for row in first['results']][0], 'Alice Smith (alice@example.com)')
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [student.pk for student in self.students]
+        )
+        self.assertIsNone(second['next'])
+        self.assertEqual(autocomplete('students', 'jo')['results'], [{'id': self.other.pk, 'text': 'Zed Jones (zed@example.com)'}])
+
+    def test_endpoint(self):
+
+        response = self.client.get(reverse('autocomplete', args=['courses']), {'q': 'math'})
+
+        self.assertEqual(response.json(), {'results': [{'id': self.math.pk, 'text': 'Mathematics (4 credits)'}], 'next': None})
+        self.assertEqual(self.client.get(reverse('autocomplete', args=['grades'])).status_code, 404)
+
+        response = self.client.get(reverse('autocomplete', args=['students']), {'cursor': encode_cursor(['a', 'x'], 'next')})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor.'})
+
+    def test_enrollment_form_renders_only_the_selection(self):
+
+        html = str(EnrollmentForm(initial={'student': self.other.pk})['student'])
+
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn('Zed Jones', html)
+        self.assertIn(f'data-autocomplete="{reverse("autocomplete", args=["students"])}"', html)
+
+        form = EnrollmentForm({'student': self.other.pk, 'course': self.math.pk})
+        self.assertTrue(form.is_valid())
+
+    def test_filter_bar_renders_only_the_selection(self):
+
+        response = self.client.get(reverse('enrollment_list'), {'student': self.students[1].pk})
+
+        self.assertEqual(response.context['selected_student'], self.students[1])
+        self.assertNotContains(response, 'Erin Smith')
+        self.assertContains(response, f'<option value="{self.students[1].pk}" selected>Bob Smith</option>', html=True)
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.carol = Student.objects.create(name='Carol White', email='carol@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        cls.enrollment = Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+        Enrollment.objects.create(student=cls.alice, course=cls.physics)
+        Enrollment.objects.create(student=cls.bob, course=cls.physics, grade='B')
+
+    def test_list_with_fields_and_cursor(self):
+
+        url = reverse('api_list', args=['students'])
+        first = self.client.get(url, {'fields': 'id,name', 'limit': 2}).json()
+        second = self.client.get(url, {'fields': 'id,name', 'limit': 2, 'cursor': first['next']}).json()
+
+        self.assertEqual(first['results'], [{'id': self.alice.pk, 'name': 'Alice Smith'}, {'id': self.bob.pk, 'name': 'Bob Jones'}])
+        self.assertEqual(second['results'], [{'id': self.carol.pk, 'name': 'Carol White'}])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(url, {'fields': 'id,password'}).status_code, 400)
+
+    def test_enrollment_filters(self):
+
+        rows = self.client.get(reverse('api_list', args=['enrollments']), {'course': self.physics.pk}).json()['results']
+
+        self.assertEqual([row['student_name'] for row in rows], ['Alice Smith', 'Bob Jones'])
+        self.assertEqual(rows[1]['grade'], 'B')
+
+        response = self.client.get(reverse('api_list', args=['enrollments']), {'student': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid student id "abc".'})
+
+    def test_invalid_cursor(self):
+
+        url = reverse('api_list', args=['students'])
+
+        for values in (['abc'], [{'pk': 1}], [1, 2]):
+            response = self.client.get(url, {'cursor': encode_cursor(values, 'next')})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor.'})
+
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+    def test_detail_etag(self):
+
+        url = reverse('api_detail', args=['students', self.alice.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        self.assertEqual(response.json()['gpa'], '4.00')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # Standing is written without touching updated_at but still changes the ETag.
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(grade='C')
+        recompute_all_standing()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_detail', args=['courses', 999])).status_code, 404)
+
+    def test_list_etag_covers_the_page(self):
+
+        url = reverse('api_list', args=['courses'])
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Course.objects.create(title='Chemistry', credits=3)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_transcript(self):
+
+        url = reverse('api_transcript', args=[self.alice.pk])
+        response = self.client.get(url)
+        transcript = response.json()
+
+        self.assertEqual(transcript['gpa'], '4.00')
+        self.assertEqual([course['title'] for course in transcript['courses']], ['Mathematics', 'Physics'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.physics.title = 'Applied Physics'
+        self.physics.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A')
+
+    def setUp(self):
+
+        cache.clear()
+
+    async def test_read_views_under_asgi(self):
+
+        for url in (
+            reverse('home'),
+            reverse('reports_overview'),
+            reverse('student_detail', args=[self.alice.pk]),
+            reverse('course_detail', args=[self.math.pk]),
+            reverse('student_transcript', args=[self.alice.pk]),
+        ):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+        response = await self.async_client.get(reverse('student_transcript', args=[self.alice.pk]))
+        self.assertEqual(response.context['gpa'], Decimal('4.00'))
+        self.assertEqual([e.course.title for e in response.context['enrollments']], ['Mathematics'])
+
+        response = await self.async_client.get(reverse('student_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_stats_match_sync(self):
+
+        stats = await aget_dashboard_stats()
+
+        self.assertEqual(stats['graded'], 1)
+        self.assertEqual(stats['top_students'][0]['name'], 'Alice Smith')
+        cache.clear()
+        self.assertEqual(stats, await sync_to_async(get_dashboard_stats)())
+
+
+class RequestMetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.enrollment = Enrollment.objects.create(student=cls.alice, course=cls.math)
+
+    def setUp(self):
+
+        cache.clear()
+        registry.reset()
+
+    def test_metrics_are_recorded_per_view(self):
+
+        self.client.get(reverse('student_transcript', args=[self.alice.pk]))
+        self.client.get(reverse('student_transcript', args=[self.alice.pk]))
+
+        totals = registry.snapshot()['student_transcript']
+        self.assertEqual(totals['requests_total'], 2)
+        self.assertEqual(totals['db_queries_total'], 5)
+        self.assertGreater(totals['template_seconds_total'], 0)
+        self.assertGreater(totals['response_bytes_total'], 0)
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE sms_db_queries_total counter', body)
+        self.assertIn('sms_requests_total{view="student_transcript"} 2', body)
+
+    @override_settings(QUERY_BUDGETS={'enrollment_delete': 2})
+    def test_budgets(self):
+
+        url = reverse('enrollment_delete', args=[self.enrollment.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with self.settings(QUERY_BUDGETS={'enrollment_delete': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+
+            with self.settings(QUERY_BUDGET_RAISE=False), self.assertLogs('management.metrics', 'WARNING'):
+                self.client.get(url)
+
+        self.assertEqual(registry.snapshot()['enrollment_delete']['query_budget_exceeded_total'], 2)
+
+class SyntheticDataTests(TestCase):
+
+    def test_generate_dataset(self):
+
+        written = generate_dataset(30, 5, 100, seed=3, batch_size=7)
+
+        self.assertEqual(written, {'students': 30, 'courses': 5, 'enrollments': 100})
+        self.assertEqual(Enrollment.objects.count(), 100)
+        self.assertFalse(enrollment_count_drift(Student).exists())
+        self.assertFalse(enrollment_count_drift(Course).exists())
+        self.assertEqual(
+            Enrollment.objects.values('student', 'course').distinct().count(), 100
+        )
+        self.assertTrue(Student.objects.filter(gpa__isnull=False).exists())
+
+        first = list(Enrollment.objects.order_by('pk').values_list('student__email', 'course__title', 'grade'))
+        Enrollment.objects.all().delete()
+        Student.objects.all().delete()
+        Course.objects.all().delete()
+        generate_dataset(30, 5, 100, seed=3)
+        second = list(Enrollment.objects.order_by('pk').values_list('student__email', 'course__title', 'grade'))
+        self.assertEqual(first, second)
+
+    def test_enrollments_are_capped_by_pairs(self):
+
+        written = generate_dataset(4, 3, 50)
+        self.assertEqual(written['enrollments'], 12)
+
+    def test_benchmark_and_compare(self):
+
+        generate_dataset(10, 3, 20)
+
+        with self.settings(ALLOWED_HOSTS=['testserver']):
+            urls = run_benchmark(repeat=2, names=['student_list', 'api_detail'])
+
+        self.assertEqual(set(urls), {'student_list', 'api_detail'})
+        self.assertEqual({row['status'] for row in urls.values()}, {200})
+
+        baseline = {'small': {'urls': {'student_list': {'p50_ms': 10.0, 'queries': 3}}}}
+        self.assertEqual(compare({'small': {'urls': {'student_list': {'p50_ms': 10.5, 'queries': 3}}}}, baseline), [])
+        self.assertEqual(len(compare({'small': {'urls': {'student_list': {'p50_ms': 30.0, 'queries': 4}}}}, baseline)), 2)
+
+class TranscriptCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        cls.enrollment = Enrollment.objects.create(student=cls.alice, course=cls.math, grade='B')
+        Enrollment.objects.create(student=cls.bob, course=cls.physics)
+
+    def setUp(self):
+
+        cache.clear()
+        self.url = reverse('student_transcript', args=[self.alice.pk])
+
+    def test_served_from_cache_and_revalidated(self):
+
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertIn('Last-Modified', response)
+        self.assertIsNotNone(cache.get(TRANSCRIPT_CACHE_KEY % self.alice.pk))
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_signals_drop_only_the_affected_students(self):
+
+        self.client.get(self.url)
+        self.client.get(reverse('student_transcript', args=[self.bob.pk]))
+
+        self.enrollment.grade = 'A'
+        self.enrollment.save()
+        self.assertIsNone(cache.get(TRANSCRIPT_CACHE_KEY % self.alice.pk))
+        self.assertIsNotNone(cache.get(TRANSCRIPT_CACHE_KEY % self.bob.pk))
+
+        self.client.get(self.url)
+        self.physics.title = 'Quantum Physics'
+        self.physics.save()
+        self.assertIsNotNone(cache.get(TRANSCRIPT_CACHE_KEY % self.alice.pk))
+        self.assertIsNone(cache.get(TRANSCRIPT_CACHE_KEY % self.bob.pk))
+
+    def test_version_changes_without_signals(self):
+
+        first = self.client.get(self.url)
+
+        apply_grades(self.math, {self.enrollment.pk: 'C'})
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.context['gpa'], Decimal('2.00'))
+
+        # Deleting the last enrollment can leave every updated_at unchanged.
+        Enrollment.objects.filter(pk=self.enrollment.pk).delete()
+        self.client.get(self.url)
+        Enrollment.objects.filter(student=self.alice)._raw_delete(connection.alias)
+        call_command('rebuild_enrollment_counts', stdout=StringIO())
+        third = self.client.get(self.url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.context['enrollments'], [])
+
+    def test_missing_student(self):
+
+        self.assertEqual(self.client.get(reverse('student_transcript', args=[0])).status_code, 404)
+
+class TranscriptFileTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.students = [
+            Student.objects.create(name=f'Student {name}', email=f'{name}@example.com') for name in 'abcde'
+        ]
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        for student in cls.students[:3]:
+            Enrollment.objects.create(student=student, course=cls.math, grade='A')
+            Enrollment.objects.create(student=student, course=cls.physics)
+
+    def setUp(self):
+
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def read(self, path):
+
+        with open(os.path.join(self.output_dir, path), encoding='utf-8') as handle:
+            return handle.read()
+
+    def test_renders_every_student(self):
+
+        written = generate_transcripts(self.output_dir, workers=1, chunk_size=2, with_json=True)
+        self.assertEqual(written, 5)
+
+        manifest = json.loads(self.read('manifest.json'))
+        self.assertEqual(manifest['count'], 5)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, PARTS_DIR)))
+
+        alice = self.students[0]
+        entry = manifest['students'][str(alice.pk)]
+        self.assertIn('Official Transcript', self.read(entry['html']))
+        transcript = json.loads(self.read(entry['json']))
+        self.assertEqual([course['title'] for course in transcript['courses']], ['Mathematics', 'Physics'])
+        self.assertEqual(transcript['gpa'], '4.00')
+
+    def test_chunk_reads_students_and_enrollments_once(self):
+
+        os.makedirs(os.path.join(self.output_dir, 'html'))
+        os.makedirs(os.path.join(self.output_dir, PARTS_DIR))
+
+        # The students, their open and their archived enrollments.
+        with self.assertNumQueries(3):
+            self.assertEqual(render_chunk(self.output_dir, [student.pk for student in self.students]), 5)
+
+    def test_resumes_after_interruption(self):
+
+        os.makedirs(os.path.join(self.output_dir, 'html'))
+        os.makedirs(os.path.join(self.output_dir, PARTS_DIR))
+        render_chunk(self.output_dir, [self.students[0].pk, self.students[1].pk])
+
+        self.assertEqual(generate_transcripts(self.output_dir, workers=1), 3)
+        self.assertEqual(json.loads(self.read('manifest.json'))['count'], 5)
+
+        self.assertEqual(generate_transcripts(self.output_dir, workers=1), 0)
+        self.assertEqual(generate_transcripts(self.output_dir, workers=1, restart=True), 5)
+
+class FragmentCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.enrollment = Enrollment.objects.create(student=cls.alice, course=cls.math)
+
+    def setUp(self):
+
+        caches['template_fragments'].clear()
+
+    def test_rows_rerender_only_when_updated(self):
+
+        url = reverse('student_list')
+        self.assertContains(self.client.get(url), 'Alice Smith')
+
+        # update() skips auto_now, so the cached row is still served ...
+        Student.objects.filter(pk=self.alice.pk).update(name='Alice Jones')
+        self.assertContains(self.client.get(url), 'Alice Smith')
+
+        # ... while save() bumps updated_at and with it the fragment key.
+        self.alice.refresh_from_db()
+        self.alice.save()
+        self.assertContains(self.client.get(url), 'Alice Jones')
+
+    def test_related_rows_follow_their_parents(self):
+
+        self.assertContains(self.client.get(reverse('enrollment_list')), 'Mathematics')
+        self.assertContains(self.client.get(reverse('course_list')), '<span class="badge bg-primary">1</span>', html=True)
+
+        self.math.refresh_from_db()
+        self.math.title = 'Algebra'
+        self.math.save()
+        Enrollment.objects.create(student=Student.objects.create(name='Bob Jones', email='bob@example.com'), course=self.math)
+
+        response = self.client.get(reverse('enrollment_list'))
+        self.assertContains(response, 'Algebra', count=2)
+        self.assertNotContains(response, 'Mathematics')
+        self.assertContains(self.client.get(reverse('course_list')), '<span class="badge bg-primary">2</span>', html=True)
+
+class RegistrationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.students = [
+            Student.objects.create(name=f'Student {name}', email=f'{name}@example.com') for name in 'abcd'
+        ]
+        cls.course = Course.objects.create(title='Seminar', credits=2, capacity=2)
+
+    def enrolled(self):
+
+        self.course.refresh_from_db()
+        return self.course.enrollment_count, Enrollment.objects.filter(course=self.course).count()
+
+    def test_capacity_and_duplicates(self):
+
+        a, b, c, _ = self.students
+        register(a.pk, self.course.pk)
+        with self.assertRaisesMessage(ValidationError, 'already enrolled'):
+            register(a.pk, self.course.pk)
+        self.assertEqual(self.enrolled(), (1, 1))
+
+        register(b.pk, self.course.pk, grade='A')
+        with self.assertRaisesMessage(ValidationError, 'full'):
+            register(c.pk, self.course.pk)
+        self.assertEqual(self.enrolled(), (2, 2))
+        b.refresh_from_db()
+        self.assertEqual((b.enrollment_count, b.gpa), (1, Decimal('4.00')))
+        self.assertFalse(enrollment_count_drift(Course).exists())
+
+    def test_waitlist_is_promoted_in_order(self):
+
+        a, b, c, d = self.students
+        first = register(a.pk, self.course.pk)
+        register(b.pk, self.course.pk)
+        self.assertIsInstance(register(c.pk, self.course.pk, waitlist=True), WaitlistEntry)
+        register(d.pk, self.course.pk, waitlist=True)
+
+        first.delete()
+        self.assertTrue(Enrollment.objects.filter(student=c, course=self.course).exists())
+        self.assertEqual(list(WaitlistEntry.objects.values_list('student', flat=True)), [d.pk])
+        self.assertEqual(self.enrolled(), (2, 2))
+
+        self.course.refresh_from_db()
+        self.course.capacity = 5
+        self.course.save()
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertEqual(self.enrolled(), (3, 3))
+        self.assertEqual(promote_waitlist(self.course.pk), [])
+
+    def test_course_delete_does_not_promote(self):
+
+        register(self.students[0].pk, self.course.pk)
+        register(self.students[1].pk, self.course.pk)
+        register(self.students[2].pk, self.course.pk, waitlist=True)
+
+        self.course.delete()
+        self.assertFalse(Enrollment.objects.exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_stale_save_keeps_counter(self):
+
+        stale = Course.objects.get(pk=self.course.pk)
+        register(self.students[0].pk, self.course.pk)
+        stale.title = 'Advanced Seminar'
+        stale.save()
+        self.assertEqual(self.enrolled(), (1, 1))
+
+    def test_create_view(self):
+
+        url = reverse('enrollment_create')
+        for student in self.students[:3]:
+            response = self.client.post(url, {'student': student.pk, 'course': self.course.pk, 'join_waitlist': 'on'})
+            self.assertRedirects(response, reverse('enrollment_list'))
+
+        self.assertEqual(self.enrolled(), (2, 2))
+        self.assertTrue(WaitlistEntry.objects.filter(student=self.students[2]).exists())
+
+        response = self.client.post(url, {'student': self.students[3].pk, 'course': self.course.pk}, follow=True)
+        self.assertContains(response, 'The course is full.')
+        self.assertEqual(self.enrolled(), (2, 2))
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class RegistrationStressTests(TransactionTestCase):
+
+    def test_no_overbooking_under_contention(self):
+
+        course = Course.objects.create(title='Popular', credits=3, capacity=25)
+        students = [Student.objects.create(name='Student', email=f'student{i}@example.com') for i in range(200)]
+
+        outcomes, problems = registration_stress(course.pk, [student.pk for student in students], 50, waitlist=True)
+
+        self.assertEqual(problems, [])
+        self.assertEqual((outcomes['enrolled'], outcomes['waitlisted'], outcomes['error']), (25, 175, 0))
+
+class DeletionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.students = [
+            Student.objects.create(name=f'Student {name}', email=f'{name}@example.com') for name in 'abcde'
+        ]
+        cls.math = Course.objects.create(title='Mathematics', credits=4)
+        cls.physics = Course.objects.create(title='Physics', credits=3, capacity=4)
+        for student in cls.students:
+            Enrollment.objects.create(student=student, course=cls.math, grade='A')
+        for student in cls.students[:4]:
+            Enrollment.objects.create(student=student, course=cls.physics, grade='C')
+        WaitlistEntry.objects.create(student=cls.students[4], course=cls.physics)
+
+    def assertNoDrift(self):
+
+        self.assertFalse(enrollment_count_drift(Student).exists())
+        self.assertFalse(enrollment_count_drift(Course).exists())
+
+    def test_delete_course_in_batches(self):
+
+        batches = []
+        self.physics.refresh_from_db()
+        deleted = delete_with_enrollments(self.physics, batch_size=3, progress=lambda done, total: batches.append((done, total)))
+
+        self.assertEqual(deleted, 4)
+        self.assertEqual(batches, [(3, 4), (4, 4)])
+        self.assertFalse(Course.objects.filter(pk=self.physics.pk).exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertNoDrift()
+
+        student = Student.objects.get(pk=self.students[0].pk)
+        self.assertEqual((student.gpa, student.credits_attempted), (Decimal('4.00'), 4))
+
+    def test_delete_student_frees_seats(self):
+
+        deleted = delete_with_enrollments(self.students[0], batch_size=1)
+
+        self.assertEqual(deleted, 2)
+        self.assertFalse(Student.objects.filter(pk=self.students[0].pk).exists())
+        # The freed Physics seat went to the waitlisted student.
+        self.assertTrue(Enrollment.objects.filter(student=self.students[4], course=self.physics).exists())
+        self.assertNoDrift()
+
+    def test_confirm_pages_use_stored_counts(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('course_delete', args=[self.math.pk]))
+        self.assertContains(response, 'This course has 5 active enrollment(s)')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student_delete', args=[self.students[0].pk]))
+        self.assertContains(response, '2 courses')
+
+        response = self.client.post(reverse('course_delete', args=[self.math.pk]))
+        self.assertRedirects(response, reverse('course_list'))
+        self.assertFalse(Enrollment.objects.filter(course_id=self.math.pk).exists())
+        self.assertNoDrift()
+
+    def test_command(self):
+
+        out = StringIO()
+        call_command('delete_records', 'course', str(self.math.pk), '--batch-size', '2', stdout=out, stderr=StringIO())
+
+        self.assertIn('and 5 enrollments', out.getvalue())
+        self.assertNoDrift()
+
+        with self.assertRaisesMessage(CommandError, 'No student with id 0'):
+            call_command('delete_records', 'student', '0')
+
+class JobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.course = Course.objects.create(title='Mathematics', credits=4)
+        cls.students = [
+            Student.objects.create(name=f'Student {name}', email=f'{name}@example.com') for name in 'abc'
+        ]
+        cls.enrollments = [Enrollment.objects.create(student=student, course=cls.course) for student in cls.students]
+
+    def test_claim_and_run(self):
+
+        job = enqueue('rebuild_enrollment_counts')
+
+        claimed = claim('test-worker', limit=5)
+        self.assertEqual([(j.pk, j.status, j.attempts) for j in claimed], [(job.pk, Job.RUNNING, 1)])
+        # Nothing left for a second worker.
+        self.assertEqual(claim('other-worker'), [])
+
+        self.assertEqual(run_job(job.pk, 1), Job.SUCCEEDED)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'students': 3, 'courses': 1})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retries_then_fails(self):
+
+        with tempfile.NamedTemporaryFile() as handle:
+            # A file where the output directory should be: fails every attempt.
+            job = enqueue('generate_transcripts', {'output_dir': handle.name}, max_attempts=2)
+
+            claim('test-worker')
+            self.assertEqual(run_job(job.pk, 1), Job.QUEUED)
+            job.refresh_from_db()
+            self.assertIn('Error', job.error)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertEqual(claim('test-worker'), [])
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            claim('test-worker')
+            self.assertEqual(run_job(job.pk, 2), Job.FAILED)
+
+    def test_permanent_errors_fail_at_once(self):
+
+        job = enqueue('delete_records', {'kind': 'course', 'pk': 0})
+
+        claim('test-worker')
+        self.assertEqual(run_job(job.pk, 1), Job.FAILED)
+        self.assertIn('DoesNotExist', Job.objects.get(pk=job.pk).error)
+
+        with self.assertRaises(ValueError):
+            enqueue('no_such_task')
+
+    def test_timed_out_process_attempt_is_retried_and_ignored(self):
+
+        job = enqueue('recompute_standing', timeout=60)
+        claim('test-worker', interruptible=True)
+        Job.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(expire_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('Timed out after 60s on test-worker', job.error)
+
+        # The abandoned attempt finishing late changes nothing.
+        self.assertEqual(run_job(job.pk, 1), Job.QUEUED)
+
+    def test_timed_out_thread_attempt_is_not_retried(self):
+
+        job = enqueue('import_csv', {'kind': 'students', 'content': 'name,email\n'}, timeout=60)
+        claim('test-worker')
+        Job.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(expire_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIn('not retried', job.error)
+        self.assertEqual(claim('test-worker'), [])
+        self.assertEqual(run_job(job.pk, 1), Job.FAILED)
+
+    def test_views_queue_heavy_work(self):
+
+        upload = SimpleUploadedFile('students.csv', b'name,email\nJane Doe,jane@example.com\n')
+        response = self.client.post(
+            reverse('import_upload'), {'kind': 'students', 'file': upload, 'background': 'on'}
+        )
+        job = Job.objects.get(task='import_csv')
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertFalse(Student.objects.filter(email='jane@example.com').exists())
+
+        with override_settings(JOB_DELETE_THRESHOLD=2):
+            response = self.client.post(reverse('course_delete', args=[self.course.pk]))
+        job = Job.objects.get(task='delete_records')
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]))
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+
+        response = self.client.post(
+            reverse('course_grades_json', args=[self.course.pk]),
+            json.dumps({'grades': {self.enrollments[0].pk: 'A'}, 'background': True}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get(pk=response.json()['job']).arguments['course_id'], self.course.pk)
+
+        response = self.client.get(reverse('job_list'), {'status': 'queued'})
+        self.assertContains(response, 'import_csv #')
+        self.assertContains(response, 'apply_grades #')
+
+        response = self.client.get(reverse('job_detail', args=[Job.objects.get(task='import_csv').pk]))
+        self.assertContains(response, 'Queued')
+        self.assertContains(response, 'http-equiv="refresh"')
+
+class JobWorkerTests(TransactionTestCase):
+
+    def test_runworker_burst(self):
+
+        course = Course.objects.create(title='Mathematics', credits=4)
+        student = Student.objects.create(name='Student A', email='a@example.com')
+        enrollment = Enrollment.objects.create(student=student, course=course)
+
+        enqueue('import_csv', {'kind': 'students', 'content': 'name,email\nJane Doe,jane@example.com\n'})
+        enqueue('apply_grades', {'course_id': course.pk, 'grades': {str(enrollment.pk): 'B'}})
+        enqueue('delete_records', {'kind': 'student', 'pk': 0})
+
+        # One job thread: the in-memory SQLite test database locks whole tables
+        # between connections.
+        out = StringIO()
+        call_command('runworker', '--burst', '--concurrency', '1', '--poll-interval', '0.05', stdout=out)
+
+        self.assertIn('Worker stopped after 3 attempts.', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), 2)
+        self.assertEqual(Job.objects.get(task='delete_records').status, Job.FAILED)
+        self.assertTrue(Student.objects.filter(email='jane@example.com').exists())
+        self.assertEqual(Student.objects.get(pk=student.pk).gpa, Decimal('3.00'))
+
+
+class TermTests(TestCase):
+
+    def test_term_codes(self):
+
+        self.assertEqual(term_for(date(2026, 5, 31)), '2026-1')
+        self.assertEqual(term_for(date(2026, 6, 1)), '2026-2')
+        self.assertEqual(term_for(date(2026, 12, 31)), '2026-3')
+        self.assertEqual(term_label('2026-3'), 'Fall 2026')
+        self.assertEqual(previous_term('2026-1'), '2025-3')
+        self.assertEqual(recent_terms(3, '2026-1'), ['2026-1', '2025-3', '2025-2'])
+
+    @override_settings(CURRENT_TERM='2026-3')
+    def test_enrollment_list_defaults_to_current_term(self):
+
+        student = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        Enrollment.objects.create(student=student, course=Course.objects.create(title='Mathematics', credits=4))
+        Enrollment.objects.create(
+            student=student, course=Course.objects.create(title='Physics', credits=3), term='2026-1'
+        )
+
+        response = self.client.get(reverse('enrollment_list'))
+        self.assertContains(response, 'Fall 2026')
+        self.assertNotContains(response, 'Physics')
+        self.assertContains(response, 'term=2026-3')
+
+        self.assertContains(self.client.get(reverse('enrollment_list'), {'term': 'all'}), 'Physics')
+        response = self.client.get(reverse('enrollment_list'), {'term': '2026-1'})
+        self.assertContains(response, 'Physics')
+        self.assertNotContains(response, 'Mathematics')
+
+@override_settings(CURRENT_TERM='2026-3')
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.alice = Student.objects.create(name='Alice Smith', email='alice@example.com')
+        cls.bob = Student.objects.create(name='Bob Jones', email='bob@example.com')
+        cls.carol = Student.objects.create(name='Carol White', email='carol@example.com')
+        cls.math = Course.objects.create(title='Mathematics', credits=4, capacity=2)
+        cls.physics = Course.objects.create(title='Physics', credits=3)
+        cls.old = [
+            Enrollment.objects.create(student=cls.alice, course=cls.math, grade='A', term='2026-1'),
+            Enrollment.objects.create(student=cls.bob, course=cls.math, grade='C', term='2026-1'),
+        ]
+        Enrollment.objects.create(student=cls.alice, course=cls.physics, grade='B')
+        WaitlistEntry.objects.create(student=cls.carol, course=cls.math)
+
+    def assertNoDrift(self):
+
+        self.assertFalse(enrollment_count_drift(Student).exists())
+        self.assertFalse(enrollment_count_drift(Course).exists())
+
+    def test_archive_moves_closed_terms(self):
+
+        self.assertEqual(archive_closed_terms(batch_size=1), {'2026-1': 2})
+
+        self.assertEqual(
+            sorted(ArchivedEnrollment.objects.values_list('pk', flat=True)), [enrollment.pk for enrollment in self.old]
+        )
+        self.assertFalse(Enrollment.objects.filter(term='2026-1').exists())
+        self.assertNoDrift()
+        # The freed seats went to the waitlisted student.
+        self.assertTrue(Enrollment.objects.filter(student=self.carol, course=self.math, term='2026-3').exists())
+
+        # Closed terms still count towards standing and show on the transcript.
+        recompute_all_standing()
+        alice = Student.objects.get(pk=self.alice.pk)
+        self.assertEqual((alice.gpa, alice.credits_attempted, alice.enrollment_count), (Decimal('3.57'), 7, 1))
+
+        response = self.client.get(reverse('student_transcript', args=[self.alice.pk]))
+        self.assertContains(response, 'Spring 2026')
+        self.assertEqual(response.context['total_courses'], 2)
+
+        courses = self.client.get(reverse('api_transcript', args=[self.alice.pk])).json()['courses']
+        self.assertEqual([(course['title'], course['term']) for course in courses], [('Mathematics', '2026-1'), ('Physics', '2026-3')])
+
+    def test_totals_and_cohort_analytics_include_archived_terms(self):
+
+        summary = enrollment_summary()
+        ranks = {row['pk']: row['gpa'] for row in top_students(compute_cohort_analytics())}
+
+        archive_closed_terms()
+
+        # Carol was promoted into one of the freed Mathematics seats.
+        self.assertEqual(enrollment_summary()['total_enrollments'], summary['total_enrollments'] + 1)
+        self.assertEqual(enrollment_summary()['grade_stats'], summary['grade_stats'])
+        self.assertEqual({row['pk']: row['gpa'] for row in top_students(compute_cohort_analytics())}, ranks)
+
+    def test_no_retakes_of_archived_courses(self):
+
+        archive_closed_terms()
+        message = 'The student already took this course in Spring 2026.'
+
+        with self.assertRaisesMessage(ValidationError, message):
+            register(self.bob.pk, self.math.pk, waitlist=True)
+
+        form = EnrollmentForm({'student': self.bob.pk, 'course': self.math.pk})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [message])
+
+        result = import_csv('enrollments', StringIO('student_email,course_title,grade\nbob@example.com,Mathematics,\n'))
+        self.assertEqual(result.written, 0)
+        self.assertEqual(result.errors, [(2, 'The student already took this course in an archived term.')])
+        self.assertFalse(Enrollment.objects.filter(student=self.bob, course=self.math).exists())
+
+    def test_archived_enrollments_follow_course_changes(self):
+
+        archive_closed_terms()
+
+        self.math.credits = 1
+        self.math.save()
+        self.assertEqual(Student.objects.get(pk=self.alice.pk).gpa, Decimal('3.25'))
+
+        self.math.refresh_from_db()
+        self.assertEqual(delete_with_enrollments(self.math, batch_size=1), 3)
+        self.assertFalse(ArchivedEnrollment.objects.exists())
+        self.assertEqual(Student.objects.get(pk=self.alice.pk).gpa, Decimal('3.00'))
+        self.assertNoDrift()
+
+    def test_command(self):
+
+        out = StringIO()
+        call_command('archive_terms', '--dry-run', stdout=out)
+        self.assertIn('Spring 2026: 2 enrollments would be archived.', out.getvalue())
+        self.assertFalse(ArchivedEnrollment.objects.exists())
+
+        with self.assertRaisesMessage(CommandError, 'Only terms before the current term'):
+            call_command('archive_terms', '--before', '2027-1')
+
+        out = StringIO()
+        call_command('archive_terms', '--batch-size', '1', stdout=out, stderr=StringIO())
+        self.assertIn('Archived 2 enrollments of Spring 2026', out.getvalue())
+
+        out = StringIO()
+        call_command('archive_terms', stdout=out)
+        self.assertIn('No closed terms to archive.', out.getvalue())
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+
+    def test_writes_go_to_the_primary(self):
+
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Student), 'default')
+        self.assertFalse(router.allow_migrate('replica1', 'management'))
+        self.assertIsNone(router.allow_migrate('default', 'management'))
+
+        # Reads inside a transaction on the primary stay there.
+        with replica_reads():
+            self.assertEqual(read_database(), 'default')
+
+    def test_write_pins_session_to_primary(self):
+
+        response = self.client.get(reverse('student_list'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse('student_create'), {'name': 'Alice Smith', 'email': 'alice@example.com'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    @override_settings(SESSION_SAVE_EVERY_REQUEST=True)
+    def test_session_save_does_not_pin(self):
+
+        session = self.client.session
+        session['seen'] = True
+        session.save()
+
+        response = self.client.get(reverse('enrollment_create'))
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_without_replicas(self):
+
+        response = self.client.post(reverse('student_create'), {'name': 'Alice Smith', 'email': 'alice@example.com'})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Set DB_REPLICAS to test against replica aliases.')
+class ReplicaRoutingTests(TransactionTestCase):
+
+    databases = '__all__'
+
+    def test_read_only_views_read_from_a_replica(self):
+
+        student = Student.objects.create(name='Alice Smith', email='alice@example.com')
+
+        with CaptureQueriesContext(connection) as primary_queries:
+            self.assertContains(self.client.get(reverse('student_detail', args=[student.pk])), 'Alice Smith')
+        self.assertFalse(primary_queries.captured_queries)
+
+        self.client.post(reverse('student_edit', args=[student.pk]), {'name': 'Alice Jones', 'email': 'alice@example.com'})
+        with CaptureQueriesContext(connection) as primary_queries:
+            self.assertContains(self.client.get(reverse('student_detail', args=[student.pk])), 'Alice Jones')
+        self.assertTrue(primary_queries.captured_queries)
+
+        with replica_reads():
+            self.assertIn(read_database(), settings.DATABASE_REPLICAS)
+            with primary_reads():
+                self.assertEqual(read_database(), 'default')
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.template.loader import render_to_string
+from .models import Student, Enrollment, ArchivedEnrollment
+from .transcripts import enrollment_history, transcript_context
+
+# Static transcripts for every student, e.g. at the end of term. Students
+# are split into chunks in primary-key order; each chunk is rendered
+# by a worker process with its own database connection, reading the chunk's
+# students, enrollments and archived enrollments with one query each and writing
+# reports/student_transcript.html (and optionally compact JSON) per student.
+#
+# A worker records a finished chunk in parts/ as its last step, so an
+# interrupted run resumes with only the students not recorded there. When
+# everything is written, the parts are merged into manifest.json.
+
+CHUNK_SIZE = 500
+MANIFEST = 'manifest.json'
+PARTS_DIR = 'parts'
+
+
+def _write(path, content):
+    """Write through a temporary file so an interrupted run never leaves half a file."""
+
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        handle.write(content)
+    os.replace(temporary, path)
+
+def _transcript_json(student, enrollments):
+
+    return json.dumps({
+        'id': student.pk,
+        'name': student.name,
+        'email': student.email,
+        'enrollment_count': student.enrollment_count,
+        'gpa': student.gpa,
+        'credits_attempted': student.credits_attempted,
+        'credits_earned': student.credits_earned,
+        'in_progress_count': student.in_progress_count,
+        'courses': [
+            {
+                'enrollment_id': enrollment.pk,
+                'course_id': enrollment.course_id,
+                'title': enrollment.course.title,
+                'credits': enrollment.course.credits,
+                'grade': enrollment.grade,
+                'term': enrollment.term,
+            }
+            for enrollment in enrollments
+        ],
+    }, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+def render_chunk(output_dir, student_ids, with_json=False):
+    """
+    Write the transcripts of the students with primary keys ``student_ids``
+    and record them in a part file. Returns the number of students written.
+    """
+
+    students = Student.objects.filter(pk__in=student_ids).order_by('pk')
+    by_student = {}
+    for model in (Enrollment, ArchivedEnrollment):
+        enrollments = model.objects.filter(student_id__in=student_ids).select_related('course').order_by('student_id')
+        by_student[model] = {
+            pk: list(rows) for pk, rows in groupby(enrollments, key=lambda enrollment: enrollment.student_id)
+        }
+
+    entries = {}
+    for student in students:
+        rows = enrollment_history(
+            by_student[Enrollment].get(student.pk, []), by_student[ArchivedEnrollment].get(student.pk, [])
+        )
+        entry = {'name': student.name, 'html': f'html/{student.pk}.html'}
+        _write(
+            os.path.join(output_dir, entry['html']),
+            render_to_string('reports/student_transcript.html', transcript_context(student, rows))
+        )
+        if with_json:
+            entry['json'] = f'json/{student.pk}.json'
+            _write(os.path.join(output_dir, entry['json']), _transcript_json(student, rows))
+        entries[student.pk] = entry
+
+    _write(os.path.join(output_dir, PARTS_DIR, f'{student_ids[0]}-{student_ids[-1]}.json'), json.dumps(entries))
+
+    return len(entries)
+
+def _init_worker():
+
+    # Needed under the "spawn" start method; a no-op once apps are loaded.
+    import django
+    django.setup()
+
+def _completed(output_dir):
+
+    done = {}
+
+    manifest = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(manifest):
+        with open(manifest, encoding='utf-8') as handle:
+            done.update(json.load(handle)['students'])
+
+    parts = os.path.join(output_dir, PARTS_DIR)
+    for name in sorted(os.listdir(parts)) if os.path.isdir(parts) else []:
+        if name.endswith('.json'):
+            with open(os.path.join(parts, name), encoding='utf-8') as handle:
+                done.update(json.load(handle))
+
+    return done
+
+def generate_transcripts(output_dir, workers=None, chunk_size=CHUNK_SIZE, with_json=False, restart=False, progress=None):
+    """
+    Render every student's transcript into ``output_dir``, resuming a
+    previous run unless ``restart``. ``workers`` processes render chunks of
+    ``chunk_size`` students (1 renders in this process). ``progress`` is
+    called with (students done, students total, seconds elapsed).
+    Returns the number of students rendered by this run.
+    """
+
+    if restart and os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    for directory in ('html', 'json' if with_json else None, PARTS_DIR):
+        if directory:
+            os.makedirs(os.path.join(output_dir, directory), exist_ok=True)
+
+    done = _completed(output_dir)
+    student_ids = [pk for pk in Student.objects.order_by('pk').values_list('pk', flat=True) if str(pk) not in done]
+    chunks = [student_ids[start:start + chunk_size] for start in range(0, len(student_ids), chunk_size)]
+    report = progress or (lambda written, total, elapsed: None)
+
+    started = time.perf_counter()
+    written = 0
+
+    if workers == 1:
+        for chunk in chunks:
+            written += render_chunk(output_dir, chunk, with_json)
+            report(written, len(student_ids), time.perf_counter() - started)
+    elif chunks:
+        # Forked workers must not share the parent's open connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(render_chunk, output_dir, chunk, with_json) for chunk in chunks]
+            for future in as_completed(futures):
+                written += future.result()
+                report(written, len(student_ids), time.perf_counter() - started)
+
+    students = _completed(output_dir)
+    _write(os.path.join(output_dir, MANIFEST), json.dumps({
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'count': len(students),
+        'students': dict(sorted(students.items(), key=lambda item: int(item[0]))),
+    }, indent=1))
+    shutil.rmtree(os.path.join(output_dir, PARTS_DIR))
+
+    return written
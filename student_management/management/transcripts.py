@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, OuterRef, Subquery
+from .models import Student, Enrollment, ArchivedEnrollment
+from .reports import alist
+from .standing import STANDING_FIELDS
+
+# Transcript cache. A transcript's version is read with one aggregate query:
+# the latest updated_at of the student, their enrollments and those
+# enrollments' courses (archived ones included), plus the stored counter and
+# standing (written without bumping updated_at). The version is the page's
+# ETag and Last-Modified, so a revalidating client gets a 304 after that
+# single query, and it guards the cached context: a stale entry is never
+# served, even after bulk writes that skip signals. Signals drop the entries
+# of the students a write touches so they do not linger until they expire.
+
+TRANSCRIPT_CACHE_KEY = 'management:transcript:%s'
+
+
+def _transcript_cache():
+
+    return caches[getattr(settings, 'TRANSCRIPT_CACHE_ALIAS', 'default')]
+
+def _version_query(pk):
+
+    # A subquery, since a second multi-valued join would multiply the rows.
+    archived_courses_updated = (
+        ArchivedEnrollment.objects
+        .filter(student_id=OuterRef('pk'))
+        .order_by()
+        .values('student_id')
+        .annotate(latest=Max('course__updated_at'))
+        .values('latest')
+    )
+
+    return (
+        Student.objects
+        .filter(pk=pk)
+        .order_by('pk')
+        .values('updated_at', 'enrollment_count', *STANDING_FIELDS)
+        .annotate(
+            enrollments_updated=Max('enrollments__updated_at'),
+            courses_updated=Max('enrollments__course__updated_at'),
+            archived_courses_updated=Subquery(archived_courses_updated),
+        )
+    )
+
+def _version(row):
+
+    if row is None:
+        return None
+
+    payload = json.dumps(sorted(row.items()), cls=DjangoJSONEncoder, separators=(',', ':'))
+    stamps = (row['updated_at'], row['enrollments_updated'], row['courses_updated'], row['archived_courses_updated'])
+    last_modified = max(stamp for stamp in stamps if stamp)
+
+    return '"%s"' % hashlib.sha1(payload.encode()).hexdigest(), last_modified
+
+def transcript_version(pk):
+    """(ETag, Last-Modified) of a student's transcript, or None if there is no such student."""
+
+    return _version(_version_query(pk).first())
+
+async def atranscript_version(pk):
+
+    return _version(await _version_query(pk).afirst())
+
+def enrollment_history(enrollments, archived):
+    """
+    Merge Enrollment rows and ArchivedEnrollment rows (closed terms, see
+    management/archive.py), courses loaded, into one list, oldest term first.
+    """
+
+    return sorted([*enrollments, *archived], key=lambda row: (row.term, row.course.title, row.pk))
+
+def transcript_context(student, enrollments):
+    """
+    Context of reports/student_transcript.html for ``student`` and their
+    enrollment_history() (course loaded).
+    """
+
+    # GPA, credits and the in-progress count are stored on the student
+    # (see management/standing.py) instead of being re-derived here.
+    return {
+        'student': student,
+        'enrollments': enrollments,
+        'total_courses': len(enrollments),
+        'gpa': student.gpa,
+        'total_credits': student.credits_attempted,
+        'credits_earned': student.credits_earned,
+        'in_progress_count': student.in_progress_count,
+    }
+
+async def aget_transcript_context(pk, etag):
+    """The transcript template context, from the cache when it was stored for ``etag``."""
+
+    cache = _transcript_cache()
+    key = TRANSCRIPT_CACHE_KEY % pk
+    entry = await cache.aget(key)
+    if entry is not None and entry['etag'] == etag:
+        return entry['context']
+
+    student, enrollments, archived = await asyncio.gather(
+        Student.objects.aget(pk=pk),
+        alist(Enrollment.objects.filter(student_id=pk).select_related('course')),
+        alist(ArchivedEnrollment.objects.filter(student_id=pk).select_related('course'))
+    )
+
+    context = transcript_context(student, enrollment_history(enrollments, archived))
+    await cache.aset(key, {'etag': etag, 'context': context}, getattr(settings, 'TRANSCRIPT_CACHE_TIMEOUT', 3600))
+
+    return context
+
+def invalidate_transcripts(student_ids):
+
+    _transcript_cache().delete_many([TRANSCRIPT_CACHE_KEY % pk for pk in set(student_ids)])
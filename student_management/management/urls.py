@@ -1,5 +1,7 @@
 from django.urls import path
 from .views import *
+from . import api
+from .metrics import metrics_view
 
 urlpatterns = [
     
@@ -19,6 +21,8 @@ urlpatterns = [
     path('courses/add/', course_create, name='course_create'),
     path('courses/<int:pk>/edit', course_edit, name='course_edit'),
     path('courses/<int:pk>/delete', course_delete, name='course_delete'),
+    path('courses/<int:pk>/grades', course_grade_sheet, name='course_grade_sheet'),
+    path('courses/<int:pk>/grades.json', course_grades_json, name='course_grades_json'),
     
     # Enrollments Management Urls
     path('enrollments/', enrollment_list, name='enrollment_list'),
@@ -28,6 +32,28 @@ urlpatterns = [
     
     # Reports Management Urls
     path('reports/', report_overview, name='reports_overview'),
+    path('reports/cohort/', report_cohort, name='reports_cohort'),
     path('reports/student/<int:pk>', student_transcript, name='student_transcript'),
     
+    # Export Urls
+    path('export/<str:dataset>/', export_data, name='export_data'),
+    
+    # Autocomplete Urls
+    path('autocomplete/<str:kind>/', autocomplete_lookup, name='autocomplete'),
+    
+    # JSON API Urls
+    path('api/v1/students/<int:pk>/transcript/', api.student_transcript, name='api_transcript'),
+    path('api/v1/<str:resource>/', api.resource_list, name='api_list'),
+    path('api/v1/<str:resource>/<int:pk>/', api.resource_detail, name='api_detail'),
+    
+    # Metrics Urls
+    path('_metrics', metrics_view, name='metrics'),
+    
+    # Import Urls
+    path('import/', import_upload, name='import_upload'),
+    
+    # Background Job Urls
+    path('jobs/', job_list, name='job_list'),
+    path('jobs/<int:pk>/', job_detail, name='job_detail'),
+    
 ]
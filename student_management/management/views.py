@@ -1,24 +1,60 @@
+import asyncio
+import io
+import json
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Q,Count
-from django.http import HttpResponse
 from django.core.paginator import Paginator
-from .models import Student, Course, Enrollment
-from .forms import StudentForm, CourseForm, EnrollmentForm, GradeUpdateForm
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from django.views.decorators.http import require_http_methods
+from .models import Student, Course, Enrollment, WaitlistEntry, Job
+from .autocomplete import LOOKUPS, autocomplete
+from .deletion import delete_with_enrollments
+from .analytics import GRADES, cohort_report
+from .exports import DATASETS, FORMATS, stream_export
+from .filters import enrollment_filters, filter_enrollments, validate_enrollment_filters
+from .grading import apply_grades, clean_grades
+from .forms import StudentForm, CourseForm, EnrollmentForm, GradeUpdateForm, GradeSheetFormSet, ImportForm
+from .importers import import_csv
+from .jobs import enqueue
+from .pagination import InvalidCursor, paginate, page_query
+from .registration import register
+from .search import search
+from .reports import alist
+from .stats import aget_dashboard_stats
+from .terms import ALL_TERMS, current_term, term_choices
+from .transcripts import aget_transcript_context, atranscript_version
 
 # Create your views here.
 
-def home(request):
+# The read-only dashboard, detail, report and transcript views are async:
+# under ASGI (see student_management/asgi.py) they use the async ORM and
+# await independent queries together. Querysets are evaluated before
+# render(), since templates cannot run queries from async code.
+
+async def _aget_or_404(queryset, **kwargs):
+    
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.verbose_name} matches the given query.')
+
+async def home(request):
     
-    total_students = Student.objects.count()
-    total_courses = Course.objects.count()
-    total_enrollments = Enrollment.objects.count()
-    recent_enrollments = Enrollment.objects.select_related('student', 'course').order_by('-enrollment_date')[:5]
+    stats, recent_enrollments = await asyncio.gather(
+        aget_dashboard_stats(),
+        alist(Enrollment.objects.select_related('student', 'course').order_by('-enrollment_date')[:5])
+    )
     
     context = {
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'total_enrollments': total_enrollments,
+        'total_students': stats['total_students'],
+        'total_courses': stats['total_courses'],
+        'total_enrollments': stats['total_enrollments'],
         'recent_enrollments': recent_enrollments
     }
     
@@ -32,26 +68,25 @@ def student_list(request):
     
     if search_query:
         
-        students = students.filter(
-            Q(name__icontains=search_query) | Q(email__icontains=search_query)
-        )
+        students = search(students, search_query)
     
-    students = students.annotate(enrollment_count=Count('enrollments'))
-    paginator = Paginator(students, 10)
-    page_number = request.GET.get('page')
-    students = paginator.get_page(page_number)
+    # Cursor pages keep the search ranking.
+    students = paginate(request, students, ['-search_rank', 'name'] if search_query else ['name'])
     
     context = {
         'students': students,
-        'search_query': search_query
+        'search_query': search_query,
+        'page_query': page_query(request)
     }
     
     return render(request, 'students/list.html', context)
 
-def student_detail(request, pk):
+async def student_detail(request, pk):
     
-    student = get_object_or_404(Student, pk=pk)
-    enrollments = Enrollment.objects.filter(student=student).select_related('course')
+    student, enrollments = await asyncio.gather(
+        _aget_or_404(Student.objects.all(), pk=pk),
+        alist(Enrollment.objects.filter(student_id=pk).select_related('course'))
+    )
     
     context = {
         'student': student,
@@ -112,14 +147,19 @@ def student_delete(request,pk):
     if request.method == 'POST':
         
         Student_name = student.name
-        student.delete()
+        if student.enrollment_count > settings.JOB_DELETE_THRESHOLD:
+            job = enqueue('delete_records', {'kind': 'student', 'pk': student.pk})
+            messages.info(request, f'Student "{Student_name}" is being deleted in the background.')
+            return redirect('job_detail', pk=job.pk)
+        
+        # Enrollments go in short batches; see management/deletion.py.
+        delete_with_enrollments(student)
         messages.success(request, f'Student "{Student_name}" deleted successfully!')
         return redirect('student_list')
     
-    enrollment_count = student.enrollments.count()
     context = {
         'student': student,
-        'enrollment_count': enrollment_count
+        'enrollment_count': student.enrollment_count
     }
     return render(request, 'students/confirm_delete.html', context)
 
@@ -130,24 +170,24 @@ def course_list(request):
     courses = Course.objects.all()
     
     if search_query:
-        courses = courses.filter(title__icontains=search_query)
+        courses = search(courses, search_query)
         
-    courses = courses.annotate(enrollment_count = Count('enrollments'))
-    paginator = Paginator(courses, 10)
-    page_number = request.GET.get('page')
-    courses = paginator.get_page(page_number)
+    courses = paginate(request, courses, ['-search_rank', 'title'] if search_query else ['title'])
     
     context = {
         'courses': courses,
-        'search_query': search_query
+        'search_query': search_query,
+        'page_query': page_query(request)
     }
     
     return render(request, 'courses/list.html', context)
 
-def course_detail(request, pk):
+async def course_detail(request, pk):
     
-    course = get_object_or_404(Course, pk=pk)
-    enrollments = Enrollment.objects.filter(course=course).select_related('student')
+    course, enrollments = await asyncio.gather(
+        _aget_or_404(Course.objects.all(), pk=pk),
+        alist(Enrollment.objects.filter(course_id=pk).select_related('student'))
+    )
     
     context = {
         'course': course,
@@ -156,6 +196,79 @@ def course_detail(request, pk):
     
     return render(request, 'courses/details.html', context)
 
+def course_grade_sheet(request, pk):
+    
+    course = get_object_or_404(Course, pk=pk)
+    enrollments = list(Enrollment.objects.filter(course=course).select_related('student').order_by('student__name'))
+    initial = [{'enrollment': enrollment.pk, 'grade': enrollment.grade or ''} for enrollment in enrollments]
+    
+    if request.method == 'POST':
+        
+        formset = GradeSheetFormSet(request.POST, initial=initial)
+        
+        if formset.is_valid():
+            
+            grades = {
+                form.cleaned_data['enrollment']: form.cleaned_data['grade'] or None
+                for form in formset if form.has_changed()
+            }
+            
+            try:
+                changed = apply_grades(course, grades) if grades else []
+            except ValidationError as e:
+                messages.error(request, ' '.join(e.messages))
+            else:
+                messages.success(request, f'Updated {len(changed)} grade(s) in "{course.title}"!')
+                return redirect('course_grade_sheet', pk=course.pk)
+        else:
+            messages.error(request, 'Please correct the errors below!')
+    else:
+        
+        formset = GradeSheetFormSet(initial=initial)
+        
+    context = {
+        'course': course,
+        'formset': formset,
+        'rows': zip(enrollments, formset)
+    }
+    
+    return render(request, 'courses/grade_sheet.html', context)
+
+@require_http_methods(['GET', 'POST'])
+def course_grades_json(request, pk):
+    
+    course = get_object_or_404(Course, pk=pk)
+    
+    if request.method == 'POST':
+        
+        try:
+            payload = json.loads(request.body)
+            grades = clean_grades(payload.get('grades'))
+            if payload.get('background'):
+                job = enqueue('apply_grades', {'course_id': course.pk, 'grades': grades})
+                return JsonResponse({'job': job.pk, 'status': reverse('job_detail', args=[job.pk])}, status=202)
+            changed = apply_grades(course, grades)
+        except (ValueError, AttributeError):
+            return JsonResponse({'errors': ['Expected a JSON object with "grades".']}, status=400)
+        except ValidationError as e:
+            return JsonResponse({'errors': e.messages}, status=400)
+        
+        return JsonResponse({'updated': [enrollment.pk for enrollment in changed]})
+    
+    enrollments = (
+        Enrollment.objects.filter(course=course)
+        .order_by('student__name')
+        .values('id', 'student_id', 'student__name', 'grade')
+    )
+    
+    return JsonResponse({
+        'course': course.pk,
+        'enrollments': [
+            {'id': row['id'], 'student_id': row['student_id'], 'student': row['student__name'], 'grade': row['grade']}
+            for row in enrollments
+        ]
+    })
+
 def course_create(request):
     
     if request.method == 'POST':
@@ -208,15 +321,18 @@ def course_delete(request, pk):
     if request.method == 'POST':
         
         course_title = course.title
-        course.delete()
+        if course.enrollment_count > settings.JOB_DELETE_THRESHOLD:
+            job = enqueue('delete_records', {'kind': 'course', 'pk': course.pk})
+            messages.info(request, f'Course "{course_title}" is being deleted in the background.')
+            return redirect('job_detail', pk=job.pk)
+        
+        delete_with_enrollments(course)
         messages.success(request, f'Course "{course_title}" deleted successfully!')
         return redirect('course_list')
     
-    enrollment_count = course.enrollments.count()
-    
     context = {
         'course': course,
-        'enrollment_count': enrollment_count
+        'enrollment_count': course.enrollment_count
     }
     
     return render(request, 'courses/confirm_delete.html', context)
@@ -224,37 +340,40 @@ def course_delete(request, pk):
 # Enrollment Views
 def enrollment_list(request):
     
-    enrollments = Enrollment.objects.select_related('student', 'course').all()
-    
-    student_filter = request.GET.get('student')
-    course_filter = request.GET.get('course')
-    grade_filter = request.GET.get('grade')
-    
-    if student_filter:
-        enrollments = enrollments.filter(student__id=student_filter)
-    if course_filter:
-        enrollments = enrollments.filter(course__id=course_filter)
-    if grade_filter:
-        enrollments = enrollments.filter(grade=grade_filter)
+    filters = enrollment_filters(request.GET)
+    try:
+        validate_enrollment_filters(filters)
+    except ValidationError as e:
+        messages.error(request, ' '.join(e.messages))
+        filters = {}
+    # The list opens on the current term; ?term=all shows every open term.
+    filters.setdefault('term', current_term())
+    enrollments = filter_enrollments(Enrollment.objects.select_related('student', 'course'), filters)
         
-    paginator = Paginator(enrollments, 10)
-    page_number = request.GET.get('page')
-    enrollments = paginator.get_page(page_number)
+    enrollments = paginate(request, enrollments, ['student__name', 'course__title'])
     
-    students = Student.objects.all()
-    courses = Course.objects.all()
+    # Only the selected student/course are rendered; the filter pickers load
+    # the rest on demand from the autocomplete endpoints.
+    student_id, course_id = filters.get('student', ''), filters.get('course', '')
+    selected_student = Student.objects.filter(pk=student_id).first() if student_id.isdigit() else None
+    selected_course = Course.objects.filter(pk=course_id).first() if course_id.isdigit() else None
     grades = Enrollment.GRADE_CHOICES
     
     context = {
         'enrollments': enrollments,
-        'students': students,
-        'courses': courses,
+        'selected_student': selected_student,
+        'selected_course': selected_course,
         'grades': grades,
+        'terms': term_choices(),
+        'all_terms': ALL_TERMS,
         'current_filter': {
-            'student': student_filter,
-            'course': course_filter,
-            'grade': grade_filter
-        }
+            'student': filters.get('student'),
+            'course': filters.get('course'),
+            'grade': filters.get('grade'),
+            'term': filters['term']
+        },
+        'page_query': page_query(request),
+        'export_query': urlencode(filters)
     }
     
     return render(request, 'enrollments/list.html', context)
@@ -267,15 +386,21 @@ def enrollment_create(request):
         
         if not form.is_valid():
             messages.error(request, 'Please correct the errors below!')
-            
-        try:
-            enrollment = form.save()
-            messages.success(request, f'{enrollment.student.name} successfully enrolled in {enrollment.course.title}!')
-            return redirect('enrollment_list')
-        except Exception as e:
-            messages.error(request, f'Error creating enrollment: {str(e)}!')
-        
-    form = EnrollmentForm()
+        else:
+            student, course = form.cleaned_data['student'], form.cleaned_data['course']
+            # Seats are reserved atomically; see management/registration.py.
+            try:
+                result = register(student.pk, course.pk, form.cleaned_data['grade'], form.cleaned_data['join_waitlist'])
+            except ValidationError as e:
+                messages.error(request, f'Could not enroll {student.name} in {course.title}: {" ".join(e.messages)}')
+            else:
+                if isinstance(result, WaitlistEntry):
+                    messages.info(request, f'{course.title} is full; {student.name} was added to the waitlist.')
+                else:
+                    messages.success(request, f'{student.name} successfully enrolled in {course.title}!')
+                return redirect('enrollment_list')
+    else:
+        form = EnrollmentForm()
     
     context = {
         'form': form,
@@ -286,7 +411,7 @@ def enrollment_create(request):
 
 def enrollment_update_grade(request, pk):
     
-    enrollment = get_object_or_404(Enrollment, pk=pk)
+    enrollment = get_object_or_404(Enrollment.objects.select_related('student', 'course'), pk=pk)
     
     if request.method == 'POST':
         
@@ -311,7 +436,7 @@ def enrollment_update_grade(request, pk):
 
 def enrollment_delete(request, pk):
     
-    enrollment = get_object_or_404(Enrollment, pk=pk)
+    enrollment = get_object_or_404(Enrollment.objects.select_related('student', 'course'), pk=pk)
     
     if request.method == 'POST':
         
@@ -328,65 +453,166 @@ def enrollment_delete(request, pk):
     return render(request, 'enrollments/confirm_delete.html', context)
 
 # Reporting Views
-def report_overview(request):
+async def report_overview(request):
     
-    students_with_enrollments = (
-        Student.objects
-        .annotate(enrollment_count=Count('enrollments'))
-        .order_by('-enrollment_count')[:5]   # get top 10
+    stats = await aget_dashboard_stats()
+        
+    context = {
+        'students_with_enrollments': stats['top_students'],
+        'popular_courses': stats['popular_courses'],
+        'grade_stats': stats['grade_stats'],
+        'ungraded_count': stats['ungraded'],
+        'total_students': stats['total_students'],
+        'total_courses': stats['total_courses'],
+        'total_enrollments': stats['total_enrollments']
+    }
+    
+    return render(request, 'reports/overview.html', context)
+
+def report_cohort(request):
+    
+    context = {
+        **cohort_report(),
+        'grades': GRADES
+    }
+    
+    return render(request, 'reports/cohort.html', context)
+
+def export_data(request, dataset):
+    
+    export_format = request.GET.get('format', 'csv')
+    
+    if dataset not in DATASETS or export_format not in FORMATS:
+        raise Http404('Unknown export.')
+    
+    # Checked before streaming starts, so a bad filter is a 400 and not a truncated file.
+    filters = enrollment_filters(request.GET)
+    try:
+        validate_enrollment_filters(filters)
+    except ValidationError as e:
+        return HttpResponse(' '.join(e.messages), status=400, content_type='text/plain')
+    
+    response = StreamingHttpResponse(
+        stream_export(dataset, export_format, filters),
+        content_type=FORMATS[export_format]
     )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+    
+    return response
+
+def autocomplete_lookup(request, kind):
+    
+    if kind not in LOOKUPS:
+        raise Http404('Unknown lookup.')
     
-    popular_courses = Course.objects.annotate(enrollment_count = Count('enrollments')).order_by('-enrollment_count')[:5]
+    try:
+        per_page = int(request.GET.get('limit', 20))
+    except ValueError:
+        per_page = 20
     
-    grade_stats = {}
+    try:
+        return JsonResponse(autocomplete(kind, request.GET.get('q', ''), request.GET.get('cursor'), per_page))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+def import_upload(request):
+    
+    result = None
     
-    for grade_code, grade_name in Enrollment.GRADE_CHOICES:
-        grade_stats[grade_name] =Enrollment.objects.filter(grade=grade_code).count()
+    if request.method == 'POST':
         
-    total_students = Student.objects.count()
-    total_courses = Course.objects.count()
-    total_enrollments = Enrollment.objects.count()
+        form = ImportForm(request.POST, request.FILES)
+        
+        if form.is_valid() and form.cleaned_data['background']:
+            
+            try:
+                content = form.cleaned_data['file'].read().decode('utf-8-sig')
+            except UnicodeDecodeError as e:
+                messages.error(request, f'Could not import file: {e}')
+            else:
+                arguments = {'kind': form.cleaned_data['kind'], 'content': content, 'update': form.cleaned_data['update']}
+                job = enqueue('import_csv', arguments)
+                messages.info(request, 'The file is being imported in the background.')
+                return redirect('job_detail', pk=job.pk)
+            
+        elif form.is_valid():
+            
+            handle = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            
+            try:
+                result = import_csv(form.cleaned_data['kind'], handle, form.cleaned_data['update'])
+            except (UnicodeDecodeError, ValidationError) as e:
+                messages.error(request, f'Could not import file: {e}')
+            else:
+                messages.success(request, f'Imported {result.written} of {result.rows} {result.kind} rows.')
+    else:
+        
+        form = ImportForm()
         
     context = {
-        'students_with_enrollments': students_with_enrollments,
-        'popular_courses': popular_courses,
-        'grade_stats': grade_stats,
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'total_enrollments': total_enrollments
+        'form': form,
+        'result': result,
+        'errors': result.errors[:100] if result else []
     }
     
-    return render(request, 'reports/overview.html', context)
+    return render(request, 'imports/form.html', context)
 
-def student_transcript(request, pk):
+async def student_transcript(request, pk):
     
-    student = get_object_or_404(Student, pk=pk)
-    enrollments = Enrollment.objects.filter(student=student).select_related('course')
-    
-    gpa_calculation = None
-    grade_points = {
-        'A+': 4.0, 'A': 4.0, 'A-': 3.7,
-        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
-        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
-        'D+': 1.3, 'D': 1.0, 'F': 0.0
+    # Revalidating clients get a 304 after the one version query; otherwise
+    # the context comes from the cache while the version is unchanged.
+    version = await atranscript_version(pk)
+    if version is None:
+        raise Http404('No student matches the given query.')
+    etag, last_modified = version
+    
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        context = await aget_transcript_context(pk, etag)
+        response = render(request, 'reports/student_transcript.html', context)
+    
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'no-cache'
+    
+    return response
+
+# Background job views
+def job_list(request):
+    
+    status = request.GET.get('status', '')
+    if status not in dict(Job.STATUS_CHOICES):
+        status = ''
+    
+    # Imports carry the whole file in their arguments; the list needs none of it.
+    jobs = Job.objects.defer('arguments', 'result', 'error')
+    if status:
+        jobs = jobs.filter(status=status)
+    
+    counts = dict(Job.objects.order_by().values_list('status').annotate(count=Count('pk')))
+    
+    context = {
+        'jobs': Paginator(jobs, 20).get_page(request.GET.get('page')),
+        'statuses': [(value, label, counts.get(value, 0)) for value, label in Job.STATUS_CHOICES],
+        'current_status': status,
+        'page_query': page_query(request)
     }
     
-    grade_enrollments = enrollments.filter(grade__in=grade_points.keys())
-    if grade_enrollments:
-        
-        total_points = sum(grade_points[e.grade] * e.course.credits for e in grade_enrollments)
-        total_credits = sum(e.course.credits for e in grade_enrollments)    
-        gpa_calculation = round(total_points/total_credits, 2) if total_credits > 0 else 0
-        
-    total_credits = sum(e.course.credits for e in enrollments)
-    in_progress = enrollments.filter(Q(grade__isnull=True) | Q(grade='I')).count()
+    return render(request, 'jobs/list.html', context)
+
+def job_detail(request, pk):
+    
+    job = get_object_or_404(Job, pk=pk)
+    
+    arguments = {
+        key: f'({len(value)} characters)' if isinstance(value, str) and len(value) > 200 else value
+        for key, value in job.arguments.items()
+    }
     
     context = {
-        'student': student,
-        'enrollments': enrollments,
-        'gpa': gpa_calculation,
-        'total_credits': sum(e.course.credits for e in enrollments),
-        'in_progress_count': in_progress,
+        'job': job,
+        'arguments': json.dumps(arguments, indent=2),
+        'result': json.dumps(job.result, indent=2) if job.result is not None else ''
     }
     
-    return render(request, 'reports/student_transcript.html', context)
+    return render(request, 'jobs/details.html', context)
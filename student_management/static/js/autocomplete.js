@@ -0,0 +1,89 @@
+// Lazily loaded options for <select data-autocomplete="url">. The server
+// renders only the empty and the selected option; typing in the search box
+// above the select fetches matching options a page at a time.
+(function () {
+    'use strict';
+
+    var MORE = '__more__';
+
+    function enhance(select) {
+        var url = select.dataset.autocomplete;
+        var search = document.createElement('input');
+        var timer = null;
+        var next = null;
+        var query = '';
+        var current = select.value;
+
+        search.type = 'search';
+        search.className = 'form-control form-control-sm mb-1';
+        search.placeholder = 'Type to search...';
+        search.setAttribute('aria-label', 'Search ' + (select.name || 'options'));
+        select.parentNode.insertBefore(search, select);
+
+        function reset() {
+            Array.prototype.slice.call(select.options).forEach(function (option) {
+                if (option.value !== '' && !option.selected) {
+                    select.removeChild(option);
+                }
+            });
+        }
+
+        function load(cursor) {
+            var params = new URLSearchParams({q: query});
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+
+            fetch(url + '?' + params.toString(), {headers: {'Accept': 'application/json'}})
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    var more = select.querySelector('option[value="' + MORE + '"]');
+                    if (more) {
+                        select.removeChild(more);
+                    }
+                    if (!cursor) {
+                        reset();
+                    }
+
+                    data.results.forEach(function (result) {
+                        if (String(result.id) === select.value) {
+                            return;
+                        }
+                        select.appendChild(new Option(result.text, result.id));
+                    });
+
+                    next = data.next;
+                    if (next) {
+                        select.appendChild(new Option('Load more...', MORE));
+                    }
+                });
+        }
+
+        search.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                query = search.value;
+                load(null);
+            }, 250);
+        });
+
+        select.addEventListener('focus', function () {
+            if (select.options.length <= 2 && !next) {
+                load(null);
+            }
+        }, {once: true});
+
+        select.addEventListener('change', function () {
+            if (select.value === MORE) {
+                select.value = current;
+                load(next);
+                return;
+            }
+            current = select.value;
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete]').forEach(enhance);
+    });
+})();
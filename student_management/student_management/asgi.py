@@ -3,6 +3,14 @@ ASGI config for student_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with any ASGI server, e.g. uvicorn:
+
+    uvicorn student_management.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Under ASGI the async views (dashboard, reports, student/course details and
+transcripts) run on the event loop; the remaining views are run in a
+thread pool by Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,12 +43,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'management.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # Below the session middleware, so saving the session does not pin reads to the primary.
+    'management.replicas.ReplicaMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -54,15 +59,25 @@ ROOT_URLCONF = 'student_management.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The stock Django backend, plus render timing for the request metrics.
+        'BACKEND': 'management.metrics.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory; under runserver the
+            # autoreloader clears them when a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+            # Debug mode records source positions for error pages, at a cost on every render.
+            'debug': DEBUG,
         },
     },
 ]
@@ -80,17 +95,160 @@ WSGI_APPLICATION = 'student_management.wsgi.application'
 #     }
 # }
 
+# Connection details come from the environment; the defaults suit a local
+# PostgreSQL. DB_ENGINE=django.db.backends.sqlite3 with DB_NAME=<file> runs
+# on SQLite instead. Persistent connections and pooling are configured in
+# settings_production.py.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'student_management_db',
-        'USER': 'postgres',
-        'PASSWORD': 'Root@123',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.postgresql'),
+        'NAME': os.environ.get('DB_NAME', 'student_management_db'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
     }
 }
 
+# Read replicas (see management/replicas.py). DB_REPLICAS lists them
+# comma-separated: host or host:port on PostgreSQL (same name and
+# credentials as the primary), file paths on SQLite (opened read-only).
+# They become the aliases replica1, replica2, ...; under "manage.py test"
+# they mirror the primary.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = f'file:{replica.strip()}?mode=ro'
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES['default']['PORT'])
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['management.replicas.ReplicaRouter']
+
+# Views whose GET/HEAD requests read from a replica, and how long a session
+# keeps reading from the primary after it wrote (longer than the usual
+# replication lag). An unreachable replica is retried after
+# REPLICA_RETRY_SECONDS.
+REPLICA_VIEWS = {
+    'home', 'student_list', 'student_detail', 'course_list', 'course_detail', 'enrollment_list',
+    'reports_overview', 'reports_cohort', 'student_transcript', 'export_data', 'autocomplete',
+    'api_list', 'api_detail', 'api_transcript',
+}
+REPLICA_PIN_SECONDS = 15
+REPLICA_RETRY_SECONDS = 30
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Local-memory cache is per process; with several workers use the
+# file-based cache below (or a shared backend) so signal invalidation
+# reaches every process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-management',
+    },
+    # {% cache %} fragments of the list pages (one per table row). Keys
+    # include each row's updated_at, so edited rows miss and stale ones age
+    # out; MAX_ENTRIES leaves room for every row of a large table.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-management-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#         'LOCATION': BASE_DIR / 'cache',
+#     }
+# }
+
+# Dashboard and report statistics (see management/stats.py)
+STATS_CACHE_ALIAS = 'default'
+STATS_CACHE_TIMEOUT = 300
+
+# Per-student transcript context (see management/transcripts.py)
+TRANSCRIPT_CACHE_ALIAS = 'default'
+TRANSCRIPT_CACHE_TIMEOUT = 3600
+
+# Cohort report and its version token (see management/analytics.py)
+COHORT_CACHE_ALIAS = 'default'
+COHORT_CACHE_TIMEOUT = 3600
+
+# List pagination (see management/pagination.py). Offset pages by default;
+# True switches the list views to keyset (cursor) pagination. A request can
+# also opt in on its own with ?cursor=.
+CURSOR_PAGINATION = False
+
+# Background jobs (see management/jobs.py), run by "manage.py runworker".
+# Deleting a student or course with more enrollments than this is queued
+# as a job instead of running inside the request.
+JOB_DELETE_THRESHOLD = 5000
+
+# Academic terms (see management/terms.py). None follows today's date; set
+# a term code such as '2026-3' to pin the current term, e.g. while a term
+# is being wrapped up. "manage.py archive_terms" moves the enrollments of
+# terms before it to the archive table.
+CURRENT_TERM = None
+
+# Student/course search (see management/search.py): 'auto' uses trigram
+# indexes on PostgreSQL and the SearchToken inverted index elsewhere;
+# 'trigram' or 'index' forces one of them.
+SEARCH_BACKEND = 'auto'
+
+# Request metrics (see management/metrics.py). Every request is logged as a
+# JSON line on the "management.metrics" logger and aggregated per URL name
+# at /_metrics. A view running more queries than its budget logs a warning;
+# under "manage.py test" it raises QueryBudgetExceeded instead.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    'home': 5,
+    'student_list': 4,
+    'course_list': 4,
+    'enrollment_list': 5,
+    'student_detail': 3,
+    'course_detail': 3,
+    'student_transcript': 4,
+    'reports_overview': 4,
+    'reports_cohort': 4,
+    'autocomplete': 2,
+    'api_list': 3,
+    'api_detail': 3,
+    'api_transcript': 4,
+    'enrollment_update_grade': 6,
+    'enrollment_delete': 6,
+    'course_delete': 24,
+    'course_grade_sheet': 10,
+    'course_grades_json': 10,
+    'job_list': 3,
+    'job_detail': 1,
+    # Imports run a fixed number of queries per batch; None disables the check.
+    'import_upload': None,
+}
+QUERY_BUDGET_RAISE = TESTING
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'management.metrics': {
+            'handlers': ['console'],
+            'level': 'WARNING' if TESTING else 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
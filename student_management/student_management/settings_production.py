@@ -0,0 +1,58 @@
+"""
+Production settings for student_management.
+
+Use with DJANGO_SETTINGS_MODULE=student_management.settings_production.
+Everything deployment-specific comes from the environment:
+
+    DJANGO_SECRET_KEY       required
+    DJANGO_ALLOWED_HOSTS    comma-separated host names
+    DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+                            connection details (see settings.py)
+    DB_CONN_MAX_AGE         seconds a connection is reused across requests (default 600)
+    DB_POOL                 "1" to use psycopg 3's connection pool instead (PostgreSQL only;
+                            recommended under ASGI, where connections are not reused)
+    DB_POOL_MIN_SIZE        connections kept open per process (default 2)
+    DB_POOL_MAX_SIZE        upper bound per process (default 10)
+    DB_POOL_TIMEOUT         seconds a request waits for a free connection (default 10)
+    DB_REPLICAS             read replicas (see settings.py)
+
+Persistent connections are health-checked before reuse; pooled connections
+are checked by the pool when handed out. The primary and every replica get
+the same connection settings (one pool each).
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, TEMPLATES
+
+
+def _env_int(name, default):
+
+    return int(os.environ.get(name, default))
+
+DEBUG = False
+TEMPLATES[0]['OPTIONS']['debug'] = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+if os.environ.get('DB_POOL') == '1':
+    from psycopg_pool import ConnectionPool
+
+    # Django closes pooled connections back into the pool after each
+    # request; CONN_MAX_AGE must stay 0 with a pool.
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'] = {
+            'pool': {
+                'min_size': _env_int('DB_POOL_MIN_SIZE', 2),
+                'max_size': _env_int('DB_POOL_MAX_SIZE', 10),
+                'timeout': _env_int('DB_POOL_TIMEOUT', 10),
+                'check': ConnectionPool.check_connection,
+            },
+        }
+else:
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = _env_int('DB_CONN_MAX_AGE', 600)
+        database['CONN_HEALTH_CHECKS'] = True